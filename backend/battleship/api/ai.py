@@ -0,0 +1,96 @@
+"""
+Estratègia de tir de la CPU: caça i persecució amb mapa de densitat de probabilitat.
+
+Per a cada vaixell que queda a flota es compten totes les posicions on encara hi podria
+ser (sense tocar aigua disparada ni vaixells enfonsats). Cada posició suma pes a les cel·les
+que cobreix i les que passen per impactes encara no enfonsats pesen ``HIT_WEIGHT`` vegades
+més per impacte, de manera que quan hi ha un vaixell tocat la CPU el persegueix i, si no,
+cerca a les zones on hi caben més vaixells. Es dispara a la cel·la lliure de densitat màxima.
+
+Si NumPy està instal·lat el mapa es calcula vectoritzat; si no, amb Python pur.
+"""
+import random
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depèn de l'entorn
+    np = None
+
+HIT_WEIGHT = 50
+
+
+def choose_target(width, height, sizes, misses, hits, sunk, rng=random):
+    """
+    Tria la següent cel·la (fila, col) on disparar.
+
+    ``sizes`` són les mides dels vaixells encara a flota, ``misses`` les cel·les d'aigua
+    disparades, ``hits`` els impactes en vaixells no enfonsats i ``sunk`` les cel·les de
+    vaixells enfonsats.
+    """
+    density = density_map if np is not None else density_map_python
+    cells = density(width, height, sizes, misses, hits, sunk)
+    if not cells:
+        # Cap posició possible (p. ex. flota desconeguda): qualsevol cel·la no disparada
+        shot = misses | hits | sunk
+        cells = [(r, c) for r in range(height) for c in range(width) if (r, c) not in shot]
+    return rng.choice(cells)
+
+
+def density_map(width, height, sizes, misses, hits, sunk):
+    """Retorna les cel·les lliures amb densitat màxima (implementació NumPy)."""
+    blocked = np.zeros((height, width), dtype=np.int32)
+    hit_grid = np.zeros((height, width), dtype=np.int32)
+    for r, c in misses | sunk:
+        blocked[r, c] = 1
+    for r, c in hits:
+        hit_grid[r, c] = 1
+
+    density = np.zeros((height, width), dtype=np.float64)
+    for size in sizes:
+        # Posicions horitzontals i, transposant, verticals
+        for b, h, transposed in ((blocked, hit_grid, False), (blocked.T, hit_grid.T, True)):
+            rows, cols = b.shape
+            if size > cols:
+                continue
+            windows = cols - size + 1
+            valid = _window_sum(b, size) == 0
+            weight = np.where(valid, float(HIT_WEIGHT) ** _window_sum(h, size), 0.0)
+            spread = np.zeros((rows, cols), dtype=np.float64)
+            for k in range(size):
+                spread[:, k:k + windows] += weight
+            density += spread.T if transposed else spread
+
+    density[blocked == 1] = 0
+    density[hit_grid == 1] = 0
+    best = density.max()
+    if best <= 0:
+        return []
+    return [(int(r), int(c)) for r, c in zip(*np.nonzero(density == best))]
+
+
+def _window_sum(grid, size):
+    """Suma de cada finestra horitzontal de ``size`` cel·les (forma: files x (cols - size + 1))."""
+    cumulative = np.cumsum(np.pad(grid, ((0, 0), (1, 0))), axis=1)
+    return cumulative[:, size:] - cumulative[:, :-size]
+
+
+def density_map_python(width, height, sizes, misses, hits, sunk):
+    """Retorna les cel·les lliures amb densitat màxima (implementació en Python pur)."""
+    blocked = misses | sunk
+    density = {}
+    for size in sizes:
+        for vertical in (False, True):
+            for r in range(height - size + 1 if vertical else height):
+                for c in range(width if vertical else width - size + 1):
+                    cells = [(r + i, c) if vertical else (r, c + i) for i in range(size)]
+                    if any(cell in blocked for cell in cells):
+                        continue
+                    weight = HIT_WEIGHT ** sum(cell in hits for cell in cells)
+                    for cell in cells:
+                        density[cell] = density.get(cell, 0) + weight
+
+    free = {cell: value for cell, value in density.items() if cell not in hits}
+    if not free:
+        return []
+    best = max(free.values())
+    return sorted(cell for cell, value in free.items() if value == best)
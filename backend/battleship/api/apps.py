@@ -7,3 +7,5 @@ class ApiConfig(AppConfig):
 
     def ready(self):
         import battleship.api.signals
+        from battleship.api.matchmaking import check_deployment
+        check_deployment()
@@ -0,0 +1,73 @@
+"""
+Accions asíncrones per als ViewSets de DRF.
+
+DRF 3.x només despatxa vistes síncrones. ``AsyncViewSetMixin`` permet escriure accions amb
+``async def``: per a les rutes on alguna acció ho és, ``as_view`` retorna una vista Django
+asíncrona que les executa al bucle d'esdeveniments, de manera que sota uvicorn una petició
+que espera (p. ex. el torn, veure ``GameViewSet.wait_turn``) no ocupa cap fil del pool.
+L'autenticació, els permisos i la negociació, que a DRF són síncrons, s'executen amb
+``sync_to_async``; els altres mètodes de la mateixa ruta es deleguen a la vista síncrona.
+"""
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.decorators import classonlymethod
+from django.views.decorators.csrf import csrf_exempt
+
+
+class AsyncViewSetMixin:
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        sync_view = super().as_view(actions, **initkwargs)
+        actions = dict(actions)
+        if 'get' in actions and 'head' not in actions:
+            actions['head'] = actions['get']
+        async_methods = {method for method, action in actions.items()
+                         if iscoroutinefunction(getattr(cls, action, None))}
+        if not async_methods:
+            return sync_view
+        run_sync = sync_to_async(sync_view)
+
+        async def view(request, *args, **kwargs):
+            if request.method.lower() not in async_methods:
+                return await run_sync(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.action_map = actions
+            for method, action in actions.items():
+                setattr(self, method, getattr(self, action))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        view.__name__ = sync_view.__name__
+        view.__doc__ = sync_view.__doc__
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.actions = actions
+        return csrf_exempt(view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """Equivalent asíncron d'``APIView.dispatch``."""
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_object(self):
+        """Equivalent asíncron de ``GenericAPIView.get_object``."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
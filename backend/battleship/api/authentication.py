@@ -0,0 +1,115 @@
+"""
+Autenticació per token sense consultes a la base de dades.
+
+Els tokens que emet ``/api/token/`` porten a les claims el nom d'usuari i els permisos
+(veure ``serializers.ClaimsTokenObtainPairSerializer``), i ``ClaimsJWTAuthentication``
+construeix l'usuari directament a partir d'aquestes claims: validar un token només costa
+verificar-ne la signatura. Un usuari desactivat o amb permisos canviats conserva els del
+token d'accés fins que aquest caduca (``SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']``). En renovar-lo
+a ``/api/token/refresh/`` (``serializers.ClaimsTokenRefreshSerializer``) les claims es tornen a
+llegir de la base de dades, i un usuari desactivat ja no el pot renovar.
+
+Els tokens sense aquestes claims (emesos abans) carreguen l'usuari de la base de dades i el
+guarden ``BATTLESHIP_AUTH_CACHE_TTL`` segons en una cache del procés, com el jugador de
+cada usuari (``get_player``). Amb ``BATTLESHIP_AUTH_CACHE_TTL = 0`` no es guarda res.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import Player
+
+CLAIMS = ("username", "is_staff", "is_superuser")
+
+
+class ExpiringCache:
+    """Cache en memòria del procés amb caducitat ``BATTLESHIP_AUTH_CACHE_TTL`` i mida limitada."""
+
+    MISSING = object()
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return self.MISSING
+        return entry[1]
+
+    def set(self, key, value):
+        ttl = settings.BATTLESHIP_AUTH_CACHE_TTL
+        if ttl <= 0 or value is None:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                # Les entrades tenen totes la mateixa durada: la primera és la que caduca abans
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+users = ExpiringCache()
+players = ExpiringCache()
+
+
+def user_from_claims(token):
+    """Usuari (sense desar ni llegir de la base de dades) amb l'id i els permisos del token."""
+    # simplejwt desa l'id com a text
+    user_id = User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+    user = User(id=user_id, username=token["username"],
+                is_staff=token["is_staff"], is_superuser=token["is_superuser"], is_active=True)
+    user._state.adding = False
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if all(claim in validated_token for claim in CLAIMS):
+            return user_from_claims(validated_token)
+        try:
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken("El token no identifica cap usuari.")
+        user = users.get(user_id)
+        if user is ExpiringCache.MISSING:
+            user = super().get_user(validated_token)
+            users.set(user_id, user)
+        return user
+
+
+# Documenta l'autenticació a l'esquema OpenAPI com la de simplejwt
+class ClaimsJWTScheme(SimpleJWTScheme):
+    target_class = ClaimsJWTAuthentication
+
+
+def get_player(user):
+    """Jugador de ``user`` (o None), des de la cache si hi és."""
+    player = players.get(user.pk)
+    if player is ExpiringCache.MISSING:
+        player = Player.objects.filter(user_id=user.pk).first()
+        players.set(user.pk, player)
+    return player
+
+
+async def aget_player(user):
+    player = players.get(user.pk)
+    if player is ExpiringCache.MISSING:
+        player = await Player.objects.filter(user_id=user.pk).afirst()
+        players.set(user.pk, player)
+    return player
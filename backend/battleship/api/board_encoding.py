@@ -0,0 +1,98 @@
+"""
+Codificacions del tauler per a ``extended_status``.
+
+El tauler es construeix com un mapa dispers (fila, col) -> valor a partir dels vaixells
+i dispars, i després es codifica en el format demanat:
+
+- ``matrix``: llista de files amb un enter per cel·la (format per defecte).
+- ``rle``: cada fila és una llista plana ``[valor, repeticions, valor, repeticions, ...]``.
+- ``base64``: un byte per cel·la (enter amb signe de 8 bits) en ordre fila a fila, en base64.
+
+Valors de cel·la: 0 aigua, ``tipus`` vaixell, ``-tipus`` vaixell tocat i 11 aigua disparada.
+"""
+import base64
+
+MISS = 11
+
+FORMAT_MATRIX = "matrix"
+FORMAT_RLE = "rle"
+FORMAT_BASE64 = "base64"
+FORMATS = (FORMAT_MATRIX, FORMAT_RLE, FORMAT_BASE64)
+
+
+def sparse_cells(width, height, vessels, shots, sizes):
+    """
+    Retorna {(fila, col): valor} només amb les cel·les que no són aigua intacta.
+    ``sizes`` és el mapa id de vaixell -> mida del catàleg.
+    """
+    cells = {}
+    for bv in vessels:
+        ship_type = bv.vessel_id
+        is_vertical = bv.ri != bv.rf
+        for i in range(sizes[ship_type]):
+            r = bv.ri + i if is_vertical else bv.ri
+            c = bv.ci if is_vertical else bv.ci + i
+            if 0 <= r < height and 0 <= c < width:
+                cells[(r, c)] = ship_type
+
+    for shot in shots:
+        r, c = shot.row, shot.col
+        if 0 <= r < height and 0 <= c < width:
+            if shot.result == 1:
+                # Impacte: valor negatiu del tipus de vaixell
+                cells[(r, c)] = -cells.get((r, c), 0)
+            else:
+                cells[(r, c)] = MISS
+    return cells
+
+
+def encode_matrix(width, height, cells):
+    matrix = [[0] * width for _ in range(height)]
+    for (r, c), value in cells.items():
+        matrix[r][c] = value
+    return matrix
+
+
+def encode_rle(width, height, cells):
+    by_row = {}
+    for (r, c), value in cells.items():
+        by_row.setdefault(r, []).append((c, value))
+
+    rows = []
+    for r in range(height):
+        runs = []
+        col = 0
+        for c, value in sorted(by_row.get(r, ())):
+            if c > col:
+                _append_run(runs, 0, c - col)
+            _append_run(runs, value, 1)
+            col = c + 1
+        if col < width:
+            _append_run(runs, 0, width - col)
+        rows.append(runs)
+    return rows
+
+
+def _append_run(runs, value, count):
+    if runs and runs[-2] == value:
+        runs[-1] += count
+    else:
+        runs.extend((value, count))
+
+
+def encode_base64(width, height, cells):
+    data = bytearray(width * height)
+    for (r, c), value in cells.items():
+        data[r * width + c] = value & 0xFF
+    return base64.b64encode(bytes(data)).decode("ascii")
+
+
+ENCODERS = {
+    FORMAT_MATRIX: encode_matrix,
+    FORMAT_RLE: encode_rle,
+    FORMAT_BASE64: encode_base64,
+}
+
+
+def encode_board(board_format, width, height, cells):
+    return ENCODERS[board_format](width, height, cells)
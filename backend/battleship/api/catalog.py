@@ -0,0 +1,50 @@
+"""
+Catàleg de vaixells en memòria.
+
+El catàleg gairebé no canvia però es consulta a cada tauler, col·locació i llistat, així
+que es manté una còpia per procés. La versió de la còpia és el nombre de vaixells i el
+``updated_at`` més recent, llegits de la BD: qualsevol alta, baixa o modificació la canvia.
+El procés que fa el canvi descarta la seva còpia de seguida (senyals de Vessel); la resta de
+processos tornen a comparar la versió com a molt cada ``BATTLESHIP_CATALOG_CHECK_INTERVAL``
+segons i recarreguen el catàleg si ha canviat.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import Vessel
+
+_lock = threading.Lock()
+_local = {"version": None, "vessels": None, "checked": 0.0}
+
+
+def stored_version():
+    """Versió del catàleg a la BD, amb una sola consulta."""
+    stats = Vessel.objects.aggregate(count=Count("id"), updated=Max("updated_at"))
+    return stats["count"], stats["updated"]
+
+
+def get_vessels():
+    """Retorna {id: Vessel} ordenat per id. Les instàncies són compartides: no s'han de modificar."""
+    now = time.monotonic()
+    vessels = _local["vessels"]
+    if vessels is not None and now - _local["checked"] < settings.BATTLESHIP_CATALOG_CHECK_INTERVAL:
+        return vessels
+    with _lock:
+        vessels = _local["vessels"]
+        if vessels is None or stored_version() != _local["version"]:
+            vessels = {v.id: v for v in Vessel.objects.order_by("id")}
+            version = (len(vessels), max((v.updated_at for v in vessels.values()), default=None))
+            _local["version"], _local["vessels"] = version, vessels
+        _local["checked"] = now
+    return vessels
+
+
+def get_vessel(vessel_id):
+    return get_vessels().get(vessel_id)
+
+
+def invalidate():
+    _local["vessels"] = None
@@ -0,0 +1,151 @@
+"""
+Compressió de les respostes de l'API (``settings.BATTLESHIP_COMPRESSION_PATHS``).
+
+``CompressionMiddleware`` negocia ``Accept-Encoding``: brotli si el client l'accepta i el
+paquet ``brotli`` està instal·lat, si no gzip. Els taulers són molt repetitius i es
+comprimeixen molt bé. Les respostes en flux (esdeveniments, historial, exportacions) es
+comprimeixen bloc a bloc i cada bloc s'envia tan bon punt es genera; si el contingut és
+asíncron (ASGI, veure ``streaming``) l'embolcall també ho és, perquè Django no el carregui
+sencer a memòria.
+
+No es comprimeixen les respostes petites (``BATTLESHIP_COMPRESSION_MIN_SIZE``), les que ja
+porten ``Content-Encoding`` ni les de tipus que no són text (p. ex. ``application/gzip``).
+Com ``GZipMiddleware`` de Django, l'ETag d'una resposta comprimida passa a ser feble.
+"""
+import re
+import zlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'application/javascript')
+
+re_accepts = _lazy_re_compile(r'(?:^|,)\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def accepted_encodings(header):
+    """Codificacions de ``Accept-Encoding`` amb q > 0."""
+    accepted = set()
+    for match in re_accepts.finditer(header.lower()):
+        encoding, q = match.groups()
+        try:
+            if q is None or float(q) > 0:
+                accepted.add(encoding)
+        except ValueError:
+            pass
+    return accepted
+
+
+def negotiate(header):
+    accepted = accepted_encodings(header)
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def is_compressible(content_type):
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return (media_type.startswith('text/') or media_type in COMPRESSIBLE_TYPES
+            or media_type.endswith('+json'))
+
+
+class GzipCompressor:
+    def __init__(self):
+        self._compressor = zlib.compressobj(settings.BATTLESHIP_GZIP_LEVEL, wbits=16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        # Buida el que hi ha pendent perquè el client pugui descomprimir el bloc sencer
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=settings.BATTLESHIP_BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+COMPRESSORS = {'br': BrotliCompressor, 'gzip': GzipCompressor}
+
+
+def compress(encoding, data):
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(encoding, chunks):
+    compressor = COMPRESSORS[encoding]()
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(encoding, chunks):
+    compressor = COMPRESSORS[encoding]()
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+@lru_cache(maxsize=None)
+def compile_paths(pattern):
+    return re.compile(pattern)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if not compile_paths(settings.BATTLESHIP_COMPRESSION_PATHS).match(request.path):
+            return response
+        if response.has_header('Content-Encoding') or not is_compressible(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < settings.BATTLESHIP_COMPRESSION_MIN_SIZE:
+            return response
+
+        # La resposta depèn d'Accept-Encoding encara que aquest client no comprimeixi
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(encoding, response.streaming_content)
+            else:
+                response.streaming_content = compress_stream(encoding, response.streaming_content)
+            del response['Content-Length']
+        else:
+            response.content = compress(encoding, response.content)
+            response['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,157 @@
+"""
+Esdeveniments de partida (creació, jugadors, col·locacions, dispars, enfonsaments, canvis de
+fase i de torn).
+
+Les vistes registren cada esdeveniment amb ``publish_event`` dins de la mateixa transacció
+que el canvi que descriu: queda a l'historial de la partida (``GameEvent``, que es pot
+reproduir amb ``/games/{id}/history/``) i, quan la transacció es confirma, el broker
+configurat a ``settings.BATTLESHIP_EVENT_BROKER`` els reparteix als subscriptors de la
+partida. El broker per defecte (``InProcessBroker``) viu dins del procés: per desplegar
+amb diversos workers cal configurar-ne un que comparteixi els esdeveniments entre processos
+(``matchmaking.check_deployment`` no deixa arrencar l'aplicació altrament). El flux
+Server-Sent Events (``stream_events``) és asíncron i només es pot servir amb ASGI.
+
+Un broker només ha d'implementar ``subscribe(game_id)``, ``unsubscribe(subscription)`` i
+``publish(game_id, event)``.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import GameEvent
+
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+# Dades que només pot veure el jugador de l'esdeveniment mentre la partida no ha acabat
+PRIVATE_FIELDS = {
+    GameEvent.TYPE_PLACEMENT: ("ri", "ci", "rf", "cf"),
+}
+
+
+class Subscription:
+    """Cua d'esdeveniments d'un client connectat, lligada al bucle d'esdeveniments que la consumeix."""
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+
+    def put(self, event):
+        # Es pot cridar des de qualsevol fil (les vistes síncrones s'executen fora del bucle)
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        # Un client massa lent perd els esdeveniments més antics; pot resincronitzar amb ?since=
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Retorna el següent esdeveniment, o None si passa el temps d'espera."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, game_id):
+        subscription = Subscription(game_id)
+        with self._lock:
+            self._subscribers[game_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.game_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.game_id]
+
+    def publish(self, game_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(game_id, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.BATTLESHIP_EVENT_BROKER)()
+
+
+def public_data(event_type, data):
+    private = PRIVATE_FIELDS.get(event_type, ())
+    return {k: v for k, v in data.items() if k not in private}
+
+
+def as_message(record, redact=True):
+    """Esdeveniment en el format que reben els clients: {"type", "game", "seq", ...dades}."""
+    data = public_data(record.type, record.data) if redact else record.data
+    return {"type": record.type, "game": record.game_id, "seq": record.id, **data}
+
+
+def publish_events(game_id, events):
+    """
+    Afegeix ``events`` ([(tipus, dades), ...]) a l'historial de la partida dins de la transacció
+    en curs, amb un sol INSERT, i els publica als subscriptors quan es confirmi.
+    """
+    records = GameEvent.objects.bulk_create(
+        [GameEvent(game_id=game_id, type=event_type, data=data) for event_type, data in events])
+    messages = [as_message(record) for record in records]
+
+    def publish():
+        broker = get_broker()
+        for message in messages:
+            broker.publish(game_id, message)
+
+    transaction.on_commit(publish)
+    return records
+
+
+def publish_event(game_id, event_type, **data):
+    return publish_events(game_id, [(event_type, data)])[0]
+
+
+def history(game_id, viewer=None, finished=False, chunk_size=500):
+    """
+    Genera l'historial de la partida en ordre, una línia JSON per esdeveniment, llegint la
+    taula per blocs. Fins que la partida no ha acabat, les dades privades només es mostren
+    al seu jugador (``viewer``).
+    """
+    records = GameEvent.objects.filter(game_id=game_id).order_by("id").iterator(chunk_size=chunk_size)
+    for record in records:
+        redact = not finished and record.data.get("player") != viewer
+        message = as_message(record, redact=redact)
+        message["created"] = record.created.isoformat()
+        yield json.dumps(message) + "\n"
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream_events(game_id, keepalive=None):
+    """Generador asíncron del flux Server-Sent Events d'una partida."""
+    keepalive = keepalive or settings.BATTLESHIP_EVENT_KEEPALIVE
+    broker = get_broker()
+    subscription = broker.subscribe(game_id)
+    try:
+        yield ": connected\n\n"
+        while True:
+            event = await subscription.get(timeout=keepalive)
+            # Comentari periòdic perquè els proxies no tallin la connexió inactiva
+            yield format_sse(event) if event is not None else ": keepalive\n\n"
+    finally:
+        broker.unsubscribe(subscription)
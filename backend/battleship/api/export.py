@@ -0,0 +1,106 @@
+"""
+Exportació massiva de les partides acabades per a anàlisi (comanda ``export_games`` i
+``/api/v1/export/{conjunt}/``).
+
+Cada conjunt es llegeix amb ``QuerySet.iterator()`` per blocs (cursor de servidor a
+PostgreSQL) i es formata i es comprimeix a mesura que es genera: la memòria no depèn del
+nombre de partides exportades.
+"""
+import csv
+import json
+import zlib
+
+from .models import BoardVessel, Game, Shot
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def finished_games():
+    return Game.objects.filter(phase=Game.PHASE_GAMEOVER)
+
+
+# Conjunt -> (consulta, [(columna, camp)]); tots es recorren per clau primària
+DATASETS = {
+    "games": (
+        finished_games,
+        [("id", "id"), ("width", "width"), ("height", "height"), ("multiplayer", "multiplayer"),
+         ("owner", "owner"), ("winner", "winner")],
+    ),
+    "placements": (
+        lambda: BoardVessel.objects.filter(board__game__phase=Game.PHASE_GAMEOVER),
+        [("id", "id"), ("game", "board__game"), ("player", "board__player"), ("vessel", "vessel"),
+         ("ri", "ri"), ("ci", "ci"), ("rf", "rf"), ("cf", "cf"), ("alive", "alive")],
+    ),
+    "shots": (
+        lambda: Shot.objects.filter(game__phase=Game.PHASE_GAMEOVER),
+        [("id", "id"), ("game", "game"), ("player", "player"), ("board", "board"), ("row", "row"),
+         ("col", "col"), ("result", "result"), ("impact", "impact")],
+    ),
+}
+
+
+def rows(dataset, chunk_size=CHUNK_SIZE):
+    """Retorna (columnes, iterador de tuples) del conjunt ``dataset``."""
+    queryset, fields = DATASETS[dataset]
+    columns = [column for column, _ in fields]
+    values = queryset().order_by("pk").values_list(*(field for _, field in fields))
+    return columns, values.iterator(chunk_size=chunk_size)
+
+
+class Echo:
+    """Destinació de ``csv.writer`` que retorna la línia en lloc d'escriure-la."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, values):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in values:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(columns, values):
+    for row in values:
+        yield json.dumps(dict(zip(columns, row))) + "\n"
+
+
+def buffered(lines, size=BUFFER_SIZE):
+    """Agrupa les línies en blocs de bytes d'uns ``size`` bytes."""
+    parts, length = [], 0
+    for line in lines:
+        parts.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(parts).encode()
+            parts, length = [], 0
+    if parts:
+        yield "".join(parts).encode()
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # Capçalera gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export(dataset, fmt="csv", compress=False, chunk_size=CHUNK_SIZE):
+    """Genera el conjunt ``dataset`` en format ``fmt`` (csv o ndjson) com a blocs de bytes."""
+    columns, values = rows(dataset, chunk_size)
+    lines = csv_lines(columns, values) if fmt == "csv" else ndjson_lines(columns, values)
+    chunks = buffered(lines)
+    return gzipped(chunks) if compress else chunks
+
+
+def filename(dataset, fmt, compress=False):
+    return f"{dataset}.{fmt}" + (".gz" if compress else "")
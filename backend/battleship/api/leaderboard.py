@@ -0,0 +1,61 @@
+"""
+Manteniment de la taula de classificació (PlayerStats).
+
+``record_game_over`` l'actualitza de manera incremental quan acaba una partida i
+``rebuild`` la recalcula sencera a partir de l'historial de partides acabades. El jugador
+CPU (``Player.CPU_USERNAME``) no hi té estadístiques.
+"""
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast
+
+from .models import Game, Player, PlayerStats, Shot
+
+
+def record_game_over(game):
+    """Suma la partida acabada a les estadístiques de cada jugador."""
+    totals = {
+        row['player']: row
+        for row in Shot.objects.filter(game=game).values('player').annotate(
+            shots=Count('id'), hits=Count('id', filter=Q(result=1)))
+    }
+    for player_id in game.players.exclude(user__username=Player.CPU_USERNAME).values_list('id', flat=True):
+        won = 1 if player_id == game.winner_id else 0
+        fired = totals.get(player_id, {'shots': 0, 'hits': 0})
+        PlayerStats.objects.get_or_create(player_id=player_id)
+        PlayerStats.objects.filter(player_id=player_id).update(
+            games_played=F('games_played') + 1,
+            games_won=F('games_won') + won,
+            shots=F('shots') + fired['shots'],
+            hits=F('hits') + fired['hits'],
+            win_rate=Cast(F('games_won') + won, FloatField()) / (F('games_played') + 1),
+        )
+
+
+@transaction.atomic
+def rebuild():
+    """Recalcula totes les estadístiques des de l'historial. Retorna el nombre de jugadors."""
+    finished = Q(phase=Game.PHASE_GAMEOVER)
+    stats = {}
+
+    def entry(player_id):
+        return stats.setdefault(player_id, PlayerStats(player_id=player_id))
+
+    memberships = Game.players.through.objects.filter(game__phase=Game.PHASE_GAMEOVER)
+    for row in memberships.values('player_id').annotate(n=Count('game_id')):
+        entry(row['player_id']).games_played = row['n']
+    for row in Game.objects.filter(finished, winner__isnull=False).values('winner_id').annotate(n=Count('id')):
+        entry(row['winner_id']).games_won = row['n']
+    shots = Shot.objects.filter(game__phase=Game.PHASE_GAMEOVER, player__isnull=False)
+    for row in shots.values('player_id').annotate(n=Count('id'), hits=Count('id', filter=Q(result=1))):
+        entry(row['player_id']).shots = row['n']
+        entry(row['player_id']).hits = row['hits']
+
+    for player_id in Player.objects.filter(user__username=Player.CPU_USERNAME).values_list('id', flat=True):
+        stats.pop(player_id, None)
+    for s in stats.values():
+        s.win_rate = s.games_won / s.games_played if s.games_played else 0
+
+    PlayerStats.objects.all().delete()
+    PlayerStats.objects.bulk_create(stats.values(), batch_size=1000)
+    return len(stats)
@@ -0,0 +1,114 @@
+"""
+Estat en memòria de les partides en joc (fase ``playing``).
+
+Per a cada tauler es guarda un ``rules.BoardState`` (vaixells, cel·les disparades i cel·les
+que encara queden a cada vaixell), de manera que resoldre un dispar o pintar la partida no
+necessita llegir ``BoardVessel`` ni ``Shot``. L'estat viu a la cache ``BATTLESHIP_LIVE_GAME_CACHE``
+(LocMemCache amb ``MAX_ENTRIES`` com a límit i expulsió LRU, o FileBasedCache per compartir-lo
+entre processos).
+
+Els dispars es desen primer a la base de dades i la cache s'actualitza quan es confirma la
+transacció. Cada lectura es valida amb una sola consulta (taulers de la partida i últim
+dispar de cadascun): si la cache no hi és, és d'un altre procés o ha quedat enrere,
+l'estat es reconstrueix des de la base de dades.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+
+from . import metrics
+from .models import Board, BoardVessel, Game, Shot
+from .rules import BoardState, ShotState, VesselState
+
+
+class LiveGame:
+    def __init__(self, game_id, boards):
+        self.game_id = game_id
+        self.boards = {b.player_id: b for b in boards}
+
+    def version(self):
+        return {b.id: b.last_shot for b in self.boards.values()}
+
+    def board_of(self, player_id):
+        return self.boards.get(player_id)
+
+    def opponent_of(self, player_id):
+        return next((b for b in self.boards.values() if b.player_id != player_id), None)
+
+    @property
+    def last_shot(self):
+        return max((b.last_shot for b in self.boards.values() if b.last_shot is not None), default=0)
+
+    @classmethod
+    def load(cls, game_id, rows):
+        """Reconstrueix l'estat des de la base de dades a partir de les files de ``board_versions``."""
+        vessels, shots = {}, {}
+        board_ids = [row["id"] for row in rows]
+        for bv in BoardVessel.objects.filter(board_id__in=board_ids):
+            vessels.setdefault(bv.board_id, []).append(
+                VesselState(bv.id, bv.vessel_id, bv.ri, bv.ci, bv.rf, bv.cf, bv.alive))
+        for shot in Shot.objects.filter(board_id__in=board_ids):
+            shots.setdefault(shot.board_id, []).append(
+                ShotState(shot.id, shot.row, shot.col, shot.result, shot.impact_id))
+        return cls(game_id, [
+            BoardState(row["id"], row["player_id"], row["prepared"], vessels.get(row["id"], ()),
+                      shots.get(row["id"], ()))
+            for row in rows
+        ])
+
+
+def get_cache():
+    return caches[settings.BATTLESHIP_LIVE_GAME_CACHE]
+
+
+def cache_key(game_id):
+    # v2: cel·les com a tuples (fila, columna); les entrades antigues d'una FileBasedCache s'ignoren
+    return f"battleship:live-game:v2:{game_id}"
+
+
+def board_versions(game_id):
+    return Board.objects.filter(game_id=game_id).values("id", "player_id", "prepared").annotate(
+        last_shot=Max("shots__id")).order_by("id")
+
+
+def is_current(live, rows):
+    if live is None or live.version() != {row["id"]: row["last_shot"] for row in rows}:
+        metrics.LIVE_GAME_CACHE.inc(result="miss")
+        return False
+    metrics.LIVE_GAME_CACHE.inc(result="hit")
+    return True
+
+
+def rebuild(game, rows):
+    live = LiveGame.load(game.id, rows)
+    if game.phase == Game.PHASE_PLAYING:
+        save(live)
+    return live
+
+
+def get_live_game(game):
+    """
+    Retorna l'estat de la partida, de la cache si encara és vigent o reconstruït des de la base
+    de dades. Només es desa a la cache si la partida està en joc.
+    """
+    rows = list(board_versions(game.id))
+    live = get_cache().get(cache_key(game.id))
+    return live if is_current(live, rows) else rebuild(game, rows)
+
+
+async def aget_live_game(game):
+    """Equivalent asíncron de ``get_live_game``."""
+    rows = [row async for row in board_versions(game.id)]
+    live = await get_cache().aget(cache_key(game.id))
+    return live if is_current(live, rows) else await sync_to_async(rebuild)(game, rows)
+
+
+def save(live):
+    """Desa l'estat quan es confirmi la transacció en curs."""
+    transaction.on_commit(lambda: get_cache().set(cache_key(live.game_id), live))
+
+
+def invalidate(game_id):
+    transaction.on_commit(lambda: get_cache().delete(cache_key(game_id)))
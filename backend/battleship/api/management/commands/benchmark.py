@@ -0,0 +1,257 @@
+"""
+Prova de càrrega de l'API: juga N partides individuals en paral·lel i mesura cada petició.
+
+Cada partida registra un usuari, obté un token, crea la partida, col·loca les flotes
+automàticament i dispara cel·la a cel·la fins que acaba. Per defecte les peticions passen
+pel client de proves de Django dins del procés (contra la base de dades configurada); amb
+``--url`` es fan per HTTP contra un servidor en marxa.
+
+El resultat (latències p50/p95/p99 en ms i peticions per segon per endpoint) s'escriu en
+JSON a ``--output`` per poder comparar execucions entre commits.
+
+Dins del procés, en acabar s'esborren els usuaris, les partides i els dispars de la prova i
+es recalcula la classificació, llevat que es passi ``--keep``. Amb ``--url`` les dades queden
+al servidor.
+"""
+import json
+import math
+import subprocess
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+
+from battleship.api import leaderboard
+from battleship.api.models import Game
+
+PASSWORD = "benchmark-pass"
+
+
+def percentile(values, pct):
+    """Percentil pel mètode del rang més proper sobre ``values`` ordenats."""
+    if not values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def parse_json(content):
+    try:
+        return json.loads(content)
+    except ValueError:
+        return None
+
+
+class GameAborted(Exception):
+    """Una petició imprescindible per continuar la partida ha fallat."""
+
+
+class InProcessTransport:
+    def __init__(self):
+        # Amb ALLOWED_HOSTS buit i DEBUG, Django només accepta localhost
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+        # Els errors del servidor es comptabilitzen com a respostes 500 en lloc d'aturar la prova
+        self.client = Client(HTTP_HOST=host, raise_request_exception=False)
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"authorization": f"Bearer {token}"} if token else {}
+        response = self.client.generic(
+            method, path, json.dumps(data) if data is not None else "",
+            content_type="application/json", headers=headers)
+        return response.status_code, parse_json(response.content)
+
+
+class HTTPTransport:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        body = json.dumps(data).encode() if data is not None else None
+        request = Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with urlopen(request) as response:
+                status, content = response.status, response.read()
+        except HTTPError as e:
+            status, content = e.code, e.read()
+        return status, parse_json(content)
+
+
+class Recorder:
+    """Acumula les latències per endpoint des de diversos fils."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds, status):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            if status >= 500:
+                self.errors[endpoint] += 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors[endpoint],
+                "requests_per_second": round(len(values) / elapsed, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "p50_ms": round(percentile(values, 50) * 1000, 3),
+                "p95_ms": round(percentile(values, 95) * 1000, 3),
+                "p99_ms": round(percentile(values, 99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3),
+            }
+        return endpoints
+
+
+class SimulatedGame:
+    def __init__(self, transport, recorder, width, height, prefix="bench-"):
+        self.transport = transport
+        self.recorder = recorder
+        self.width = width
+        self.height = height
+        self.prefix = prefix
+        self.token = None
+
+    def call(self, endpoint, method, path, data=None, expected=None):
+        start = time.perf_counter()
+        status, body = self.transport.request(method, path, data, self.token)
+        self.recorder.record(endpoint, time.perf_counter() - start, status)
+        if expected is not None and status != expected:
+            raise GameAborted(f"{method} {path}: {status}")
+        return status, body
+
+    def play(self):
+        """Juga una partida sencera contra la CPU i retorna el nombre de dispars fets."""
+        username = f"{self.prefix}{uuid.uuid4().hex[:12]}"
+        self.call("POST /api/v1/user/", "POST", "/api/v1/user/",
+                  {"username": username, "email": "", "password": PASSWORD}, expected=201)
+        _, body = self.call("POST /api/token/", "POST", "/api/token/",
+                            {"username": username, "password": PASSWORD}, expected=200)
+        self.token = body["access"]
+
+        _, game = self.call("POST /api/v1/games/", "POST", "/api/v1/games/",
+                            {"width": self.width, "height": self.height}, expected=201)
+        game_url = f"/api/v1/games/{game['id']}"
+        _, players = self.call("GET /api/v1/games/{id}/players/", "GET", f"{game_url}/players/", expected=200)
+        me = next(p["id"] for p in players if p["nickname"] == username)
+        for player in players:
+            self.call("POST /api/v1/games/{id}/players/{id}/vessels/auto/", "POST",
+                      f"{game_url}/players/{player['id']}/vessels/auto/", expected=201)
+
+        shots = 0
+        for row in range(self.height):
+            for col in range(self.width):
+                status, _ = self.call("POST /api/v1/games/{id}/players/{id}/shots/", "POST",
+                                      f"{game_url}/players/{me}/shots/", {"row": row, "col": col})
+                shots += status == 201
+                if status != 201:
+                    _, state = self.call("GET /api/v1/games/{id}/", "GET", f"{game_url}/", expected=200)
+                    if state["phase"] == Game.PHASE_GAMEOVER:
+                        return shots
+                    if status >= 500:
+                        raise GameAborted(f"POST {game_url}/players/{me}/shots/: {status}")
+        return shots
+
+
+class Command(BaseCommand):
+    help = "Prova de càrrega: juga partides simulades en paral·lel i desa les latències per endpoint en JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--games", type=int, default=10, help="Nombre de partides a jugar.")
+        parser.add_argument("--workers", type=int, default=4, help="Partides simultànies (fils).")
+        parser.add_argument("--size", type=int, default=10, help="Amplada i alçada del tauler.")
+        parser.add_argument("--url", help="URL base d'un servidor en marxa (per defecte, dins del procés).")
+        parser.add_argument("--output", default="benchmark.json", help="Fitxer JSON de resultats.")
+        parser.add_argument("--keep", action="store_true",
+                            help="No esborrar els usuaris i les partides de la prova (dins del procés).")
+
+    def handle(self, *args, **options):
+        recorder = Recorder()
+        # Prefix dels usuaris d'aquesta execució, per poder-los esborrar en acabar
+        prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+
+        def run_game(_):
+            transport = HTTPTransport(options["url"]) if options["url"] else InProcessTransport()
+            try:
+                return SimulatedGame(transport, recorder, options["size"], options["size"], prefix).play()
+            except GameAborted as e:
+                self.stderr.write(f"Partida avortada: {e}")
+                return None
+
+        def run_game_in_thread(i):
+            try:
+                return run_game(i)
+            finally:
+                # Cada fil obre la seva pròpia connexió a la base de dades
+                connection.close()
+
+        start = time.perf_counter()
+        if options["workers"] > 1:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+                shots = list(pool.map(run_game_in_thread, range(options["games"])))
+        else:
+            shots = [run_game(i) for i in range(options["games"])]
+        elapsed = time.perf_counter() - start
+        if not options["url"] and not options["keep"]:
+            self.cleanup(prefix)
+
+        endpoints = recorder.summary(elapsed)
+        total = sum(e["requests"] for e in endpoints.values())
+        result = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": self.git_commit(),
+            "target": options["url"] or "in-process",
+            "database": connection.vendor,
+            "games": options["games"],
+            "workers": options["workers"],
+            "size": options["size"],
+            "failed_games": shots.count(None),
+            "player_shots": sum(s for s in shots if s is not None),
+            "elapsed_seconds": round(elapsed, 3),
+            "requests": total,
+            "requests_per_second": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(result, f, indent=2)
+
+        for endpoint, stats in endpoints.items():
+            self.stdout.write(
+                f"{endpoint:55} {stats['requests']:6} req  {stats['requests_per_second']:8} req/s  "
+                f"p50 {stats['p50_ms']:8} ms  p95 {stats['p95_ms']:8} ms  p99 {stats['p99_ms']:8} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['games']} partides, {total} peticions en {elapsed:.2f} s. Resultats a {options['output']}."))
+
+    @staticmethod
+    @transaction.atomic
+    def cleanup(prefix):
+        """Esborra les partides i els usuaris de la prova i recalcula la classificació sense elles."""
+        users = User.objects.filter(username__startswith=prefix)
+        Game.objects.filter(players__user__in=users).delete()
+        users.delete()
+        leaderboard.rebuild()
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,142 @@
+"""
+Mesura el cost de serialitzar i enviar una partida sencera (``GET /api/v1/games/{id}/``) per a
+diverses mides de tauler.
+
+Per a cada mida es crea, dins d'una transacció que es desfà al final, una partida amb les
+dues flotes col·locades i una fracció ``--coverage`` de cel·les disparades a cada tauler. Per
+a cada format de tauler es mesura el temps de CPU de renderitzar el JSON amb ``JSONRenderer``
+de DRF (abans) i amb orjson (si està instal·lat), i els bytes que s'envien sense comprimir,
+amb gzip i amb brotli (si està instal·lat), amb el temps de CPU de comprimir. El resultat
+s'escriu en JSON a ``--output`` per poder comparar execucions entre commits.
+"""
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from battleship.api import catalog, compression, renderers
+from battleship.api.board_encoding import FORMATS, sparse_cells
+from battleship.api.management.commands.benchmark import Command as LoadBenchmark
+from battleship.api.models import Board, BoardVessel, Game, Player, Shot
+from battleship.api.placement import random_fleet
+from battleship.api.serializers import GameSerializer
+from battleship.api.views import boards_prefetch
+
+SIZES = (10, 50, 100, 200)
+
+
+def cpu_ms(func, repeat):
+    """Temps de CPU mitjà de ``func()`` en ms i el seu resultat."""
+    start = time.process_time()
+    for _ in range(repeat):
+        result = func()
+    return (time.process_time() - start) / repeat * 1000, result
+
+
+def build_game(size, coverage, rng):
+    """Partida acabada de ``size`` x ``size`` amb les flotes col·locades i dispars als dos taulers."""
+    sizes = {vessel.id: vessel.size for vessel in catalog.get_vessels().values()}
+    players = []
+    for _ in range(2):
+        user = User.objects.create_user(username=f"serialization-{uuid.uuid4().hex[:12]}")
+        players.append(Player.objects.get(user=user))
+    game = Game.objects.create(owner=players[0], winner=players[0], width=size, height=size,
+                               phase=Game.PHASE_GAMEOVER)
+    game.players.add(*players)
+
+    for player, opponent in zip(players, reversed(players)):
+        board = Board.objects.create(game=game, player=player, prepared=True)
+        fleet = random_fleet(size, size, list(sizes.values()), rng=rng)
+        placed = BoardVessel.objects.bulk_create([
+            BoardVessel(board=board, vessel_id=vessel_id, ri=ri, ci=ci, rf=rf, cf=cf)
+            for vessel_id, (ri, ci, rf, cf) in zip(sizes, fleet)
+        ])
+        owners = {cell: bv for bv in placed for cell in sparse_cells(size, size, [bv], [], sizes)}
+        targets = rng.sample(range(size * size), int(size * size * coverage))
+        Shot.objects.bulk_create([
+            Shot(game=game, player=opponent, board=board, row=i // size, col=i % size,
+                 result=int((i // size, i % size) in owners), impact=owners.get((i // size, i % size)))
+            for i in targets
+        ])
+    return game
+
+
+def serialize(game_id, board_format):
+    request = Request(APIRequestFactory().get("/", {"board_format": board_format}))
+    game = (Game.objects.select_related("owner__user")
+            .prefetch_related("players", boards_prefetch()).get(pk=game_id))
+    return GameSerializer(game, context={"request": request}).data
+
+
+def json_renderers():
+    """Renderers a comparar: el de DRF (abans) i orjson (si està instal·lat)."""
+    available = {"json": JSONRenderer().render}
+    if renderers.orjson is not None:
+        available["orjson"] = renderers.orjson_dumps
+    return available
+
+
+def encodings():
+    return [encoding for encoding in compression.COMPRESSORS
+            if encoding != "br" or compression.brotli is not None]
+
+
+def measure(data, repeat):
+    result = {"render": {}, "compression": {}}
+    for name, render in json_renderers().items():
+        ms, content = cpu_ms(lambda: render(data), repeat)
+        result["render"][name] = {"cpu_ms": round(ms, 3), "bytes": len(content)}
+    for encoding in encodings():
+        ms, compressed = cpu_ms(lambda: compression.compress(encoding, content), repeat)
+        result["compression"][encoding] = {"cpu_ms": round(ms, 3), "bytes": len(compressed)}
+    return result
+
+
+class Command(BaseCommand):
+    help = "Mesura el temps de CPU i els bytes de serialitzar i comprimir partides de diverses mides."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES),
+                            help="Amplades (i alçades) de tauler a mesurar.")
+        parser.add_argument("--coverage", type=float, default=0.3,
+                            help="Fracció de cel·les disparades a cada tauler.")
+        parser.add_argument("--repeat", type=int, default=20, help="Repeticions de cada mesura.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="benchmark-serialization.json", help="Fitxer JSON de resultats.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        results = []
+        with transaction.atomic():
+            for size in options["sizes"]:
+                game = build_game(size, options["coverage"], rng)
+                for board_format in FORMATS:
+                    data = serialize(game.id, board_format)
+                    results.append({"size": size, "board_format": board_format,
+                                    **measure(data, options["repeat"])})
+            transaction.set_rollback(True)
+
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": LoadBenchmark.git_commit(),
+            "coverage": options["coverage"],
+            "repeat": options["repeat"],
+            "results": results,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+
+        for result in results:
+            columns = [f"{name} {r['cpu_ms']:8.3f} ms {r['bytes']:9} B"
+                       for name, r in {**result["render"], **result["compression"]}.items()]
+            self.stdout.write(f"{result['size']:>3}x{result['size']:<3} {result['board_format']:7} "
+                              + "  ".join(columns))
+        self.stdout.write(self.style.SUCCESS(f"Resultats a {options['output']}."))
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from battleship.api import export
+
+
+class Command(BaseCommand):
+    help = ("Exporta les partides acabades, les seves col·locacions o els seus dispars en CSV o NDJSON, "
+            "llegint la base de dades per blocs.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=list(export.DATASETS))
+        parser.add_argument("--format", choices=list(export.FORMATS), default="csv")
+        parser.add_argument("--gzip", action="store_true", help="Comprimeix la sortida amb gzip.")
+        parser.add_argument("--output", help="Fitxer de sortida (per defecte, <conjunt>.<format>[.gz]); '-' per a stdout.")
+        parser.add_argument("--chunk-size", type=int, default=export.CHUNK_SIZE, help="Files per bloc de lectura.")
+
+    def handle(self, *args, **options):
+        dataset, fmt, compress = options["dataset"], options["format"], options["gzip"]
+        output = options["output"] or export.filename(dataset, fmt, compress)
+        chunks = export.export(dataset, fmt, compress, options["chunk_size"])
+
+        if output == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        size = 0
+        with open(output, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f"{dataset} exportat a {output} ({size} bytes)."))
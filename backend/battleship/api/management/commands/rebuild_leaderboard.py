@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from battleship.api import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Recalcula la classificació (PlayerStats) a partir de l'historial de partides acabades."
+
+    def handle(self, *args, **options):
+        count = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Classificació recalculada: {count} jugadors."))
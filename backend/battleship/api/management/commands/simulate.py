@@ -0,0 +1,101 @@
+import csv
+import multiprocessing
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from battleship.api import catalog
+from battleship.api.simulation import STRATEGIES, merge_stats, simulate_chunk
+
+
+def shots_percentile(shots, pct):
+    """Percentil (rang més proper) d'un Counter {dispars: victòries}."""
+    total = sum(shots.values())
+    if not total:
+        return None
+    rank = max(-(-pct * total // 100), 1)
+    seen = 0
+    for value in sorted(shots):
+        seen += shots[value]
+        if seen >= rank:
+            return value
+
+
+class Command(BaseCommand):
+    help = ("Simula partides CPU contra CPU sense base de dades, repartides entre processos, i desa "
+            "les taxes de victòria per estratègia i la distribució de dispars per guanyar en CSV.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--games", type=int, default=1000, help="Nombre de partides.")
+        parser.add_argument("--width", type=int, default=10)
+        parser.add_argument("--height", type=int, default=10)
+        parser.add_argument("--sizes", type=int, nargs="+",
+                            help="Mides dels vaixells de la flota (per defecte, el catàleg).")
+        parser.add_argument("--strategies", nargs=2, default=["density", "random"], metavar="STRATEGY",
+                            help=f"Estratègia de cada jugador: {', '.join(STRATEGIES)}.")
+        parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Processos del pool.")
+        parser.add_argument("--chunk-size", type=int, default=100, help="Partides per tasca.")
+        parser.add_argument("--seed", default="0", help="Llavor per reproduir la simulació.")
+        parser.add_argument("--output", default="simulation.csv", help="CSV amb el resum per estratègia.")
+        parser.add_argument("--distribution", help="CSV amb la distribució de dispars per guanyar.")
+
+    def handle(self, *args, **options):
+        unknown = [s for s in options["strategies"] if s not in STRATEGIES]
+        if unknown:
+            raise CommandError(f"Estratègia desconeguda: {', '.join(unknown)}.")
+        sizes = options["sizes"] or [v.size for v in catalog.get_vessels().values()]
+        games, chunk = options["games"], options["chunk_size"]
+        tasks = [
+            (options["width"], options["height"], sizes, tuple(options["strategies"]), options["seed"],
+             start, min(chunk, games - start))
+            for start in range(0, games, chunk)
+        ]
+
+        start = time.perf_counter()
+        stats = {}
+        if options["processes"] > 1:
+            with multiprocessing.Pool(options["processes"]) as pool:
+                # Cada bloc s'agrega tan aviat com acaba, en qualsevol ordre
+                for result in pool.imap_unordered(simulate_chunk, tasks):
+                    merge_stats(stats, result)
+        else:
+            for task in tasks:
+                merge_stats(stats, simulate_chunk(task))
+        elapsed = time.perf_counter() - start
+
+        self.write_summary(options["output"], stats)
+        if options["distribution"]:
+            self.write_distribution(options["distribution"], stats)
+
+        for strategy, values in stats.items():
+            self.stdout.write(f"{strategy:10} {values['wins']:8} / {values['games']:8} victòries "
+                              f"({values['wins'] / values['games']:.1%})")
+        self.stdout.write(self.style.SUCCESS(
+            f"{games} partides en {elapsed:.2f} s ({games / elapsed:.0f} partides/s). "
+            f"Resum a {options['output']}."))
+
+    @staticmethod
+    def write_summary(path, stats):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["strategy", "games", "wins", "win_rate", "mean_shots_to_win",
+                             "p50_shots_to_win", "p90_shots_to_win", "p99_shots_to_win"])
+            for strategy, values in stats.items():
+                shots = values["shots"]
+                wins = values["wins"]
+                mean = sum(k * v for k, v in shots.items()) / wins if wins else None
+                writer.writerow([
+                    strategy, values["games"], wins, round(wins / values["games"], 4),
+                    round(mean, 2) if mean is not None else "",
+                    shots_percentile(shots, 50), shots_percentile(shots, 90), shots_percentile(shots, 99),
+                ])
+
+    @staticmethod
+    def write_distribution(path, stats):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["strategy", "shots_to_win", "wins"])
+            for strategy, values in stats.items():
+                for shots, wins in sorted(values["shots"].items()):
+                    writer.writerow([strategy, shots, wins])
@@ -0,0 +1,185 @@
+"""
+Emparellament de partides multijugador (``/api/v1/matchmaking/``).
+
+Els jugadors que busquen rival esperen en una cua per mida de tauler. Emparellar és O(1):
+el primer jugador que espera a la mateixa cua és el rival, i la partida i els dos taulers es
+creen en una sola transacció. El jugador que esperava rep un esdeveniment ``matched`` al seu
+canal del broker d'esdeveniments (veure ``events``), que la vista de long polling espera.
+
+La cua configurada a ``settings.BATTLESHIP_MATCHMAKING_QUEUE`` per defecte (``InProcessQueue``)
+viu dins del procés: amb diversos workers cal una cua compartida que implementi ``pair``,
+``requeue``, ``touch``, ``cancel``, ``is_waiting``, ``set_match`` i ``pop_match``, i un
+broker d'esdeveniments compartit. Si ``BATTLESHIP_WORKERS`` és més d'un i la cua o el broker
+són els del procés, l'aplicació no arrenca (``check_deployment``).
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .events import InProcessBroker, get_broker, publish_events
+from .models import Board, Game, GameEvent
+
+
+class InProcessQueue:
+    def __init__(self):
+        self._buckets = {}   # (amplada, alçada) -> OrderedDict(jugador -> darrera activitat)
+        self._waiting = {}   # jugador -> (amplada, alçada)
+        self._matching = {}  # rival tret de la cua mentre es crea la partida -> moment
+        self._matches = OrderedDict()  # jugador que esperava -> (partida, moment)
+        self._lock = threading.Lock()
+
+    def pair(self, player_id, bucket):
+        """
+        Treu de la cua ``bucket`` el primer rival que encara espera i el retorna. Si no n'hi
+        ha cap, hi posa ``player_id`` i retorna None. El rival queda "emparellant" fins a
+        ``set_match`` o ``requeue``: per a ``is_waiting`` encara espera.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._remove(player_id)
+            waiting = self._buckets.get(bucket)
+            while waiting:
+                opponent, seen = waiting.popitem(last=False)
+                del self._waiting[opponent]
+                # Els jugadors que han deixat d'esperar (sense long polling) caduquen
+                if now - seen <= settings.BATTLESHIP_MATCHMAKING_TTL:
+                    self._matching[opponent] = now
+                    return opponent
+            self._buckets.setdefault(bucket, OrderedDict())[player_id] = now
+            self._waiting[player_id] = bucket
+            return None
+
+    def requeue(self, player_id, bucket):
+        """Torna ``player_id`` al principi de la cua (si no s'ha pogut crear la partida)."""
+        with self._lock:
+            self._matching.pop(player_id, None)
+            waiting = self._buckets.setdefault(bucket, OrderedDict())
+            waiting[player_id] = time.monotonic()
+            waiting.move_to_end(player_id, last=False)
+            self._waiting[player_id] = bucket
+
+    def touch(self, player_id):
+        with self._lock:
+            bucket = self._waiting.get(player_id)
+            if bucket is not None:
+                self._buckets[bucket][player_id] = time.monotonic()
+
+    def cancel(self, player_id):
+        with self._lock:
+            return self._remove(player_id)
+
+    def is_waiting(self, player_id):
+        with self._lock:
+            if player_id in self._waiting:
+                return True
+            # Si la transacció no arriba a confirmar-se, l'estat "emparellant" també caduca
+            started = self._matching.get(player_id)
+            return started is not None and time.monotonic() - started <= settings.BATTLESHIP_MATCHMAKING_TTL
+
+    def set_match(self, player_id, game_id):
+        now = time.monotonic()
+        with self._lock:
+            self._matching.pop(player_id, None)
+            self._matches.pop(player_id, None)
+            self._matches[player_id] = (game_id, now)
+            # Les partides que ningú no recull caduquen (per ordre d'arribada)
+            while self._matches:
+                oldest, (_, created) = next(iter(self._matches.items()))
+                if now - created <= settings.BATTLESHIP_MATCHMAKING_TTL:
+                    break
+                del self._matches[oldest]
+
+    def pop_match(self, player_id):
+        with self._lock:
+            game_id, created = self._matches.pop(player_id, (None, None))
+            if game_id is None or time.monotonic() - created > settings.BATTLESHIP_MATCHMAKING_TTL:
+                return None
+            return game_id
+
+    def _remove(self, player_id):
+        self._matching.pop(player_id, None)
+        bucket = self._waiting.pop(player_id, None)
+        if bucket is None:
+            return False
+        waiting = self._buckets[bucket]
+        del waiting[player_id]
+        if not waiting:
+            del self._buckets[bucket]
+        return True
+
+
+@lru_cache(maxsize=None)
+def get_queue():
+    return import_string(settings.BATTLESHIP_MATCHMAKING_QUEUE)()
+
+
+def check_deployment():
+    """
+    Cada worker tindria la seva pròpia cua i el seu propi broker en procés: els jugadors no
+    s'emparellarien ni rebrien els esdeveniments publicats des d'un altre worker.
+    """
+    workers = settings.BATTLESHIP_WORKERS
+    if workers <= 1:
+        return
+    if issubclass(import_string(settings.BATTLESHIP_MATCHMAKING_QUEUE), InProcessQueue):
+        raise ImproperlyConfigured(
+            f"BATTLESHIP_MATCHMAKING_QUEUE és una cua en procés però hi ha {workers} "
+            "workers (BATTLESHIP_WORKERS): cal una cua compartida.")
+    if issubclass(import_string(settings.BATTLESHIP_EVENT_BROKER), InProcessBroker):
+        raise ImproperlyConfigured(
+            f"BATTLESHIP_EVENT_BROKER és un broker en procés però hi ha {workers} "
+            "workers (BATTLESHIP_WORKERS): cal un broker compartit.")
+
+
+def player_channel(player_id):
+    """Canal del broker d'esdeveniments per als avisos adreçats a un jugador."""
+    return f"player:{player_id}"
+
+
+def join(player, width, height):
+    """
+    Busca rival per a ``player`` en un tauler de ``width`` x ``height``. Retorna la partida
+    creada o None si el jugador queda esperant.
+    """
+    queue = get_queue()
+    bucket = (width, height)
+    opponent_id = queue.pair(player.id, bucket)
+    if opponent_id is None:
+        return None
+    try:
+        return create_match(opponent_id, player.id, width, height)
+    except Exception:
+        queue.requeue(opponent_id, bucket)
+        raise
+
+
+@transaction.atomic
+def create_match(first_id, second_id, width, height):
+    """Crea la partida dels dos jugadors; comença el que esperava (``first_id``)."""
+    game = Game.objects.create(owner_id=first_id, turn_id=first_id, multiplayer=True,
+                               phase=Game.PHASE_PLACEMENT, width=width, height=height)
+    game.players.add(first_id, second_id)
+    Board.objects.bulk_create([Board(game=game, player_id=first_id), Board(game=game, player_id=second_id)])
+    publish_events(game.id, [
+        (GameEvent.TYPE_CREATED, {'owner': first_id, 'width': width, 'height': height, 'multiplayer': True}),
+        (GameEvent.TYPE_JOINED, {'player': first_id}),
+        (GameEvent.TYPE_JOINED, {'player': second_id}),
+    ])
+
+    def notify():
+        get_queue().set_match(first_id, game.id)
+        broker = get_broker()
+        for player_id in (first_id, second_id):
+            broker.publish(player_channel(player_id), {'type': 'matched', 'game': game.id})
+
+    transaction.on_commit(notify)
+    metrics.GAMES_CREATED.inc()
+    metrics.PHASE_TRANSITIONS.inc(phase=game.phase)
+    return game
@@ -0,0 +1,190 @@
+"""
+Mètriques de l'aplicació en format de text de Prometheus (servides a ``/metrics``).
+
+Cada procés acumula comptadors i histogrames en memòria; cada actualització només agafa
+un lock molt breu. Amb diversos workers (gunicorn/uvicorn) cal configurar
+``BATTLESHIP_METRICS_DIR`` (per defecte la variable d'entorn ``PROMETHEUS_MULTIPROC_DIR``):
+cada procés hi desa periòdicament els seus valors a ``<pid>.json`` i ``/metrics`` suma els
+fitxers de tots els processos. El directori s'ha de buidar en arrencar el desplegament.
+
+``/metrics`` només respon a les adreces de ``BATTLESHIP_METRICS_ALLOWED_IPS`` (per defecte
+localhost, on s'executa l'agent de Prometheus) i als usuaris staff amb sessió iniciada.
+"""
+import abc
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_last_flush = 0.0
+
+
+def escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric(abc.ABC):
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        REGISTRY[name] = self
+
+    def key(self, labels):
+        return json.dumps([str(labels[name]) for name in self.labelnames])
+
+    @staticmethod
+    @abc.abstractmethod
+    def merge(a, b):
+        """Suma els valors d'una mateixa sèrie desats per dos processos."""
+
+    @abc.abstractmethod
+    def samples(self, values):
+        """Línies de text de Prometheus per als valors ``{clau d'etiquetes: valor}``."""
+
+    def format_labels(self, key, **extra):
+        pairs = list(zip(self.labelnames, json.loads(key))) + [(k, str(v)) for k, v in extra.items()]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+    def samples(self, values):
+        if not values and not self.labelnames:
+            yield f"{self.name} 0"
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{self.format_labels(key)} {value}"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def observe(self, value, **labels):
+        # Valor desat: [comptes per bucket (no acumulats)..., suma, total]
+        key = self.key(labels)
+        with _lock:
+            data = self.values.get(key)
+            if data is None:
+                data = self.values[key] = [0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    data[i] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    @staticmethod
+    def merge(a, b):
+        return [x + y for x, y in zip(a, b)]
+
+    def samples(self, values):
+        for key, data in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, data):
+                cumulative += count
+                yield f"{self.name}_bucket{self.format_labels(key, le=bound)} {cumulative}"
+            yield f"{self.name}_bucket{self.format_labels(key, le='+Inf')} {data[-1]}"
+            yield f"{self.name}_sum{self.format_labels(key)} {data[-2]}"
+            yield f"{self.name}_count{self.format_labels(key)} {data[-1]}"
+
+
+REGISTRY = {}
+
+SHOTS = Counter("battleship_shots_total", "Dispars fets.")
+HITS = Counter("battleship_hits_total", "Dispars que han tocat un vaixell.")
+GAMES_CREATED = Counter("battleship_games_created_total", "Partides creades.")
+GAMES_FINISHED = Counter("battleship_games_finished_total", "Partides acabades.")
+PHASE_TRANSITIONS = Counter("battleship_phase_transitions_total", "Canvis de fase de partida.", ["phase"])
+REQUEST_DURATION = Histogram(
+    "battleship_request_duration_seconds", "Temps de resposta per ruta.", ["route", "method"])
+LIVE_GAME_CACHE = Counter(
+    "battleship_live_game_cache_total", "Lectures de l'estat de partida en memòria.", ["result"])
+GAME_SNAPSHOT_CACHE = Counter(
+    "battleship_game_snapshot_cache_total", "Consultes de partida per resultat de la cache d'instantànies.",
+    ["result"])
+DB_QUERIES = Counter("battleship_db_queries_total", "Consultes a la base de dades per ruta.", ["route"])
+
+
+def snapshot():
+    with _lock:
+        return {name: {key: list(v) if isinstance(v, list) else v for key, v in metric.values.items()}
+                for name, metric in REGISTRY.items()}
+
+
+def metrics_dir():
+    return settings.BATTLESHIP_METRICS_DIR
+
+
+def flush(force=False):
+    """Desa els valors d'aquest procés al directori compartit (com a molt un cop per interval)."""
+    global _last_flush
+    directory = metrics_dir()
+    now = time.monotonic()
+    if not directory or (not force and now - _last_flush < settings.BATTLESHIP_METRICS_FLUSH_INTERVAL):
+        return
+    _last_flush = now
+    path = Path(directory) / f"{os.getpid()}.json"
+    tmp = path.with_name(f"{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(snapshot()))
+    os.replace(tmp, path)
+
+
+def collect():
+    """Valors agregats de tots els processos (o només d'aquest si no hi ha directori compartit)."""
+    directory = metrics_dir()
+    if not directory:
+        return snapshot()
+    flush(force=True)
+    totals = {}
+    for path in Path(directory).glob("*.json"):
+        try:
+            values = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # Fitxer d'un procés que s'està escrivint o ja no hi és
+        for name, samples in values.items():
+            metric = REGISTRY.get(name)
+            if metric is None:
+                continue
+            merged = totals.setdefault(name, {})
+            for key, value in samples.items():
+                merged[key] = metric.merge(merged[key], value) if key in merged else value
+    return totals
+
+
+def render():
+    values = collect()
+    lines = []
+    for name, metric in REGISTRY.items():
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.type}")
+        lines.extend(metric.samples(values.get(name, {})))
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    if request.META.get("REMOTE_ADDR") not in settings.BATTLESHIP_METRICS_ALLOWED_IPS and not (
+            request.user.is_authenticated and request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
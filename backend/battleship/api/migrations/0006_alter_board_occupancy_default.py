@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_board_occupancy'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='board',
+            name='occupancy',
+            field=models.JSONField(blank=True, default=dict, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.core.management.color import no_style
+from django.db import migrations
+
+DEFAULT_VESSELS = [
+    {"id": 1, "size": 1, "name": "Patrol Boat", "image": "src/assets/SeaWarfareSet/PatrolBoat/ShipPatrolHull.png"},
+    {"id": 2, "size": 2, "name": "Destroyer", "image": "src/assets/SeaWarfareSet/Destroyer/ShipDestroyerHull.png"},
+    {"id": 3, "size": 3, "name": "Cruiser", "image": "src/assets/SeaWarfareSet/Cruiser/ShipCruiserHull.png"},
+    {"id": 4, "size": 4, "name": "Submarine", "image": "src/assets/SeaWarfareSet/Submarine/ShipSubmarineHull.png"},
+    {"id": 5, "size": 5, "name": "Carrier", "image": "src/assets/SeaWarfareSet/Carrier/ShipCarrierHull.png"},
+]
+
+
+# Crea el catàleg de vaixells per defecte (abans es creava a cada consulta de VesselViewSet)
+def seed_default_vessels(apps, schema_editor):
+    Vessel = apps.get_model("api", "Vessel")
+    for vessel_data in DEFAULT_VESSELS:
+        Vessel.objects.update_or_create(
+            id=vessel_data["id"],
+            defaults={
+                "size": vessel_data["size"],
+                "name": vessel_data["name"],
+                "image": vessel_data["image"],
+            },
+        )
+    # Els ids s'han fixat a mà: avançar la seqüència perquè els vaixells nous no col·lisionin
+    for sql in schema_editor.connection.ops.sequence_reset_sql(no_style(), [Vessel]):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_game_phase_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_default_vessels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:51
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+# Abans de crear la restricció, esborra els dispars repetits que hagin pogut quedar
+# per peticions simultànies (es conserva el primer de cada cel·la)
+def remove_duplicate_shots(apps, schema_editor):
+    Shot = apps.get_model('api', 'Shot')
+    duplicates = (
+        Shot.objects.values('board_id', 'row', 'col')
+        .annotate(first=Min('id'), n=Count('id'))
+        .filter(n__gt=1)
+    )
+    for dup in duplicates:
+        Shot.objects.filter(board_id=dup['board_id'], row=dup['row'], col=dup['col']).exclude(
+            id=dup['first']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_seed_default_vessels'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_shots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='shot',
+            constraint=models.UniqueConstraint(fields=('board', 'row', 'col'), name='unique_shot_per_cell'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_unique_shot_per_cell'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='board',
+            index=models.Index(fields=['game', 'player'], name='board_game_player_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boardvessel',
+            index=models.Index(fields=['board', 'alive'], name='boardvessel_board_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shot',
+            index=models.Index(fields=['board', 'impact'], name='shot_board_impact_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shot',
+            index=models.Index(fields=['game', 'player'], name='shot_game_player_idx'),
+        ),
+    ]
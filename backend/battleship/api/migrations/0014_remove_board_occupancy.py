@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:01
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_game_version'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='board',
+            name='occupancy',
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:17
+
+from django.db import migrations, models
+
+
+# El jugador CPU ja no surt a la classificació
+def remove_cpu_stats(apps, schema_editor):
+    PlayerStats = apps.get_model('api', 'PlayerStats')
+    PlayerStats.objects.filter(player__user__username='cpu').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_remove_board_occupancy'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_cpu_stats, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='playerstats',
+            name='stats_win_rate_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='playerstats',
+            name='stats_games_won_idx',
+        ),
+        migrations.AddIndex(
+            model_name='playerstats',
+            index=models.Index(fields=['-win_rate', '-games_won', 'player'], name='stats_win_rate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playerstats',
+            index=models.Index(fields=['-games_won', 'player'], name='stats_games_won_idx'),
+        ),
+    ]
@@ -8,6 +8,9 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 
 # Representa el perfil de jugador vinculado a un usuario del sistema
 class Player(models.Model):
+    # Usuari del jugador CPU de les partides individuals; no surt a la classificació
+    CPU_USERNAME = "cpu"
+
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     nickname = models.CharField(max_length=50)
 
@@ -33,6 +36,19 @@ class Game(models.Model):
     phase = models.CharField(max_length=15, choices=PHASE_CHOICES.items(), default=PHASE_WAITING)
     winner = models.ForeignKey(Player, related_name="winner", on_delete=models.SET_NULL, blank=True, null=True)
     owner = models.ForeignKey(Player, related_name="owner", on_delete=models.SET_NULL, null=True)
+    # Augmenta amb cada canvi visible a /games/{id}/ (col·locacions, dispars, fase, jugadors);
+    # és l'ETag de GameViewSet.retrieve i la clau de les instantànies (veure snapshots.py)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Llistat paginat per cursor sobre id, filtrat per fase
+            models.Index(fields=["phase", "id"], name="game_phase_id_idx"),
+        ]
+
+    @classmethod
+    def bump_version(cls, game_id):
+        cls.objects.filter(pk=game_id).update(version=models.F("version") + 1)
 
 # Representa el tablero individual de un jugador en una partida
 class Board(models.Model):
@@ -40,11 +56,19 @@ class Board(models.Model):
     player = models.ForeignKey(Player, related_name="boards", on_delete=models.CASCADE)
     prepared = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Tauler d'un jugador en una partida (vistes niades i resolució de dispars)
+            models.Index(fields=["game", "player"], name="board_game_player_idx"),
+        ]
+
 # Representa un tipo de barco disponible
 class Vessel(models.Model):
     size = models.PositiveIntegerField()
     name = models.CharField(max_length=50)
     image = models.URLField(blank = True)
+    # Junt amb el nombre de vaixells, fa de versió del catàleg en memòria (veure catalog.py)
+    updated_at = models.DateTimeField(auto_now=True)
 
 # Representa la colocación de un barco sobre el tablero
 class BoardVessel(models.Model):
@@ -56,6 +80,12 @@ class BoardVessel(models.Model):
     cf = models.IntegerField()
     alive = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Vaixells a flota d'un tauler (fi de partida i torn de la CPU)
+            models.Index(fields=["board", "alive"], name="boardvessel_board_alive_idx"),
+        ]
+
 # Representa un disparo realizado en la partida
 class Shot(models.Model):
     impact = models.ForeignKey(BoardVessel, on_delete=models.SET_NULL, null=True, blank=True) # Barco impactado
@@ -65,3 +95,60 @@ class Shot(models.Model):
     row = models.IntegerField()
     col = models.IntegerField()
     result = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            # Només es pot disparar un cop a cada cel·la d'un tauler
+            # Serveix també d'índex per a les consultes per tauler i cel·la
+            models.UniqueConstraint(fields=["board", "row", "col"], name="unique_shot_per_cell"),
+        ]
+        indexes = [
+            # Impactes en un vaixell (comprovació d'enfonsat)
+            models.Index(fields=["board", "impact"], name="shot_board_impact_idx"),
+            # Dispars d'un jugador en una partida
+            models.Index(fields=["game", "player"], name="shot_game_player_idx"),
+        ]
+
+# Estadístiques acumulades d'un jugador en partides acabades (classificació)
+class PlayerStats(models.Model):
+    player = models.OneToOneField(Player, related_name="stats", on_delete=models.CASCADE)
+    games_played = models.PositiveIntegerField(default=0)
+    games_won = models.PositiveIntegerField(default=0)
+    shots = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+    win_rate = models.FloatField(default=0)  # games_won / games_played, desat per poder-hi ordenar amb índex
+
+    class Meta:
+        indexes = [
+            # Inclouen el jugador per desempatar i que la paginació sigui estable
+            models.Index(fields=["-win_rate", "-games_won", "player"], name="stats_win_rate_idx"),
+            models.Index(fields=["-games_won", "player"], name="stats_games_won_idx"),
+        ]
+
+# Historial d'una partida: només s'hi afegeixen files (veure events.publish_events)
+class GameEvent(models.Model):
+    TYPE_CREATED = "created"
+    TYPE_JOINED = "joined"
+    TYPE_PLACEMENT = "placement"
+    TYPE_PHASE = "phase"
+    TYPE_SHOT = "shot"
+    TYPE_SUNK = "sunk"
+    TYPE_TURN = "turn"
+    TYPE_GAMEOVER = "gameOver"
+
+    game = models.ForeignKey(Game, related_name="events", on_delete=models.CASCADE)
+    type = models.CharField(max_length=20)
+    data = models.JSONField(default=dict)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            # Historial d'una partida en ordre (replay)
+            models.Index(fields=["game", "id"], name="gameevent_game_id_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Els esdeveniments de partida no es poden modificar.")
+        super().save(*args, **kwargs)
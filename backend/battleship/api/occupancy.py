@@ -0,0 +1,47 @@
+"""
+Índex d'ocupació per tauler: mapa cel·la (fila, columna) -> BoardVessel.
+
+Permet resoldre si un dispar impacta en O(1) sense recórrer els vaixells del
+tauler, i comprovar solapaments en col·locar un vaixell en O(mida del vaixell).
+L'única font és ``BoardVessel``: la col·locació construeix l'índex a partir dels vaixells
+del tauler i els dispars el fan servir des de l'estat en memòria (``rules.BoardState``).
+"""
+
+
+def vessel_cells(ri, ci, rf, cf):
+    """Retorna totes les cel·les ocupades per un vaixell entre (ri, ci) i (rf, cf)."""
+    if ri == rf:  # Horitzontal
+        return [(ri, col) for col in range(min(ci, cf), max(ci, cf) + 1)]
+    # Vertical
+    return [(row, ci) for row in range(min(ri, rf), max(ri, rf) + 1)]
+
+
+class OccupancyIndex:
+    def __init__(self, cells=None):
+        self.cells = dict(cells or {})
+
+    @classmethod
+    def from_vessels(cls, vessels):
+        index = cls()
+        for bv in vessels:
+            index.add(bv)
+        return index
+
+    @classmethod
+    def for_board(cls, board):
+        """Índex dels vaixells col·locats al tauler."""
+        return cls.from_vessels(board.vessels.all())
+
+    def vessel_at(self, row, col):
+        """Retorna l'id del BoardVessel que ocupa la cel·la, o None si és aigua."""
+        return self.cells.get((row, col))
+
+    def occupied_cells(self):
+        return list(self.cells)
+
+    def overlaps(self, cells):
+        return any(cell in self.cells for cell in cells)
+
+    def add(self, bv):
+        for cell in vessel_cells(bv.ri, bv.ci, bv.rf, bv.cf):
+            self.cells[cell] = bv.id
@@ -0,0 +1,95 @@
+"""
+Validació i generació aleatòria de la col·locació de vaixells al tauler.
+
+El generador representa el tauler com una màscara de bits (bit ``fila * amplada + col``),
+de manera que comprovar si una posició és lliure és una sola operació AND. No depèn de
+l'ORM i es pot fer servir des de les vistes, el torn de la CPU o eines de simulació.
+"""
+import random
+
+from .occupancy import vessel_cells
+
+# Intents aleatoris per vaixell abans d'enumerar totes les posicions lliures
+RANDOM_TRIES = 20
+MAX_RESTARTS = 100
+
+
+def placement_error(width, height, size, ri, ci, rf, cf, index):
+    """
+    Retorna el motiu pel qual la col·locació no és vàlida, o None si ho és.
+    ``index`` és l'OccupancyIndex del tauler amb els vaixells ja col·locats.
+    """
+    if ri != rf and ci != cf:
+        return "El vaixell ha d'estar en horitzontal o en vertical."
+    if rf < ri or cf < ci:
+        return "La posició final no pot ser anterior a la inicial."
+    cells = vessel_cells(ri, ci, rf, cf)
+    if len(cells) != size:
+        return f"El vaixell ha d'ocupar {size} cel·les."
+    if not all(0 <= r < height and 0 <= c < width for r, c in cells):
+        return "El vaixell surt del tauler."
+    if index.overlaps(cells):
+        return "El vaixell se solapa amb un altre."
+    return None
+
+
+def random_fleet(width, height, sizes, occupied=(), rng=random):
+    """
+    Col·loca aleatòriament vaixells de les mides ``sizes`` evitant les cel·les ``occupied``.
+    Retorna una llista de (ri, ci, rf, cf) en el mateix ordre que ``sizes``.
+
+    Es col·loquen de més gran a més petit; si un vaixell no hi cap es torna a començar, fins
+    a MAX_RESTARTS vegades. Llença ValueError si no s'ha trobat cap col·locació.
+    """
+    if any(size > max(width, height) for size in sizes):
+        raise ValueError("Hi ha vaixells més grans que el tauler.")
+
+    base = 0
+    for r, c in occupied:
+        base |= 1 << (r * width + c)
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i])
+
+    for _ in range(MAX_RESTARTS):
+        mask = base
+        fleet = [None] * len(sizes)
+        for i in order:
+            position = _random_position(width, height, sizes[i], mask, rng)
+            if position is None:
+                break
+            fleet[i], bits = position
+            mask |= bits
+        else:
+            return fleet
+    raise ValueError("No s'ha pogut col·locar la flota al tauler.")
+
+
+def _bits(width, size, r, c, vertical):
+    if vertical:
+        return sum(1 << ((r + i) * width + c) for i in range(size))
+    return ((1 << size) - 1) << (r * width + c)
+
+
+def _coords(size, r, c, vertical):
+    return (r, c, r + size - 1, c) if vertical else (r, c, r, c + size - 1)
+
+
+def _random_position(width, height, size, mask, rng):
+    """Retorna ((ri, ci, rf, cf), bits) d'una posició lliure a l'atzar, o None si no n'hi ha cap."""
+    orientations = [v for v in (False, True) if size <= (height if v else width)]
+    for _ in range(RANDOM_TRIES):
+        vertical = rng.choice(orientations)
+        r = rng.randrange(height - size + 1 if vertical else height)
+        c = rng.randrange(width if vertical else width - size + 1)
+        bits = _bits(width, size, r, c, vertical)
+        if not mask & bits:
+            return _coords(size, r, c, vertical), bits
+
+    # Tauler gairebé ple: enumerar totes les posicions lliures
+    candidates = []
+    for vertical in orientations:
+        for r in range(height - size + 1 if vertical else height):
+            for c in range(width if vertical else width - size + 1):
+                bits = _bits(width, size, r, c, vertical)
+                if not mask & bits:
+                    candidates.append((_coords(size, r, c, vertical), bits))
+    return rng.choice(candidates) if candidates else None
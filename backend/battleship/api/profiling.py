@@ -0,0 +1,180 @@
+"""
+Instrumentació de rendiment per petició.
+
+``PerformanceMiddleware`` mesura el temps total de cada petició, les consultes a la base de
+dades (nombre i temps) i el temps de serialització dels serializers amb
+``TimedSerializerMixin``. Les mesures s'envien a la capçalera ``Server-Timing`` (si
+``BATTLESHIP_SERVER_TIMING``), al logger ``battleship.performance`` com a JSON i a les
+mètriques de ``/metrics`` (veure ``metrics``).
+
+Amb ``BATTLESHIP_PROFILE_SAMPLE_RATE`` > 0 es perfila amb cProfile aquesta fracció de
+peticions i es desen a ``BATTLESHIP_PROFILE_DIR`` les que triguen més de
+``BATTLESHIP_PROFILE_SLOW_MS`` (es poden obrir amb ``python -m pstats`` o snakeviz).
+Les peticions asíncrones (ASGI) es perfilen al fil del bucle d'esdeveniments: el perfil pot
+incloure altres corrutines que s'hi hagin executat mentre la petició esperava, i el codi que
+corre a ``sync_to_async`` (p. ex. l'ORM) hi apareix com a temps d'espera. Només hi pot haver un
+perfilador actiu per fil, així que de peticions concurrents només se'n perfila una.
+"""
+import cProfile
+import json
+import logging
+import random
+import time
+import uuid
+from contextlib import ExitStack
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import DB_QUERIES, REQUEST_DURATION, flush as flush_metrics
+
+logger = logging.getLogger("battleship.performance")
+
+_current = ContextVar("battleship_request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self._serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Embolcall de connection.execute_wrapper: compta i cronometra cada consulta
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+class TimedSerializerMixin:
+    """Suma el temps de ``to_representation`` a les mesures de la petició en curs."""
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        # Els serializers niats ja compten dins del temps del serializer que els conté
+        if metrics is None or metrics._serializing:
+            return super().to_representation(instance)
+        metrics._serializing = True
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics._serializing = False
+
+
+def view_name(request):
+    """Nom de la vista que ha resolt la petició, p. ex. ``GameViewSet.retrieve``."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    cls = getattr(match.func, "cls", None)
+    if cls is None:
+        return match.view_name
+    action = getattr(match.func, "actions", {}).get(request.method.lower(), request.method.lower())
+    return f"{cls.__name__}.{action}"
+
+
+def wrap_connections(metrics):
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(metrics))
+    return stack
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        profiler = self.start_profiler()
+        start = time.perf_counter()
+        try:
+            with wrap_connections(metrics):
+                response = self.get_response(request)
+        finally:
+            wall = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            _current.reset(token)
+        return self.record(request, response, metrics, wall, profiler)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        # L'ORM asíncron executa les consultes al fil de sync_to_async de la petició:
+        # és a les connexions d'aquell fil on s'han d'instal·lar els embolcalls
+        stack = await sync_to_async(wrap_connections)(metrics)
+        profiler = self.start_profiler()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            await sync_to_async(stack.close)()
+            wall = time.perf_counter() - start
+            _current.reset(token)
+        return self.record(request, response, metrics, wall, profiler)
+
+    def record(self, request, response, metrics, wall, profiler=None):
+        name = view_name(request)
+        route = name or "unmatched"
+        REQUEST_DURATION.observe(wall, route=route, method=request.method)
+        DB_QUERIES.inc(metrics.db_queries, route=route)
+        flush_metrics()
+        if profiler is not None and wall * 1000 >= settings.BATTLESHIP_PROFILE_SLOW_MS:
+            self.save_profile(profiler, name, wall)
+        if settings.BATTLESHIP_SERVER_TIMING:
+            response["Server-Timing"] = ", ".join([
+                f"app;dur={wall * 1000:.1f}",
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.db_queries} queries"',
+                f"serialize;dur={metrics.serializer_time * 1000:.1f}",
+            ])
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "view": name,
+            "status": response.status_code,
+            "duration_ms": round(wall * 1000, 3),
+            "db_queries": metrics.db_queries,
+            "db_ms": round(metrics.db_time * 1000, 3),
+            "serializer_ms": round(metrics.serializer_time * 1000, 3),
+        }))
+        return response
+
+    @staticmethod
+    def start_profiler():
+        rate = settings.BATTLESHIP_PROFILE_SAMPLE_RATE
+        if rate <= 0 or random.random() >= rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Ja hi ha un altre perfilador actiu en aquest fil
+            return None
+        return profiler
+
+    @staticmethod
+    def save_profile(profiler, name, wall):
+        directory = Path(settings.BATTLESHIP_PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{name or 'request'}-{wall * 1000:.0f}ms-{uuid.uuid4().hex[:8]}.prof"
+        profiler.dump_stats(directory / filename)
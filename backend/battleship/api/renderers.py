@@ -0,0 +1,101 @@
+"""
+Renderers de l'API.
+
+``FastJSONRenderer`` és el renderer JSON per defecte: serialitza amb la funció de
+``settings.BATTLESHIP_JSON_DUMPS`` (per defecte orjson si està instal·lat, si no ``json``
+de la biblioteca estàndard) i produeix la mateixa sortida que ``JSONRenderer``.
+"""
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def stdlib_dumps(data):
+    # Com JSONRenderer amb UNICODE_JSON, COMPACT_JSON i STRICT_JSON
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def orjson_dumps(data):
+    # Les dates passen per l'encoder de DRF perquè tinguin el mateix format que amb json
+    return orjson.dumps(data, default=_encoder.default,
+                        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+fast_dumps = orjson_dumps if orjson is not None else stdlib_dumps
+
+
+@lru_cache(maxsize=None)
+def load_dumps(path):
+    return import_string(path)
+
+
+def get_dumps():
+    return load_dumps(settings.BATTLESHIP_JSON_DUMPS)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` amb la funció de ``BATTLESHIP_JSON_DUMPS``. La sortida indentada (API
+    navegable o ``Accept: application/json; indent=4``) continua passant per ``json``.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = get_dumps()(data)
+        # Com JSONRenderer: U+2028 i U+2029 són JSON vàlid però no JavaScript vàlid
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Permet negociar ``text/event-stream`` a les vistes que retornen un flux Server-Sent Events.
+    El flux es retorna directament com a StreamingHttpResponse; aquest renderer només
+    s'utilitza per a les respostes d'error, que s'envien com a JSON.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Permet negociar ``application/x-ndjson`` (una línia JSON per registre). Com a
+    EventStreamRenderer, el flux es retorna com a StreamingHttpResponse i aquest renderer
+    només s'utilitza per a les respostes d'error.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """Permet negociar ``text/csv`` a les exportacions; com els anteriors, només renderitza errors."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
@@ -0,0 +1,50 @@
+"""
+Regles del joc independents de l'ORM: on impacta un dispar, quan s'enfonsa un vaixell i
+quan s'acaba la flota. Les fan servir l'estat en memòria de les partides (``live``) i la
+simulació sense base de dades (``simulation``).
+"""
+from collections import namedtuple
+
+from .occupancy import OccupancyIndex, vessel_cells
+
+VesselState = namedtuple("VesselState", ["id", "vessel_id", "ri", "ci", "rf", "cf", "alive"])
+ShotState = namedtuple("ShotState", ["id", "row", "col", "result", "impact_id"])
+
+
+class BoardState:
+    def __init__(self, board_id, player_id, prepared, vessels, shots):
+        self.id = board_id
+        self.player_id = player_id
+        self.prepared = prepared
+        self.vessels = {v.id: v for v in vessels}
+        self.shots = {(s.row, s.col): s for s in shots}
+        self.last_shot = max((s.id for s in self.shots.values()), default=None)
+        # El mateix índex que valida la col·locació (veure occupancy.py)
+        self.occupancy = OccupancyIndex.from_vessels(self.vessels.values())
+        self.remaining = {
+            v.id: len(set(vessel_cells(v.ri, v.ci, v.rf, v.cf)) - self.shots.keys())
+            for v in self.vessels.values()
+        }
+
+    def vessel_at(self, row, col):
+        return self.occupancy.vessel_at(row, col)
+
+    def is_shot(self, row, col):
+        return (row, col) in self.shots
+
+    def record(self, shot):
+        """Afegeix un dispar al tauler i retorna True si enfonsa el vaixell impactat."""
+        self.shots[(shot.row, shot.col)] = ShotState(
+            shot.id, shot.row, shot.col, shot.result, shot.impact_id)
+        self.last_shot = shot.id
+        if not shot.impact_id:
+            return False
+        self.remaining[shot.impact_id] -= 1
+        if self.remaining[shot.impact_id] > 0:
+            return False
+        self.vessels[shot.impact_id] = self.vessels[shot.impact_id]._replace(alive=False)
+        return True
+
+    def fleet_destroyed(self):
+        # Un tauler sense vaixells no té cap flota per enfonsar
+        return bool(self.remaining) and not any(self.remaining.values())
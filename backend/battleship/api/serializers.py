@@ -1,9 +1,17 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import Player, Game, Board, Vessel, BoardVessel, Shot
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .models import Player, Game, Board, Vessel, BoardVessel, Shot, PlayerStats
+from .catalog import get_vessel as catalog_vessel, get_vessels as catalog_vessels
+from .occupancy import OccupancyIndex
+from .profiling import TimedSerializerMixin
+from .placement import placement_error
+from .board_encoding import FORMAT_MATRIX, FORMATS, encode_board, sparse_cells
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['username', 'email', 'password']
@@ -17,15 +25,43 @@ class UserSerializer(serializers.ModelSerializer):
         return User.objects.create_user(**validated_data)
 
 
-class PlayerSerializer(serializers.ModelSerializer):
+def add_user_claims(token, user):
+    token['username'] = user.username
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    return token
+
+
+# Afegeix al token les dades de l'usuari perquè l'API no l'hagi de llegir (veure authentication.py)
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+# En renovar el token, les claims es tornen a llegir de l'usuari: el token de refresc porta les
+# de quan es va obtenir i un usuari amb menys permisos no les ha de conservar
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        user_id = self.token_class(attrs['refresh'], verify=False)[jwt_settings.USER_ID_CLAIM]
+        user = User.objects.get(**{jwt_settings.USER_ID_FIELD: user_id})
+        for key, token_class in (('access', AccessToken), ('refresh', self.token_class)):
+            if key in data:
+                data[key] = str(add_user_claims(token_class(data[key], verify=False), user))
+        return data
+
+
+class PlayerSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Player
         fields = '__all__'
 
 
-class GameSerializer(serializers.ModelSerializer):
+class GameSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.user.username')
     extended_status = serializers.SerializerMethodField()
+    cursor = serializers.SerializerMethodField()
 
     class Meta:
         model = Game
@@ -34,55 +70,76 @@ class GameSerializer(serializers.ModelSerializer):
             'turn': {'required': False, 'allow_null': True},
             'winner': {'required': False, 'allow_null': True},
             'players': {'required': False},
+            'version': {'read_only': True},
         }
 
+    def get_live_game(self, obj):
+        # Estat en memòria de la partida si la vista l'ha carregat (veure live.py)
+        return self.context.get('live_games', {}).get(obj.id)
+
+    def get_cursor(self, obj):
+        # Id de l'últim dispar de la partida, per demanar després només els canvis (?since=cursor)
+        state = self.get_live_game(obj)
+        if state is not None:
+            return state.last_shot
+        return max((shot.id for board in obj.boards.all() for shot in board.shots.all()), default=0)
+
+    def get_board_format(self):
+        # Format del tauler: ?board_format=rle o capçalera "Accept: application/json; board_format=rle"
+        request = self.context.get('request')
+        if request is None:
+            return FORMAT_MATRIX
+        media_type = getattr(request, 'accepted_media_type', None) or ''
+        params = dict(
+            part.strip().split('=', 1) for part in media_type.split(';')[1:] if '=' in part
+        )
+        board_format = request.query_params.get('board_format') or params.get('board_format') or FORMAT_MATRIX
+        if board_format not in FORMATS:
+            raise serializers.ValidationError(
+                {'board_format': f"Format de tauler no vàlid. Opcions: {', '.join(FORMATS)}."})
+        return board_format
+
     def get_extended_status(self, obj):
+        # Treballa sobre .all() perquè aprofiti el prefetch de GameViewSet.get_queryset,
+        # o sobre l'estat en memòria de la partida si n'hi ha
         owner = obj.owner
         players = list(obj.players.all())
         cpu_player = next((p for p in players if p != owner), None)
+        state = self.get_live_game(obj)
+        boards = list(state.boards.values()) if state is not None else list(obj.boards.all())
+        board_format = self.get_board_format()
+        catalog = catalog_vessels()
+        sizes = {v.id: v.size for v in catalog.values()}
 
         def get_player_status(player):
-            board = Board.objects.filter(game=obj, player=player).first()
-            vessels = BoardVessel.objects.filter(board=board).select_related("vessel")
+            board = next((b for b in boards if b.player_id == player.id), None)
+            if board is None:
+                vessels, shots = [], []
+            elif state is not None:
+                vessels, shots = list(board.vessels.values()), list(board.shots.values())
+            else:
+                vessels, shots = board.vessels.all(), board.shots.all()
 
             width, height = obj.width, obj.height
-            board_matrix = [[0 for _ in range(width)] for _ in range(height)]
             placed_ships = []
 
-            # Añadir barcos colocados al tablero
+            # Añadir barcos colocados
             for bv in vessels:
-                ship_type = bv.vessel.id
-                ship_size = bv.vessel.size
-                is_vertical = bv.ri != bv.rf
                 placed_ships.append({
-                    "type": ship_type,
-                    "size": ship_size,
+                    "type": bv.vessel_id,
+                    "size": sizes[bv.vessel_id],
                     "position": {
                         "row": bv.ri,
                         "col": bv.ci
                     },
-                    "isVertical": is_vertical
+                    "isVertical": bv.ri != bv.rf
                 })
-                for i in range(ship_size):
-                    r = bv.ri + i if is_vertical else bv.ri
-                    c = bv.ci if is_vertical else bv.ci + i
-                    board_matrix[r][c] = ship_type
-
-            # Añadir disparos al tablero
-            shots = Shot.objects.filter(board=board)
-            for shot in shots:
-                r, c = shot.row, shot.col
-                # Verificar que las coordenadas están dentro del tablero
-                if 0 <= r < height and 0 <= c < width:
-                    if shot.result == 1:
-                        # Impacto: marcar con valor negativo del tipo de barco
-                        board_matrix[r][c] = -board_matrix[r][c]
-                    else:
-                        # Agua: marcar como 11
-                        board_matrix[r][c] = 11
+
+            # Construir el tablero directamente a partir de barcos y disparos
+            cells = sparse_cells(width, height, vessels, shots, sizes)
 
             # Calcular barcos restantes por colocar
-            all_vessels = Vessel.objects.all()
+            all_vessels = catalog.values()
             placed_types = {s["type"] for s in placed_ships}
             available_ships = [
                 {
@@ -96,37 +153,156 @@ class GameSerializer(serializers.ModelSerializer):
             return {
                 "id": player.id,
                 "username": player.nickname,
-                "board": board_matrix,
+                "board": encode_board(board_format, width, height, cells),
                 "placedShips": placed_ships,
                 "availableShips": available_ships,
                 "prepared": board.prepared if board else False
             }
 
-        return {
+        status = {
             "player": get_player_status(owner),
             "opponent": get_player_status(cpu_player) if cpu_player else None
         }
+        if board_format != FORMAT_MATRIX:
+            status["boardFormat"] = board_format
+        return status
+
 
+class GameSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # Representació lleugera per a llistats (?view=summary): no construeix els taulers
+    owner = serializers.ReadOnlyField(source='owner.user.username')
+
+    class Meta:
+        model = Game
+        fields = ['id', 'phase', 'owner', 'turn', 'winner', 'multiplayer', 'width', 'height']
+
+
+class GameDeltaSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Canvis d'una partida des d'un cursor (id de l'últim dispar vist, a context['since']):
+    dispars nous, vaixells enfonsats per aquests dispars i l'estat de fase, torn i preparació.
+    """
+    cursor = serializers.SerializerMethodField()
+    shots = serializers.SerializerMethodField()
+    sunk = serializers.SerializerMethodField()
+    prepared = serializers.SerializerMethodField()
 
-class BoardSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Game
+        fields = ['id', 'phase', 'turn', 'winner', 'cursor', 'shots', 'sunk', 'prepared']
+
+    def get_new_shots(self, obj):
+        if 'new_shots' not in self.context:
+            self.context['new_shots'] = list(
+                Shot.objects.filter(game=obj, id__gt=self.context['since']).order_by('id'))
+        return self.context['new_shots']
+
+    def get_cursor(self, obj):
+        shots = self.get_new_shots(obj)
+        return shots[-1].id if shots else self.context['since']
+
+    def get_shots(self, obj):
+        return [
+            {
+                "id": shot.id,
+                "player": shot.player_id,
+                "board": shot.board_id,
+                "row": shot.row,
+                "col": shot.col,
+                "result": shot.result,
+                "impact": shot.impact_id,
+            }
+            for shot in self.get_new_shots(obj)
+        ]
+
+    def get_sunk(self, obj):
+        # Un vaixell només es pot enfonsar amb un dispar que l'impacti
+        impacted = {shot.impact_id for shot in self.get_new_shots(obj) if shot.impact_id}
+        if not impacted:
+            return []
+        sunk = BoardVessel.objects.filter(id__in=impacted, alive=False).select_related('board')
+        return [
+            {
+                "id": bv.id,
+                "player": bv.board.player_id,
+                "type": bv.vessel_id,
+                "size": catalog_vessel(bv.vessel_id).size,
+                "position": {"row": bv.ri, "col": bv.ci},
+                "isVertical": bv.ri != bv.rf,
+            }
+            for bv in sunk
+        ]
+
+    def get_prepared(self, obj):
+        return {str(player_id): prepared for player_id, prepared in obj.boards.values_list('player_id', 'prepared')}
+
+
+class BoardSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Board
         fields = '__all__'
 
 
-class VesselSerializer(serializers.ModelSerializer):
+class VesselSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Vessel
         fields = '__all__'
 
 
-class BoardVesselSerializer(serializers.ModelSerializer):
+class CatalogVesselField(serializers.PrimaryKeyRelatedField):
+    # Resol el vaixell des del catàleg en memòria en lloc de consultar la base de dades
+    def to_internal_value(self, data):
+        try:
+            vessel = catalog_vessel(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if vessel is None:
+            self.fail('does_not_exist', pk_value=data)
+        return vessel
+
+
+class BoardVesselSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    vessel = CatalogVesselField(queryset=Vessel.objects.all())
+
     class Meta:
         model = BoardVessel
         fields = '__all__'
 
+    # Comprova el tipus, orientació, mida, límits del tauler i solapaments amb l'índex d'ocupació
+    def validate(self, attrs):
+        def value(name):
+            return attrs[name] if name in attrs else getattr(self.instance, name)
+
+        board = value('board')
+        # En modificar un vaixell, ell mateix no compta com a repetit ni com a solapament
+        placed = [bv for bv in board.vessels.all() if self.instance is None or bv.id != self.instance.id]
+        if any(bv.vessel_id == value('vessel').id for bv in placed):
+            raise serializers.ValidationError("Aquest vaixell ja està col·locat.")
+
+        error = placement_error(board.game.width, board.game.height, value('vessel').size,
+                                value('ri'), value('ci'), value('rf'), value('cf'),
+                                OccupancyIndex.from_vessels(placed))
+        if error:
+            raise serializers.ValidationError(error)
+        return attrs
 
-class ShotSerializer(serializers.ModelSerializer):
+
+class FleetPlacementSerializer(TimedSerializerMixin, serializers.Serializer):
+    # Un vaixell de la flota a BoardVesselViewSet.bulk; el tauler s'obté de la URL
+    vessel = serializers.IntegerField()
+    ri = serializers.IntegerField()
+    ci = serializers.IntegerField()
+    rf = serializers.IntegerField()
+    cf = serializers.IntegerField()
+
+
+class MatchmakingSerializer(TimedSerializerMixin, serializers.Serializer):
+    # Mida del tauler que busca el jugador; cada mida té la seva cua (veure matchmaking.py)
+    width = serializers.IntegerField(min_value=5, max_value=200, default=10)
+    height = serializers.IntegerField(min_value=5, max_value=200, default=10)
+
+
+class ShotSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Shot
         fields = '__all__'
@@ -136,4 +312,14 @@ class ShotSerializer(serializers.ModelSerializer):
             'player': {'required': False},
             'game': {'required': False},
             'impact': {'required': False}, # Barco impactado
-        }
\ No newline at end of file
+        }
+        # La unicitat (board, row, col) la garanteix la base de dades a shots.fire()
+        validators = []
+
+
+class PlayerStatsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    nickname = serializers.ReadOnlyField(source='player.nickname')
+
+    class Meta:
+        model = PlayerStats
+        fields = ['player', 'nickname', 'games_played', 'games_won', 'shots', 'hits', 'win_rate']
@@ -0,0 +1,147 @@
+"""
+Resolució de dispars, compartida pels dispars dels jugadors (ShotViewSet) i pel torn de la CPU.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
+
+from . import ai, live, metrics
+from .events import publish_events
+from .leaderboard import record_game_over
+from .models import Game, GameEvent, BoardVessel, Shot
+from .occupancy import vessel_cells
+
+
+def fire(game, player, row, col):
+    """
+    Registra un dispar de ``player`` a (row, col) del tauler rival i actualitza la partida.
+
+    Tot es resol en una transacció. El torn es reclama amb un UPDATE condicional sobre la
+    partida, que bloqueja la fila i comprova la fase i el torn en una sola operació: dos dispars
+    simultanis del mateix jugador queden serialitzats i, si el primer passa el torn, el segon
+    es rebutja. L'impacte, l'enfonsament i el final de partida es resolen amb l'estat en
+    memòria de la partida (veure ``live``); els dispars repetits els atura també la
+    restricció única (board, row, col).
+    """
+    if not (0 <= row < game.height and 0 <= col < game.width):
+        raise ValidationError("Coordenades fora del tauler.")
+
+    with transaction.atomic():
+        # El mateix UPDATE incrementa la versió de la partida (si el dispar falla, es desfà)
+        claimed = Game.objects.filter(pk=game.pk, turn_id=player.id, phase=Game.PHASE_PLAYING).update(
+            turn_id=player.id, version=F('version') + 1)
+        if not claimed:
+            if not Game.objects.filter(pk=game.pk, phase=Game.PHASE_PLAYING).exists():
+                raise ValidationError("La partida no està en joc.")
+            raise ValidationError("No és el teu torn.")
+
+        # Tauler de l'oponent, des de l'estat en memòria de la partida
+        state = live.get_live_game(game)
+        opponent_board = state.opponent_of(player.id)
+        if not opponent_board:
+            raise ValidationError("No s'ha trobat el tauler de l'oponent.")
+        if opponent_board.is_shot(row, col):
+            raise ValidationError("Ja s'ha disparat a aquesta cel·la.")
+
+        vessel_id = opponent_board.vessel_at(row, col)
+        result = 1 if vessel_id else 0
+
+        # Registrar el dispar; si la cel·la ja s'havia disparat, la restricció única ho impedeix.
+        # Sense savepoint propi: l'error surt de la transacció del dispar, que es desfà sencera
+        try:
+            shot = Shot.objects.create(
+                game=game,
+                player=player,
+                board_id=opponent_board.id,
+                row=row,
+                col=col,
+                result=result,
+                impact_id=vessel_id,
+            )
+        except IntegrityError:
+            raise ValidationError("Ja s'ha disparat a aquesta cel·la.")
+
+        # Verificar si el vaixell ha estat completament enfonsat
+        shot.sunk = opponent_board.record(shot)
+        if shot.sunk:
+            BoardVessel.objects.filter(pk=vessel_id).update(alive=False)
+
+        # La partida acaba quan s'enfonsa l'últim vaixell
+        if opponent_board.fleet_destroyed():
+            game.phase = Game.PHASE_GAMEOVER
+            game.winner_id = player.id
+            Game.objects.filter(pk=game.pk).update(phase=game.phase, winner_id=game.winner_id)
+            live.invalidate(game.id)
+        else:
+            if result == 0:
+                # Si no hi ha impacte, canvia el torn
+                game.turn_id = opponent_board.player_id
+                Game.objects.filter(pk=game.pk).update(turn_id=game.turn_id)
+            if game.phase == Game.PHASE_PLAYING:
+                live.save(state)
+
+        events = [(GameEvent.TYPE_SHOT, {'id': shot.id, 'player': player.id, 'row': row, 'col': col,
+                                         'result': result, 'impact': shot.impact_id, 'sunk': shot.sunk})]
+        if shot.sunk:
+            # Un cop enfonsat, la posició del vaixell ja és pública
+            vessel = opponent_board.vessels[vessel_id]
+            events.append((GameEvent.TYPE_SUNK, {
+                'player': player.id, 'target': opponent_board.player_id, 'id': vessel_id,
+                'vessel': vessel.vessel_id, 'ri': vessel.ri, 'ci': vessel.ci, 'rf': vessel.rf, 'cf': vessel.cf,
+            }))
+        if game.phase == Game.PHASE_GAMEOVER:
+            record_game_over(game)
+            events.append((GameEvent.TYPE_GAMEOVER, {'phase': game.phase, 'winner': game.winner_id}))
+        elif result == 0:
+            events.append((GameEvent.TYPE_TURN, {'turn': game.turn_id}))
+        publish_events(game.id, events)
+
+    metrics.SHOTS.inc()
+    if result:
+        metrics.HITS.inc()
+    if game.phase == Game.PHASE_GAMEOVER:
+        metrics.GAMES_FINISHED.inc()
+        metrics.PHASE_TRANSITIONS.inc(phase=Game.PHASE_GAMEOVER)
+    return shot
+
+
+def play_cpu_turn(game):
+    """
+    Juga el torn complet de la CPU en una partida individual: dispara amb ``ai.choose_target``
+    fins que falla o guanya la partida.
+    """
+    cpu_player = game.turn
+    target_board = live.get_live_game(game).opponent_of(cpu_player.id)
+    if target_board is None:
+        return []
+
+    # Estat conegut per la CPU: aigua, impactes en vaixells a flota i cel·les enfonsades
+    misses, hits, sunk = set(), set(), set()
+    for shot in target_board.shots.values():
+        if shot.result == 0:
+            misses.add((shot.row, shot.col))
+        elif not target_board.vessels[shot.impact_id].alive:
+            sunk.add((shot.row, shot.col))
+        else:
+            hits.add((shot.row, shot.col))
+    vessels = target_board.vessels
+    sizes = [len(vessel_cells(v.ri, v.ci, v.rf, v.cf)) for v in vessels.values() if v.alive]
+
+    shots = []
+    while game.phase == Game.PHASE_PLAYING and game.turn_id == cpu_player.id and sizes:
+        row, col = ai.choose_target(game.width, game.height, sizes, misses, hits, sunk)
+        shot = fire(game, cpu_player, row, col)
+        shots.append(shot)
+
+        if shot.result == 0:
+            misses.add((row, col))
+            continue
+        hits.add((row, col))
+        if shot.sunk:
+            # Vaixell enfonsat: les seves cel·les deixen de ser objectius i surt de la flota
+            vessel = vessels[shot.impact_id]
+            cells = set(vessel_cells(vessel.ri, vessel.ci, vessel.rf, vessel.cf))
+            hits -= cells
+            sunk |= cells
+            sizes.remove(len(cells))
+    return shots
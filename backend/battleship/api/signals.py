@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Player
+from . import authentication, catalog, live, snapshots
+from .models import Player, Game, Board, BoardVessel, Vessel
 
 # Esta función se ejecuta automáticamente después de que se guarda un objeto User nuevo.
 @receiver(post_save, sender=User)
@@ -9,4 +10,69 @@ def create_player(sender, instance, created, **kwargs):
     if created:
         # Se crea automáticamente un objeto Player asociado a ese usuario
         # y se le asigna como nickname el mismo nombre de usuario.
-        Player.objects.create(user=instance, nickname=instance.username)
\ No newline at end of file
+        Player.objects.create(user=instance, nickname=instance.username)
+
+
+# Si es col·loca, es modifica o s'elimina un vaixell, la partida canvia de versió i el seu estat
+# en memòria es reconstrueix des de BoardVessel. Enfonsar un vaixell (només canvia 'alive') ja
+# l'actualitza shots.fire().
+def invalidate_board(board_id):
+    game_id = Board.objects.filter(pk=board_id).values_list('game_id', flat=True).first()
+    if game_id is not None:
+        Game.bump_version(game_id)
+        live.invalidate(game_id)
+
+
+@receiver(post_save, sender=BoardVessel)
+def invalidate_board_on_vessel_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {"alive"}:
+        return
+    invalidate_board(instance.board_id)
+
+
+@receiver(post_delete, sender=BoardVessel)
+def invalidate_board_on_vessel_delete(sender, instance, **kwargs):
+    invalidate_board(instance.board_id)
+
+
+# Qualsevol canvi d'un tauler (p. ex. 'prepared' des de BoardViewSet) canvia l'estat de la partida
+@receiver(post_save, sender=Board)
+def invalidate_game_on_board_save(sender, instance, **kwargs):
+    Game.bump_version(instance.game_id)
+    live.invalidate(instance.game_id)
+
+
+# L'estat en memòria d'una partida esborrada no s'ha de reaprofitar (veure live.py)
+@receiver(post_delete, sender=Game)
+def invalidate_live_game(sender, instance, **kwargs):
+    live.invalidate(instance.id)
+    snapshots.invalidate(instance.id)
+
+
+# Una partida nova no pot heretar la instantània d'una altra amb el mateix id (p. ex. a SQLite
+# després d'un rollback)
+@receiver(post_save, sender=Game)
+def invalidate_snapshot_on_create(sender, instance, created, **kwargs):
+    if created:
+        snapshots.invalidate(instance.id)
+
+
+# Qualsevol canvi al catàleg de vaixells invalida la còpia en memòria (veure catalog.py)
+@receiver(post_save, sender=Vessel)
+@receiver(post_delete, sender=Vessel)
+def invalidate_vessel_catalog(sender, **kwargs):
+    catalog.invalidate()
+
+
+# Els canvis d'un usuari o jugador no han d'esperar que caduqui la cache d'autenticació
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    authentication.users.discard(instance.pk)
+    authentication.players.discard(instance.pk)
+
+
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Player)
+def invalidate_cached_player(sender, instance, **kwargs):
+    authentication.players.discard(instance.user_id)
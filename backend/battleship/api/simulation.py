@@ -0,0 +1,107 @@
+"""
+Simulació de partides CPU contra CPU sense base de dades.
+
+Fa servir les mateixes regles que l'API: la col·locació aleatòria de ``placement``, la
+resolució de dispars i el final de partida de ``rules.BoardState`` i les estratègies de
+tir de ``ai``. Cada partida és independent, així que ``simulate_chunk`` es pot repartir
+entre processos (veure la comanda ``simulate``).
+"""
+import random
+from collections import Counter
+
+from . import ai
+from .placement import random_fleet
+from .occupancy import vessel_cells
+from .rules import BoardState, ShotState, VesselState
+
+
+def random_target(width, height, sizes, misses, hits, sunk, rng=random):
+    """Dispara a qualsevol cel·la encara no disparada."""
+    shot = misses | hits | sunk
+    return rng.choice([(r, c) for r in range(height) for c in range(width) if (r, c) not in shot])
+
+
+STRATEGIES = {
+    "density": ai.choose_target,
+    "random": random_target,
+}
+
+
+class Shooter:
+    """El que sap un jugador del tauler rival, com el torn de la CPU a ``shots.play_cpu_turn``."""
+
+    def __init__(self, strategy, sizes):
+        self.choose = STRATEGIES[strategy]
+        self.sizes = list(sizes)
+        self.misses, self.hits, self.sunk = set(), set(), set()
+        self.shots = 0
+
+    def shoot(self, width, height, board, rng):
+        """Fa un dispar a ``board`` i retorna True si ha tocat un vaixell."""
+        row, col = self.choose(width, height, self.sizes, self.misses, self.hits, self.sunk, rng)
+        self.shots += 1
+        vessel_id = board.vessel_at(row, col)
+        sunk = board.record(ShotState(self.shots, row, col, 1 if vessel_id else 0, vessel_id))
+        if not vessel_id:
+            self.misses.add((row, col))
+            return False
+        self.hits.add((row, col))
+        if sunk:
+            vessel = board.vessels[vessel_id]
+            cells = set(vessel_cells(vessel.ri, vessel.ci, vessel.rf, vessel.cf))
+            self.hits -= cells
+            self.sunk |= cells
+            self.sizes.remove(len(cells))
+        return True
+
+
+def random_board(width, height, sizes, rng):
+    positions = random_fleet(width, height, sizes, rng=rng)
+    vessels = [VesselState(i, i, ri, ci, rf, cf, True) for i, (ri, ci, rf, cf) in enumerate(positions, start=1)]
+    return BoardState(None, None, True, vessels, ())
+
+
+def play_game(width, height, sizes, strategies, rng, first=0):
+    """
+    Juga una partida entre les estratègies ``strategies`` (una per jugador) començant pel
+    jugador ``first``. Com a l'API, qui toca torna a disparar. Retorna (guanyador, dispars).
+    """
+    boards = [random_board(width, height, sizes, rng) for _ in strategies]
+    shooters = [Shooter(strategy, sizes) for strategy in strategies]
+    turn = first
+    while True:
+        target = boards[1 - turn]
+        hit = shooters[turn].shoot(width, height, target, rng)
+        if target.fleet_destroyed():
+            return turn, shooters[turn].shots
+        if not hit:
+            turn = 1 - turn
+
+
+def simulate_chunk(task):
+    """
+    Juga un bloc de partides i retorna les estadístiques agregades per estratègia:
+    {estratègia: {"games": n, "wins": n, "shots": Counter(dispars per guanyar -> victòries)}}.
+    Es compta per seient: si els dos jugadors fan servir la mateixa estratègia, cada partida
+    hi suma dues partides i una victòria.
+    """
+    width, height, sizes, strategies, seed, start, count = task
+    rng = random.Random(f"{seed}-{start}")
+    stats = {s: {"games": 0, "wins": 0, "shots": Counter()} for s in strategies}
+    for i in range(start, start + count):
+        # S'alterna qui comença perquè l'avantatge de sortida no esbiaixi els resultats
+        winner, shots = play_game(width, height, sizes, strategies, rng, first=i % 2)
+        for strategy in strategies:
+            stats[strategy]["games"] += 1
+        stats[strategies[winner]]["wins"] += 1
+        stats[strategies[winner]]["shots"][shots] += 1
+    return stats
+
+
+def merge_stats(total, stats):
+    for strategy, values in stats.items():
+        current = total.setdefault(strategy, {"games": 0, "wins": 0, "shots": Counter()})
+        current["games"] += values["games"]
+        current["wins"] += values["wins"]
+        current["shots"].update(values["shots"])
+    return total
@@ -0,0 +1,49 @@
+"""
+Instantànies serialitzades de ``GET /games/{id}/`` per versió de partida (``Game.version``).
+
+Cada partida té una sola entrada a la cache ``BATTLESHIP_GAME_SNAPSHOT_CACHE`` amb la
+representació de la seva versió més recent en cada format de tauler: tots els clients que
+consulten la mateixa versió comparteixen una sola serialització, i una versió nova substitueix
+l'anterior. Crear o esborrar la partida n'esborra l'entrada (veure ``signals``).
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+
+
+def get_cache():
+    return caches[settings.BATTLESHIP_GAME_SNAPSHOT_CACHE]
+
+
+def cache_key(game_id):
+    return f"battleship:game-snapshot:{game_id}"
+
+
+def etag(game_id, version, board_format, renderer_format):
+    return f'"{game_id}-{version}-{board_format}-{renderer_format}"'
+
+
+async def aget(game_id, version, board_format):
+    entry = await get_cache().aget(cache_key(game_id))
+    if entry is not None and entry["version"] == version and board_format in entry["formats"]:
+        metrics.GAME_SNAPSHOT_CACHE.inc(result="hit")
+        return entry["formats"][board_format]
+    metrics.GAME_SNAPSHOT_CACHE.inc(result="miss")
+    return None
+
+
+async def aset(game_id, version, board_format, data):
+    cache = get_cache()
+    key = cache_key(game_id)
+    entry = await cache.aget(key)
+    if entry is None or entry["version"] < version:
+        entry = {"version": version, "formats": {}}
+    elif entry["version"] > version:
+        return  # Un altre client ja ha desat una versió més nova
+    entry["formats"][board_format] = data
+    await cache.aset(key, entry)
+
+
+def invalidate(game_id):
+    get_cache().delete(cache_key(game_id))
@@ -0,0 +1,41 @@
+"""
+Respostes en flux (historial, exportacions) amb memòria constant sota WSGI i sota ASGI.
+
+Sota ASGI, Django consumeix el contingut síncron d'un ``StreamingHttpResponse`` amb
+``sync_to_async(list)``: tota la resposta es carrega a memòria abans d'enviar el primer byte.
+``streaming_response`` li passa en canvi un iterador asíncron que avança l'iterador síncron
+per lots a ``sync_to_async``, de manera que les consultes (``.iterator(chunk_size=...)``)
+continuen al fil síncron de la petició i només hi ha un lot en memòria. Sota WSGI es fa
+servir l'iterador síncron tal qual.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+BATCH_SIZE = 100
+
+
+def is_asgi(request):
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+async def aiterate(iterator, batch_size=BATCH_SIZE):
+    """Recorre ``iterator`` des del bucle d'esdeveniments, ``batch_size`` elements per salt de fil."""
+    iterator = iter(iterator)
+    next_batch = sync_to_async(lambda: list(islice(iterator, batch_size)))
+    try:
+        while batch := await next_batch():
+            for item in batch:
+                yield item
+    finally:
+        # Si el client talla la connexió, el generador tanca la consulta al seu fil
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def streaming_response(request, iterator, batch_size=BATCH_SIZE, **kwargs):
+    content = aiterate(iterator, batch_size) if is_asgi(request) else iterator
+    return StreamingHttpResponse(content, **kwargs)
@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested.routers import NestedSimpleRouter
 from . import views
-from .views import PlayerViewSet, GameViewSet, BoardViewSet, BoardVesselViewSet, VesselViewSet, ShotViewSet
+from .views import PlayerViewSet, GameViewSet, BoardViewSet, BoardVesselViewSet, VesselViewSet, ShotViewSet, LeaderboardViewSet
 
 # Create a router and register our ViewSets with it.
 router = DefaultRouter()
@@ -10,6 +10,9 @@ router.register(r'user', views.UserViewSet, basename='user')
 router.register(r'players', PlayerViewSet)
 router.register(r'games', GameViewSet)
 router.register(r'vessels', VesselViewSet)
+router.register(r'leaderboard', LeaderboardViewSet)
+router.register(r'export', views.ExportViewSet, basename='export')
+router.register(r'matchmaking', views.MatchmakingViewSet, basename='matchmaking')
 
 # Subrutas: /games/{game_id}/players/
 players_router = NestedSimpleRouter(router, r'games', lookup='game')
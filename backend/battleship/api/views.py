@@ -1,14 +1,61 @@
+import asyncio
+
 from rest_framework import viewsets, filters, status, permissions
+from rest_framework.decorators import action
 from django.contrib.auth.models import User
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.authentication import BasicAuthentication
+from rest_framework_simplejwt.views import TokenObtainPairView
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Prefetch, aprefetch_related_objects
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.utils.http import parse_etags
+from rest_framework.exceptions import NotFound, PermissionDenied
 from . import models
-from .models import Game, Player, Board, BoardVessel, Shot, Vessel
-from . import serializers
-from .serializers import UserSerializer, PlayerSerializer, GameSerializer, BoardSerializer, BoardVesselSerializer, ShotSerializer, VesselSerializer
+from .models import Game, GameEvent, Player, Board, BoardVessel, Shot, Vessel, PlayerStats
+from .asyncviews import AsyncViewSetMixin
+from .authentication import aget_player, get_player
+from .events import get_broker, history, publish_event, publish_events, stream_events
+from .pagination import GameCursorPagination, LeaderboardPagination
+from .occupancy import OccupancyIndex
+from .placement import placement_error, random_fleet
+from .renderers import CSVRenderer, EventStreamRenderer, FastJSONRenderer, NDJSONRenderer
+from .shots import fire, play_cpu_turn
+from .streaming import is_asgi, streaming_response
+from . import catalog, export, live, matchmaking, metrics, serializers, snapshots
+from .serializers import UserSerializer, PlayerSerializer, GameSerializer, GameSummarySerializer, GameDeltaSerializer, BoardSerializer, BoardVesselSerializer, FleetPlacementSerializer, MatchmakingSerializer, ShotSerializer, VesselSerializer, PlayerStatsSerializer
+
+
+# Taulers d'una partida amb els seus vaixells i dispars, per a GameSerializer.get_extended_status
+def boards_prefetch():
+    return Prefetch('boards', queryset=Board.objects.prefetch_related('vessels', 'shots'))
+
+
+# Esdeveniment d'historial d'un vaixell col·locat (la posició és privada, veure events.PRIVATE_FIELDS)
+def placement_event(board, bv):
+    return GameEvent.TYPE_PLACEMENT, {
+        'player': board.player_id, 'id': bv.id, 'vessel': bv.vessel_id,
+        'ri': bv.ri, 'ci': bv.ci, 'rf': bv.rf, 'cf': bv.cf, 'prepared': board.prepared,
+    }
+
+
+# Obtenció de tokens: amb usuari i contrasenya al cos o, només aquí, amb credencials Basic.
+# La resta de l'API s'autentica amb el token, sense tornar a calcular el hash de la contrasenya
+class BasicTokenObtainPairView(TokenObtainPairView):
+    authentication_classes = [BasicAuthentication]
+
+    def post(self, request, *args, **kwargs):
+        if isinstance(request.successful_authenticator, BasicAuthentication):
+            refresh = self.get_serializer_class().get_token(request.user)
+            return Response({'refresh': str(refresh), 'access': str(refresh.access_token)})
+        return super().post(request, *args, **kwargs)
 
 
 # Vista per a gestionar usuaris (crear, llistar, consultar).
@@ -31,6 +78,10 @@ class UserViewSet(viewsets.ModelViewSet):
         return [IsAdminUser()]
 
 
+# Jugadors per partida
+MAX_PLAYERS = 2
+
+
 # Vista per a gestionar jugadors
 class PlayerViewSet(viewsets.ModelViewSet):
     queryset = Player.objects.all()
@@ -42,10 +93,16 @@ class PlayerViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         game_id = self.kwargs.get('game_pk')
         if game_id:
-            game = get_object_or_404(Game, pk=game_id)
-            player = serializer.save()
-            game.players.add(player)
-            Board.objects.create(game=game, player=player)
+            with transaction.atomic():
+                # Bloqueja la partida perquè dues altes simultànies no en superin la capacitat
+                game = get_object_or_404(Game.objects.select_for_update(), pk=game_id)
+                if game.players.count() >= MAX_PLAYERS:
+                    raise ValidationError("La partida ja és plena.")
+                player = serializer.save()
+                game.players.add(player)
+                Board.objects.create(game=game, player=player)
+                Game.bump_version(game.id)
+                publish_event(game.id, GameEvent.TYPE_JOINED, player=player.id)
         else:
             serializer.save()
 
@@ -58,32 +115,222 @@ class PlayerViewSet(viewsets.ModelViewSet):
 
 
 # Vista per a gestionar partides
-class GameViewSet(viewsets.ModelViewSet):
+class GameViewSet(AsyncViewSetMixin, viewsets.ModelViewSet):
     queryset = Game.objects.all()
     serializer_class = GameSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['phase']
     ordering_fields = ['id']
+    pagination_class = GameCursorPagination
+
+    def is_summary(self):
+        return self.action == 'list' and self.request.query_params.get('view') == 'summary'
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return GameSummarySerializer
+        return super().get_serializer_class()
+
+    # Precarrega jugadors, taulers, vaixells i dispars de tota la pàgina per evitar
+    # consultes N+1 a GameSerializer.get_extended_status
+    def get_queryset(self):
+        # Les consultes incrementals (?since=) i el flux d'esdeveniments no necessiten els taulers complets
+        if self.action in ('events', 'history') or (self.action == 'retrieve' and 'since' in self.request.query_params):
+            return Game.objects.all()
+        if self.is_summary() or self.action == 'wait_turn':
+            queryset = Game.objects.select_related('owner__user')
+        elif self.action == 'retrieve':
+            # Els taulers es carreguen a retrieve() segons la fase de la partida
+            queryset = Game.objects.select_related('owner__user').prefetch_related('players')
+        else:
+            queryset = Game.objects.select_related('owner__user').prefetch_related(
+                'players',
+                boards_prefetch(),
+            )
+        if self.action == 'list':
+            queryset = self.filter_list(queryset)
+        return queryset
+
+    # Filtres del llistat: ?player=<id de jugador o "me"> i ?phase=<fase>
+    def filter_list(self, queryset):
+        player = self.request.query_params.get('player')
+        if player == 'me':
+            queryset = queryset.filter(players__user=self.request.user)
+        elif player:
+            try:
+                queryset = queryset.filter(players__id=int(player))
+            except ValueError:
+                raise ValidationError({'player': "Ha de ser l'id d'un jugador o 'me'."})
+        phase = self.request.query_params.get('phase')
+        if phase:
+            queryset = queryset.filter(phase=phase)
+        return queryset
 
     # Quan es crea una partida, s'assigna l'usuari com a propietari i es genera un tauler
+    @transaction.atomic
     def perform_create(self, serializer):
-        player = get_object_or_404(Player, user=self.request.user)
+        player = get_player(self.request.user)
+        if player is None:
+            raise Http404
         game = serializer.save(owner=player, phase=Game.PHASE_PLACEMENT, turn=player)
         game.players.add(player)
         Board.objects.create(game=game, player=player)
+        events = [
+            (GameEvent.TYPE_CREATED, {'owner': player.id, 'width': game.width, 'height': game.height,
+                                      'multiplayer': game.multiplayer}),
+            (GameEvent.TYPE_JOINED, {'player': player.id}),
+        ]
 
         # Si no és multijugador, s'afegeix automàticament un jugador CPU
         if not game.multiplayer:
             # Crear usuario y jugador CPU si no existen
-            cpu_user, _ = User.objects.get_or_create(username="cpu")
-            cpu_player, _ = Player.objects.get_or_create(user=cpu_user, defaults={"nickname": "cpu"})
+            cpu_user, _ = User.objects.get_or_create(username=Player.CPU_USERNAME)
+            cpu_player, _ = Player.objects.get_or_create(user=cpu_user, defaults={"nickname": Player.CPU_USERNAME})
             game.players.add(cpu_player)
             Board.objects.get_or_create(game=game, player=cpu_player)
+            events.append((GameEvent.TYPE_JOINED, {'player': cpu_player.id}))
+        publish_events(game.id, events)
+
+        metrics.GAMES_CREATED.inc()
+        metrics.PHASE_TRANSITIONS.inc(phase=game.phase)
+
+    # Amb ?since=<id de dispar> retorna només els canvis des d'aquell dispar (veure GameDeltaSerializer)
+    async def retrieve(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                raise ValidationError({'since': "Ha de ser l'id d'un dispar."})
+
+        if since is None:
+            return await self.retrieve_snapshot(request)
+        context = self.get_serializer_context()
+        context['since'] = since
+        serializer = GameDeltaSerializer(await self.aget_object(), context=context)
+        # Els serializers poden fer consultes i encara són síncrons
+        return Response(await sync_to_async(lambda: serializer.data)())
+
+    # Partida sencera amb ETag per versió (Game.version). La versió es llegeix abans que el
+    # contingut, que per tant és igual o més nou: una consulta sense canvis (If-None-Match)
+    # només fa aquesta lectura per clau primària i respon 304. Els clients que demanen la
+    # mateixa versió comparteixen la serialització (veure snapshots.py)
+    async def retrieve_snapshot(self, request):
+        try:
+            game_id = int(self.kwargs['pk'])
+        except ValueError:
+            raise Http404
+        version = await Game.objects.filter(pk=game_id).values_list('version', flat=True).afirst()
+        if version is None:
+            raise Http404
+        board_format = self.get_serializer().get_board_format()
+        etag = snapshots.etag(game_id, version, board_format, request.accepted_renderer.format)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        # Comparació feble: CompressionMiddleware marca com a feble l'ETag de les respostes comprimides
+        if_none_match = {tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))}
+        if etag in if_none_match or '*' in if_none_match:
+            metrics.GAME_SNAPSHOT_CACHE.inc(result='not_modified')
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = await snapshots.aget(game_id, version, board_format)
+        if data is None:
+            game = await self.aget_object()
+            context = self.get_serializer_context()
+            # Les partides en joc es pinten des de l'estat en memòria (veure live.py)
+            if game.phase == Game.PHASE_PLAYING:
+                context['live_games'] = {game.id: await live.aget_live_game(game)}
+            else:
+                await aprefetch_related_objects([game], boards_prefetch())
+            serializer = self.get_serializer(game, context=context)
+            data = await sync_to_async(lambda: serializer.data)()
+            await snapshots.aset(game_id, version, board_format, data)
+        return Response(data, headers=headers)
+
+    def perform_update(self, serializer):
+        game = serializer.save()
+        Game.bump_version(game.id)
+        game.refresh_from_db(fields=['version'])
+
+    # Long polling: respon quan és el torn de l'usuari o la partida acaba, o al cap de
+    # ?timeout= segons (com a molt BATTLESHIP_WAIT_TURN_TIMEOUT). Mentre espera no ocupa cap fil.
+    @action(detail=True, methods=['get'], url_path='wait-turn')
+    async def wait_turn(self, request, pk=None):
+        try:
+            timeout = float(request.query_params.get('timeout', settings.BATTLESHIP_WAIT_TURN_TIMEOUT))
+        except ValueError:
+            raise ValidationError({'timeout': "Ha de ser un nombre de segons."})
+        timeout = min(max(timeout, 0), settings.BATTLESHIP_WAIT_TURN_TIMEOUT)
+
+        player = await aget_player(request.user)
+        if player is None:
+            raise PermissionDenied("Cal un jugador per esperar el torn.")
+
+        game = await self.aget_object()
+        if self.is_turn_ready(game, player):
+            return self.turn_response(game, player)
+
+        # Subscrit abans de tornar a llegir la partida, perquè no es perdi cap canvi entre la
+        # lectura i l'espera
+        broker = get_broker()
+        subscription = broker.subscribe(game.pk)
+        try:
+            await game.arefresh_from_db(fields=['phase', 'turn', 'winner'])
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while not self.is_turn_ready(game, player):
+                event = await subscription.get(timeout=max(deadline - loop.time(), 0))
+                if event is None:
+                    # Sense esdeveniment (o amb un broker que no l'ha repartit): l'estat el diu la BD
+                    await game.arefresh_from_db(fields=['phase', 'turn', 'winner'])
+                    break
+                # Els esdeveniments porten el nou estat: no cal tornar a llegir la partida
+                if event['type'] in (GameEvent.TYPE_TURN, GameEvent.TYPE_PHASE):
+                    game.turn_id = event['turn']
+                if event['type'] in (GameEvent.TYPE_PHASE, GameEvent.TYPE_GAMEOVER):
+                    game.phase = event['phase']
+                if event['type'] == GameEvent.TYPE_GAMEOVER:
+                    game.winner_id = event['winner']
+        finally:
+            broker.unsubscribe(subscription)
+        return self.turn_response(game, player)
+
+    @staticmethod
+    def turn_response(game, player):
+        data = GameSummarySerializer(game).data
+        data['your_turn'] = game.phase == Game.PHASE_PLAYING and game.turn_id == player.id
+        return Response(data)
+
+    @staticmethod
+    def is_turn_ready(game, player):
+        return game.phase == Game.PHASE_GAMEOVER or (
+            game.phase == Game.PHASE_PLAYING and game.turn_id == player.id)
+
+    # Flux Server-Sent Events amb els dispars, col·locacions i canvis de fase i torn de la partida.
+    # El flux és un generador asíncron: cal un servidor ASGI (sota WSGI i runserver retorna 501)
+    @action(detail=True, methods=['get'], renderer_classes=[EventStreamRenderer, FastJSONRenderer])
+    def events(self, request, pk=None):
+        game = self.get_object()
+        if not is_asgi(request):
+            return Response({'detail': "El flux d'esdeveniments necessita un servidor ASGI."},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+        response = StreamingHttpResponse(stream_events(game.id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    # Historial complet de la partida en NDJSON (una línia JSON per esdeveniment, en ordre),
+    # llegit i enviat per blocs perquè la memòria no creixi amb la mida de la partida (veure streaming.py)
+    @action(detail=True, methods=['get'], renderer_classes=[NDJSONRenderer, FastJSONRenderer])
+    def history(self, request, pk=None):
+        game = self.get_object()
+        viewer = get_player(request.user)
+        lines = history(game.id, viewer=viewer and viewer.id, finished=game.phase == Game.PHASE_GAMEOVER)
+        return streaming_response(request, lines, content_type='application/x-ndjson')
 
     # Només el propietari pot eliminar una partida
     def destroy(self, request, *args, **kwargs):
         game = self.get_object()
-        if game.owner.user != request.user:
+        if game.owner is None or game.owner.user_id != request.user.pk:
             raise PermissionDenied("Només el propietari pot eliminar aquesta partida.")
         return super().destroy(request, *args, **kwargs)
 
@@ -117,64 +364,131 @@ class BoardVesselViewSet(viewsets.ModelViewSet):
         data = request.data.copy()
         data['board'] = board.id
 
+        # El serializer valida límits, mida i solapaments
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
 
-        # Comprovar si el jugador ha col·locat tots els vaixells
-        total_placed = BoardVessel.objects.filter(board=board).count()
-        expected = Vessel.objects.count()
+        with transaction.atomic():
+            board_vessel = serializer.save()
+
+            # Comprovar si el jugador ha col·locat tots els vaixells
+            total_placed = BoardVessel.objects.filter(board=board).count()
+            expected = len(catalog.get_vessels())
 
-        if total_placed == expected:
-            board.prepared = True
-            board.save()
+            if total_placed == expected:
+                board.prepared = True
+                board.save()
 
-            game = board.game
-            game.refresh_from_db()
+            # La versió de la partida la incrementa el senyal de BoardVessel
+            publish_events(board.game_id, [placement_event(board, board_vessel)])
 
-            # Si tots els jugadors han preparat el tauler, canviar a fase de joc ("playing")
-            all_prepared = all(b.prepared for b in game.boards.all())
-            if all_prepared:
-                game.phase = Game.PHASE_PLAYING
-                game.save()
+            if board.prepared:
+                self.start_game_if_ready(board.game_id)
 
         return Response(serializer.data, status=201)
 
+    # Col·loca tota la flota d'un sol cop en una transacció: [{vessel, ri, ci, rf, cf}, ...]
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, game_pk=None, player_pk=None):
+        items = request.data if isinstance(request.data, list) else request.data.get('vessels')
+        serializer = FleetPlacementSerializer(data=items, many=True, allow_empty=False)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            board = self.get_board_for_update(game_pk, player_pk)
+            created = self.place_fleet(board, serializer.validated_data)
+        return Response(BoardVesselSerializer(created, many=True).data, status=201)
+
+    # Col·loca aleatòriament els vaixells que encara no té el jugador (CPU o col·locació automàtica)
+    @action(detail=False, methods=['post'])
+    def auto(self, request, game_pk=None, player_pk=None):
+        with transaction.atomic():
+            board = self.get_board_for_update(game_pk, player_pk)
+            placed_types = set(BoardVessel.objects.filter(board=board).values_list('vessel_id', flat=True))
+            remaining = [v for v in catalog.get_vessels().values() if v.id not in placed_types]
+            try:
+                positions = random_fleet(board.game.width, board.game.height, [v.size for v in remaining],
+                                         occupied=OccupancyIndex.for_board(board).occupied_cells())
+            except ValueError as e:
+                raise ValidationError(str(e))
+            items = [
+                {'vessel': v.id, 'ri': ri, 'ci': ci, 'rf': rf, 'cf': cf}
+                for v, (ri, ci, rf, cf) in zip(remaining, positions)
+            ]
+            created = self.place_fleet(board, items)
+        return Response(BoardVesselSerializer(created, many=True).data, status=201)
+
+    def get_board_for_update(self, game_id, player_id):
+        return get_object_or_404(
+            Board.objects.select_for_update().select_related('game'), game_id=game_id, player_id=player_id)
+
+    def place_fleet(self, board, items):
+        """
+        Valida en memòria i desa d'un sol cop una llista de vaixells {vessel, ri, ci, rf, cf}.
+        S'ha de cridar dins d'una transacció amb el tauler bloquejat.
+        """
+        game = board.game
+        vessels = catalog.get_vessels()
+        placed = list(board.vessels.all())
+        placed_types = {bv.vessel_id for bv in placed}
+
+        # Validar límits, mides i solapaments, també entre els vaixells de la mateixa llista
+        pending = OccupancyIndex.from_vessels(placed)
+        placements, errors = [], []
+        for item in items:
+            vessel = vessels.get(item['vessel'])
+            if vessel is None:
+                error = "Vaixell desconegut."
+            elif vessel.id in placed_types:
+                error = "Aquest vaixell ja està col·locat."
+            else:
+                error = placement_error(game.width, game.height, vessel.size,
+                                        item['ri'], item['ci'], item['rf'], item['cf'], pending)
+            errors.append({'non_field_errors': [error]} if error else {})
+            if error is None:
+                bv = BoardVessel(board=board, vessel=vessel, ri=item['ri'], ci=item['ci'],
+                                 rf=item['rf'], cf=item['cf'])
+                placed_types.add(vessel.id)
+                pending.add(bv)
+                placements.append(bv)
+        if any(errors):
+            raise ValidationError(errors)
+
+        created = BoardVessel.objects.bulk_create(placements)
+        board.prepared = len(placed_types) >= len(vessels)
+        board.save(update_fields=['prepared'])  # El senyal de Board incrementa la versió
+
+        publish_events(game.id, [placement_event(board, bv) for bv in created])
+        if board.prepared:
+            self.start_game_if_ready(game.id)
+        return created
+
+    # Si tots els jugadors han preparat el tauler, canviar a fase de joc ("playing")
+    def start_game_if_ready(self, game_id):
+        if Board.objects.filter(game_id=game_id, prepared=False).exists():
+            return
+        updated = Game.objects.filter(
+            pk=game_id, phase__in=[Game.PHASE_WAITING, Game.PHASE_PLACEMENT]
+        ).update(phase=Game.PHASE_PLAYING, version=F('version') + 1)
+        if updated:
+            metrics.PHASE_TRANSITIONS.inc(phase=Game.PHASE_PLAYING)
+            game = Game.objects.get(pk=game_id)
+            publish_event(game.id, GameEvent.TYPE_PHASE, phase=game.phase, turn=game.turn_id)
+
 
 # Vista per a consultar o assegurar els vaixells disponibles al joc
 class VesselViewSet(viewsets.ModelViewSet):
     queryset = Vessel.objects.all()
     serializer_class = VesselSerializer
 
-    def get_queryset(self):
-        self.ensure_default_vessels()
-        return super().get_queryset()
-
-    # Assegura que hi hagi un conjunt de vaixells definits per defecte
-    def ensure_default_vessels(self):
-        default_vessels = [
-            {"id": 1, "size": 1, "name": "Patrol Boat",
-             "image": "src/assets/SeaWarfareSet/PatrolBoat/ShipPatrolHull.png"},
-            {"id": 2, "size": 2, "name": "Destroyer",
-             "image": "src/assets/SeaWarfareSet/Destroyer/ShipDestroyerHull.png"},
-            {"id": 3, "size": 3, "name": "Cruiser", "image": "src/assets/SeaWarfareSet/Cruiser/ShipCruiserHull.png"},
-            {"id": 4, "size": 4, "name": "Submarine",
-             "image": "src/assets/SeaWarfareSet/Submarine/ShipSubmarineHull.png"},
-            {"id": 5, "size": 5, "name": "Carrier", "image": "src/assets/SeaWarfareSet/Carrier/ShipCarrierHull.png"},
-        ]
-        for vessel_data in default_vessels:
-            Vessel.objects.update_or_create(
-                id=vessel_data["id"],
-                defaults={
-                    "size": vessel_data["size"],
-                    "name": vessel_data["name"],
-                    "image": vessel_data["image"]
-                }
-            )
+    # El catàleg s'ha creat amb una migració i el llistat se serveix des de la còpia en memòria
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer(list(catalog.get_vessels().values()), many=True)
+        return Response(serializer.data)
 
 
 # Vista per gestionar dispars durant la partida
-class ShotViewSet(viewsets.ModelViewSet):
+class ShotViewSet(AsyncViewSetMixin, viewsets.ModelViewSet):
     serializer_class = ShotSerializer
 
     def get_queryset(self):
@@ -182,84 +496,133 @@ class ShotViewSet(viewsets.ModelViewSet):
         player_id = self.kwargs.get('player_pk')
         return Shot.objects.filter(game_id=game_id, player_id=player_id)
 
-    def get_vessel_cells(self, vessel):
-        """Retorna totes les cel·les ocupades pel vaixell."""
-        cells = []
-        if vessel.ri == vessel.rf:  # Horizontal
-            for col in range(vessel.ci, vessel.cf + 1):
-                cells.append((vessel.ri, col))
-        else:  # Vertical
-            for row in range(vessel.ri, vessel.rf + 1):
-                cells.append((row, vessel.ci))
-        return cells
-
-    def perform_create(self, serializer):
-        game_id = self.kwargs.get('game_pk')
-        player_id = self.kwargs.get('player_pk')
-        game = get_object_or_404(Game, pk=game_id)
-        player = get_object_or_404(Player, pk=player_id)
-
-        if game.turn_id != player.id:
-            raise ValidationError("No és el teu torn.")
+    async def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        game = await aget_object_or_404(Game, pk=self.kwargs.get('game_pk'))
+        player = await aget_object_or_404(Player, pk=self.kwargs.get('player_pk'))
 
-        row = self.request.data.get('row')
-        col = self.request.data.get('col')
+        row = request.data.get('row')
+        col = request.data.get('col')
         try:
             row = int(row)
             col = int(col)
         except (TypeError, ValueError):
             raise ValidationError("Coordenades no vàlides.")
 
-        # Obtenir el tauler de l'oponent
-        opponent_board = Board.objects.filter(game=game).exclude(player=player).first()
-        if not opponent_board:
-            raise ValidationError("No s'ha trobat el tauler de l'oponent.")
-
-        # Verificar que no s'hagi disparat ja a aquesta cel·la
-        if Shot.objects.filter(board=opponent_board, row=row, col=col).exists():
-            raise ValidationError("Ja s'ha disparat a aquesta cel·la.")
-
-        # Buscar si alguna celda de un barco activo coincide
-        # Determinar si el dispar ha impactat
-        vessels = BoardVessel.objects.filter(board=opponent_board, alive=True)
-        hit_vessel = next(
-            (v for v in vessels if (row, col) in self.get_vessel_cells(v)), None
-        )
-
-        result = 1 if hit_vessel else 0
-
-        # Registrar el dispar
-        serializer.save(
-            game=game,
-            player=player,
-            board=opponent_board,
-            row=row,
-            col=col,
-            result=result,
-            impact=hit_vessel if hit_vessel else None,
-        )
-
-        # Verificar si el vaixell ha estat completament enfonsat
-        if hit_vessel:
-            vessel_cells = self.get_vessel_cells(hit_vessel)
-            impacted_cells = Shot.objects.filter(
-                board=opponent_board,
-                impact=hit_vessel
-            ).values_list('row', 'col')
-
-            impacted_set = set(impacted_cells) # Convertir a set para eficiencia
-            if all(cell in impacted_set for cell in vessel_cells):
-                hit_vessel.alive = False
-                hit_vessel.save()
-
-        # Comprovar si la partida ha acabat
-        remaining = BoardVessel.objects.filter(board=opponent_board, alive=True).count()
-        if remaining == 0:
-            game.phase = Game.PHASE_GAMEOVER
-            game.winner = player
-        elif result == 0:
-            # Si no hi ha impacte, canvia el torn
-            next_player = game.players.exclude(pk=player.id).first()
-            game.turn = next_player
-
-        game.save()
+        # El dispar es resol dins d'una transacció, que l'ORM asíncron no admet
+        await sync_to_async(self.perform_fire)(serializer, game, player, row, col)
+        data = await sync_to_async(lambda: serializer.data)()
+        return Response(data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(data))
+
+    def perform_fire(self, serializer, game, player, row, col):
+        serializer.instance = fire(game, player, row, col)
+
+        # En partides individuals, la CPU juga el seu torn dins la mateixa petició
+        if not game.multiplayer and game.phase == Game.PHASE_PLAYING and game.turn_id != player.id:
+            play_cpu_turn(game)
+
+
+# Emparellament de partides multijugador (veure matchmaking.py)
+class MatchmakingViewSet(AsyncViewSetMixin, viewsets.ViewSet):
+    # POST: busca rival. Retorna la partida (201) si n'hi ha un esperant o 202 si queda a la cua
+    @extend_schema(request=MatchmakingSerializer, responses=OpenApiTypes.OBJECT)
+    def create(self, request):
+        serializer = MatchmakingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        player = get_player(request.user)
+        if player is None:
+            raise PermissionDenied("Cal un jugador per buscar partida.")
+
+        game = matchmaking.join(player, serializer.validated_data['width'], serializer.validated_data['height'])
+        if game is None:
+            return Response({'status': 'waiting', **serializer.validated_data}, status=status.HTTP_202_ACCEPTED)
+        data = {'status': 'matched', 'game': GameSummarySerializer(game).data}
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    # GET: long polling fins que es troba rival o passen ?timeout= segons (com a /games/{id}/wait-turn/)
+    @extend_schema(parameters=[OpenApiParameter('timeout', OpenApiTypes.FLOAT)], responses=OpenApiTypes.OBJECT)
+    async def list(self, request):
+        try:
+            timeout = float(request.query_params.get('timeout', settings.BATTLESHIP_WAIT_TURN_TIMEOUT))
+        except ValueError:
+            raise ValidationError({'timeout': "Ha de ser un nombre de segons."})
+        timeout = min(max(timeout, 0), settings.BATTLESHIP_WAIT_TURN_TIMEOUT)
+        player = await aget_player(request.user)
+        if player is None:
+            raise PermissionDenied("Cal un jugador per buscar partida.")
+
+        queue = matchmaking.get_queue()
+        broker = get_broker()
+        subscription = broker.subscribe(matchmaking.player_channel(player.id))
+        try:
+            game_id = queue.pop_match(player.id)
+            if game_id is None and queue.is_waiting(player.id):
+                queue.touch(player.id)
+                event = await subscription.get(timeout=timeout)
+                # També es recull (i es treu) la partida confirmada entre el temps d'espera i ara
+                game_id = queue.pop_match(player.id)
+                if event is not None:
+                    game_id = event['game']
+        finally:
+            broker.unsubscribe(subscription)
+
+        if game_id is not None:
+            game = await Game.objects.select_related('owner__user').aget(pk=game_id)
+            return Response({'status': 'matched', 'game': GameSummarySerializer(game).data})
+        return Response({'status': 'waiting' if queue.is_waiting(player.id) else 'idle'})
+
+    # Surt de la cua
+    @extend_schema(request=None, responses=OpenApiTypes.OBJECT)
+    @action(detail=False, methods=['post'])
+    def cancel(self, request):
+        player = get_player(request.user)
+        cancelled = player is not None and matchmaking.get_queue().cancel(player.id)
+        return Response({'status': 'cancelled' if cancelled else 'idle'})
+
+
+# Classificació de jugadors a partir de les estadístiques materialitzades (PlayerStats)
+# Ordenació amb el jugador com a última clau: amb empats, les pàgines no es repeteixen ni se salten files
+class StableOrderingFilter(filters.OrderingFilter):
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        return [*ordering, 'player_id'] if ordering and 'player_id' not in ordering else ordering
+
+
+# La CPU no té estadístiques (veure leaderboard.py)
+class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = PlayerStats.objects.select_related('player')
+    serializer_class = PlayerStatsSerializer
+    pagination_class = LeaderboardPagination
+    filter_backends = [StableOrderingFilter]
+    ordering_fields = ['win_rate', 'games_won']
+    ordering = ['-win_rate', '-games_won', 'player_id']
+
+
+# Exportació de les partides acabades per a anàlisi: /export/{games,placements,shots}/
+# en CSV (?format=csv) o NDJSON (?format=ndjson), comprimida amb ?compress=gzip
+class ExportViewSet(viewsets.ViewSet):
+    permission_classes = [IsAdminUser]
+    renderer_classes = [CSVRenderer, NDJSONRenderer, FastJSONRenderer]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('id', OpenApiTypes.STR, OpenApiParameter.PATH, enum=list(export.DATASETS)),
+            OpenApiParameter('compress', OpenApiTypes.STR, enum=['gzip']),
+        ],
+        responses={(200, media_type): OpenApiTypes.BINARY for media_type in export.FORMATS.values()},
+    )
+    def retrieve(self, request, pk=None):
+        if pk not in export.DATASETS:
+            raise NotFound("Conjunt de dades desconegut.")
+        fmt = request.accepted_renderer.format
+        if fmt not in export.FORMATS:
+            fmt = 'csv'
+        compress = request.query_params.get('compress') == 'gzip'
+
+        content_type = 'application/gzip' if compress else f'{export.FORMATS[fmt]}; charset=utf-8'
+        # Els blocs d'export ja fan uns 64 KB: un bloc per salt de fil sota ASGI
+        response = streaming_response(request, export.export(pk, fmt, compress), batch_size=1,
+                                      content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{export.filename(pk, fmt, compress)}"'
+        return response
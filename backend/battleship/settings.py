@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.0/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -48,7 +49,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'battleship.api.profiling.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'battleship.api.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -154,14 +157,30 @@ REST_FRAMEWORK = {
         #'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly'
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # El token primer: no consulta la base de dades (veure battleship.api.authentication).
+    # Basic només s'accepta a /api/token/ per obtenir el token.
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.BasicAuthentication',
+        'battleship.api.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'battleship.api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Serialitzador JSON de l'API (veure battleship.api.renderers): orjson si està instal·lat.
+# 'battleship.api.renderers.stdlib_dumps' fa servir sempre json de la biblioteca estàndard.
+BATTLESHIP_JSON_DUMPS = 'battleship.api.renderers.fast_dumps'
+
+# Compressió gzip/brotli de les respostes (veure battleship.api.compression)
+BATTLESHIP_COMPRESSION_PATHS = r'^/api/v1/'
+BATTLESHIP_COMPRESSION_MIN_SIZE = 512
+# Nivell 4: a 200x200 el JSON passa de ~186 KB a ~19 KB en ~3 ms de CPU (el 6 en gasta el triple)
+BATTLESHIP_GZIP_LEVEL = 4
+BATTLESHIP_BROTLI_QUALITY = 5
+
 
 CORS_URLS_REGEX = r"^/api/.*$"
 CORS_ALLOW_ALL_ORIGINS = True
@@ -173,4 +192,60 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_LIFETIME': timedelta(days=30),
     'SLIDING_TOKEN_REFRESH_LIFETIME_LATE_USER': timedelta(days=1),
     'SLIDING_TOKEN_LIFETIME_LATE_USER': timedelta(days=30),
-}
\ No newline at end of file
+    'TOKEN_OBTAIN_SERIALIZER': 'battleship.api.serializers.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'battleship.api.serializers.ClaimsTokenRefreshSerializer',
+}
+# Segons que es guarden en memòria els usuaris i jugadors autenticats (0 per desactivar-ho)
+BATTLESHIP_AUTH_CACHE_TTL = 30
+# Segons entre comprovacions de la versió del catàleg de vaixells en memòria (veure battleship.api.catalog)
+BATTLESHIP_CATALOG_CHECK_INTERVAL = 5
+# Broker dels esdeveniments de partida en temps real (battleship.api.events) i
+# interval en segons dels comentaris keepalive del flux Server-Sent Events
+BATTLESHIP_EVENT_BROKER = 'battleship.api.events.InProcessBroker'
+BATTLESHIP_EVENT_KEEPALIVE = 15
+# Espera màxima (segons) de /games/{id}/wait-turn/, per sota del temps límit habitual dels proxies
+BATTLESHIP_WAIT_TURN_TIMEOUT = 25
+# Cua d'emparellament (battleship.api.matchmaking) i segons que un jugador hi continua
+# esperant sense fer long polling
+BATTLESHIP_MATCHMAKING_QUEUE = 'battleship.api.matchmaking.InProcessQueue'
+BATTLESHIP_MATCHMAKING_TTL = 60
+# Processos que serveixen l'aplicació (gunicorn i uvicorn llegeixen WEB_CONCURRENCY). Amb més
+# d'un, la cua d'emparellament i el broker han de ser compartits (veure matchmaking.check_deployment)
+BATTLESHIP_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Instrumentació de rendiment (veure battleship.api.profiling)
+BATTLESHIP_SERVER_TIMING = DEBUG
+BATTLESHIP_PROFILE_SAMPLE_RATE = 0.0
+BATTLESHIP_PROFILE_SLOW_MS = 500
+BATTLESHIP_PROFILE_DIR = BASE_DIR / 'profiles'
+
+# Mètriques de /metrics: directori compartit entre workers (buit = només el procés actual)
+# i interval mínim en segons entre escriptures de cada procés (veure battleship.api.metrics)
+BATTLESHIP_METRICS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+BATTLESHIP_METRICS_FLUSH_INTERVAL = 1.0
+# Adreces que poden llegir /metrics sense ser staff (separades per comes a l'entorn)
+BATTLESHIP_METRICS_ALLOWED_IPS = os.environ.get('BATTLESHIP_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
+# Estat en memòria de les partides en joc (veure battleship.api.live). LocMemCache és per
+# procés i expulsa les entrades menys usades a partir de MAX_ENTRIES; per compartir l'estat
+# entre workers es pot fer servir FileBasedCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'live-games': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'battleship-live-games',
+        'TIMEOUT': 3600,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    'game-snapshots': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'battleship-game-snapshots',
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+BATTLESHIP_LIVE_GAME_CACHE = 'live-games'
+# Instantànies serialitzades per versió de partida (battleship.api.snapshots)
+BATTLESHIP_GAME_SNAPSHOT_CACHE = 'game-snapshots'
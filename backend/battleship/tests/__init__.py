@@ -1,4 +1,44 @@
+from . import test_ai
+from . import test_async
+from . import test_auth
+from . import test_benchmark
+from . import test_compression
+from . import test_events
+from . import test_export
+from . import test_games
 from . import test_health
+from . import test_history
+from . import test_leaderboard
+from . import test_live
+from . import test_matchmaking
+from . import test_metrics
+from . import test_placement
+from . import test_profiling
+from . import test_queries
+from . import test_shots
+from . import test_simulation
+from . import test_snapshots
+from . import test_vessels
 __all__ = [
-    "test_health"
+    "test_ai",
+    "test_async",
+    "test_auth",
+    "test_benchmark",
+    "test_compression",
+    "test_events",
+    "test_export",
+    "test_games",
+    "test_health",
+    "test_history",
+    "test_leaderboard",
+    "test_live",
+    "test_matchmaking",
+    "test_metrics",
+    "test_placement",
+    "test_profiling",
+    "test_queries",
+    "test_shots",
+    "test_simulation",
+    "test_snapshots",
+    "test_vessels",
 ]
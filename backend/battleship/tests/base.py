@@ -0,0 +1,79 @@
+"""
+Fixtures compartides pels tests de l'API.
+
+``APITestCase`` autentica l'usuari ``alice`` a ``self.client``; ``GameTestCase`` hi afegeix una
+partida individual contra la CPU. El catàleg de vaixells ja el crea la migració 0009.
+"""
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from battleship.api import catalog, live, snapshots
+from battleship.api.models import Game, Player
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def fleet():
+    """Flota completa en posicions fixes: cada vaixell en horitzontal a partir de (i, 0)."""
+    return [
+        {"vessel": vessel.id, "ri": i, "ci": 0, "rf": i, "cf": vessel.size - 1}
+        for i, vessel in enumerate(catalog.get_vessels().values())
+    ]
+
+
+def fleet_cells():
+    return [(item["ri"], col) for item in fleet() for col in range(item["ci"], item["cf"] + 1)]
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        # Les caches sobreviuen al rollback de cada test i els ids de partida i tauler es reutilitzen
+        live.get_cache().clear()
+        snapshots.get_cache().clear()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.player = Player.objects.get(user=self.user)
+        self.client = client_for(self.user)
+
+    def create_game(self, width=10, height=10, client=None):
+        response = (client or self.client).post("/api/v1/games/", {"width": width, "height": height}, format="json")
+        return Game.objects.get(pk=response.data["id"])
+
+    def place(self, game, player, vessel, ri, ci, rf, cf):
+        return self.client.post(f"/api/v1/games/{game.id}/players/{player.id}/vessels/",
+                                {"vessel": vessel, "ri": ri, "ci": ci, "rf": rf, "cf": cf}, format="json")
+
+    def place_fleet(self, game, player):
+        return self.client.post(f"/api/v1/games/{game.id}/players/{player.id}/vessels/bulk/",
+                                fleet(), format="json")
+
+    def start_game(self, game):
+        """Col·loca la flota de ``fleet()`` a tots els jugadors; la partida passa a ``playing``."""
+        for player in game.players.all():
+            self.place_fleet(game, player)
+        game.refresh_from_db()
+        return game
+
+    def shoot(self, game, player, row, col):
+        return self.client.post(f"/api/v1/games/{game.id}/players/{player.id}/shots/",
+                                {"row": row, "col": col}, format="json")
+
+    def sink_fleet(self, game, player):
+        """``player`` enfonsa tota la flota rival (cada impacte li manté el torn)."""
+        for row, col in fleet_cells():
+            response = self.shoot(game, player, row, col)
+        game.refresh_from_db()
+        return response
+
+
+class GameTestCase(APITestCase):
+    """Partida individual de 10x10 (``self.game``) de ``self.player`` contra ``self.cpu``."""
+
+    def setUp(self):
+        super().setUp()
+        self.game = self.create_game()
+        self.cpu = self.game.players.exclude(pk=self.player.pk).get()
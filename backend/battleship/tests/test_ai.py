@@ -0,0 +1,69 @@
+import random
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+
+from battleship.api import ai
+from battleship.api.models import Game, Board, Shot
+
+from .base import GameTestCase
+
+
+class TargetingTestCase(SimpleTestCase):
+    def test_hunt_prefers_centre(self):
+        cells = ai.density_map_python(5, 5, [3], set(), set(), set())
+        self.assertEqual(cells, [(2, 2)])
+
+    def test_target_follows_hit(self):
+        target = ai.choose_target(10, 10, [2], set(), {(4, 4)}, set(), rng=random.Random(0))
+        self.assertIn(target, {(3, 4), (5, 4), (4, 3), (4, 5)})
+
+    def test_target_extends_line_of_hits(self):
+        # L'aigua a (4, 2) deixa més posicions per a la dreta de la línia d'impactes
+        cells = ai.density_map_python(10, 10, [4], {(4, 2)}, {(4, 4), (4, 5)}, set())
+        self.assertEqual(cells, [(4, 6)])
+
+    def test_falls_back_to_any_free_cell(self):
+        # Cap vaixell de mida 3 hi cap, però la CPU ha de poder disparar igualment
+        misses = {(0, 1), (1, 0), (1, 2), (2, 1)}
+        target = ai.choose_target(3, 3, [3], misses, set(), set(), rng=random.Random(0))
+        self.assertNotIn(target, misses)
+
+    @skipIf(ai.np is None, "NumPy no està instal·lat")
+    def test_numpy_matches_python(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            cells = {(rng.randrange(12), rng.randrange(9)) for _ in range(30)}
+            misses = set(list(cells)[:15])
+            hits = set(list(cells)[15:20])
+            sunk = set(list(cells)[20:])
+            args = (9, 12, [5, 4, 3, 2], misses, hits, sunk)
+            self.assertEqual(ai.density_map(*args), ai.density_map_python(*args))
+
+
+class CpuTurnTestCase(GameTestCase):
+    def setUp(self):
+        super().setUp()
+        for player in (self.player, self.cpu):
+            self.place(self.game, player, 1, 0, 0, 0, 0)
+        self.game.phase = Game.PHASE_PLAYING
+        self.game.save()
+
+    def test_cpu_plays_after_miss(self):
+        response = self.shoot(self.game, self.player, 9, 9)
+        self.assertEqual(response.data["result"], 0)
+
+        self.game.refresh_from_db()
+        player_board = Board.objects.get(game=self.game, player=self.player)
+        cpu_shots = Shot.objects.filter(player=self.cpu, board=player_board)
+        self.assertGreaterEqual(cpu_shots.count(), 1)
+        if self.game.phase == Game.PHASE_PLAYING:
+            # La CPU ha fallat: torna a ser el torn del jugador
+            self.assertEqual(self.game.turn, self.player)
+            self.assertEqual(cpu_shots.filter(result=0).count(), 1)
+        else:
+            self.assertEqual(self.game.winner, self.cpu)
+
+    def test_out_of_bounds_shot_rejected(self):
+        response = self.shoot(self.game, self.player, 10, 0)
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.test import override_settings
+from django.urls import resolve
+from rest_framework.test import APIClient
+
+from battleship.api import events
+from battleship.api.models import Game
+
+from .base import GameTestCase
+
+
+class AsyncViewsTestCase(GameTestCase):
+    def setUp(self):
+        super().setUp()
+        self.wait_url = f"/api/v1/games/{self.game.id}/wait-turn/"
+
+    def test_hot_paths_are_async(self):
+        self.assertTrue(iscoroutinefunction(resolve(f"/api/v1/games/{self.game.id}/").func))
+        self.assertTrue(iscoroutinefunction(resolve(f"/api/v1/games/{self.game.id}/players/1/shots/").func))
+        self.assertTrue(iscoroutinefunction(resolve(self.wait_url).func))
+        self.assertFalse(iscoroutinefunction(resolve("/api/v1/games/").func))
+
+    async def test_retrieve_with_async_client(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(f"/api/v1/games/{self.game.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], self.game.id)
+        response = await self.async_client.get("/api/v1/games/0/")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_async_requests_are_measured(self):
+        await self.async_client.aforce_login(self.user)
+        with self.assertLogs("battleship.performance", level="INFO") as logs:
+            await self.async_client.get(f"/api/v1/games/{self.game.id}/")
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["view"], "GameViewSet.retrieve")
+        self.assertGreater(record["db_queries"], 0)
+
+    async def test_async_requests_are_profiled(self):
+        await self.async_client.aforce_login(self.user)
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.settings(BATTLESHIP_PROFILE_SAMPLE_RATE=1.0, BATTLESHIP_PROFILE_SLOW_MS=0,
+                               BATTLESHIP_PROFILE_DIR=tmp):
+                await self.async_client.get(f"/api/v1/games/{self.game.id}/")
+            files = os.listdir(tmp)
+        self.assertEqual(len(files), 1)
+        self.assertIn("GameViewSet.retrieve", files[0])
+
+    def test_wait_turn_unknown_game(self):
+        self.assertEqual(self.client.get("/api/v1/games/abc/wait-turn/").status_code, 404)
+        self.assertEqual(self.client.get("/api/v1/games/0/wait-turn/").status_code, 404)
+        self.assertEqual(dict(events.get_broker()._subscribers), {})
+
+    def test_sync_methods_on_async_route(self):
+        response = self.client.patch(f"/api/v1/games/{self.game.id}/", {"width": 12}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["width"], 12)
+
+    def test_wait_turn_returns_when_ready(self):
+        Game.objects.filter(pk=self.game.pk).update(phase=Game.PHASE_PLAYING)
+        response = self.client.get(self.wait_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["your_turn"])
+
+    def test_wait_turn_timeout(self):
+        response = self.client.get(self.wait_url, {"timeout": 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["your_turn"])
+        self.assertEqual(response.data["phase"], Game.PHASE_PLACEMENT)
+
+    @override_settings(BATTLESHIP_EVENT_BROKER="battleship.tests.test_async.LostEventsBroker")
+    def test_wait_turn_timeout_reads_the_game_again(self):
+        Game.objects.filter(pk=self.game.pk).update(phase=Game.PHASE_PLAYING, turn=self.cpu)
+        LostEventsBroker.changes = {"turn": self.player}
+        events.get_broker.cache_clear()
+        try:
+            response = self.client.get(self.wait_url, {"timeout": 1})
+        finally:
+            events.get_broker.cache_clear()
+        self.assertTrue(response.data["your_turn"])
+
+    def test_wait_turn_wakes_up_on_event(self):
+        Game.objects.filter(pk=self.game.pk).update(phase=Game.PHASE_PLAYING, turn=self.cpu)
+        broker = events.get_broker()
+
+        def publish_turn():
+            # Espera que la petició s'hagi subscrit a la partida
+            deadline = time.monotonic() + 5
+            while not broker._subscribers.get(self.game.id) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            broker.publish(self.game.id, {"type": "turn", "game": self.game.id, "turn": self.player.id})
+
+        thread = threading.Thread(target=publish_turn)
+        thread.start()
+        start = time.monotonic()
+        response = self.client.get(self.wait_url, {"timeout": 10})
+        thread.join()
+        self.assertTrue(response.data["your_turn"])
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_wait_turn_requires_authentication(self):
+        self.assertEqual(APIClient().get(self.wait_url).status_code, 401)
+
+
+class LostEventsBroker:
+    """Broker que no reparteix res, com si l'esdeveniment s'hagués publicat en un altre worker."""
+    changes = {}
+
+    def subscribe(self, game_id):
+        self.game_id = game_id
+        return self
+
+    def unsubscribe(self, subscription):
+        pass
+
+    def publish(self, game_id, event):
+        pass
+
+    async def get(self, timeout=None):
+        # La partida canvia a la BD durant l'espera però l'esdeveniment no arriba
+        await Game.objects.filter(pk=self.game_id).aupdate(**self.changes)
+        return None
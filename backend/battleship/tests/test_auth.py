@@ -0,0 +1,103 @@
+import base64
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from battleship.api import authentication, catalog
+from battleship.api.models import Player
+
+
+class TokenAuthenticationTestCase(TestCase):
+    def setUp(self):
+        authentication.users.clear()
+        authentication.players.clear()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.client = APIClient()
+        catalog.get_vessels()  # Carrega el catàleg de vaixells a memòria
+
+    def obtain(self, **extra):
+        return self.client.post("/api/token/", {"username": "alice", "password": "pass"}, format="json", **extra)
+
+    def basic(self, password):
+        return "Basic " + base64.b64encode(f"alice:{password}".encode()).decode()
+
+    def test_token_carries_user_claims(self):
+        token = AccessToken(self.obtain().data["access"])
+        self.assertEqual(token["username"], "alice")
+        self.assertFalse(token["is_staff"])
+
+    def test_token_authentication_without_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain().data['access']}")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/vessels/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_claims_user_works_with_player_lookups(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain().data['access']}")
+        response = self.client.post("/api/v1/games/", {"width": 10, "height": 10}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["owner"], "alice")
+        self.assertEqual(self.client.delete(f"/api/v1/games/{response.data['id']}/").status_code, 204)
+
+    def test_staff_claims(self):
+        User.objects.create_superuser(username="admin", password="pass")
+        access = self.client.post("/api/token/", {"username": "admin", "password": "pass"}, format="json").data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(self.client.get("/api/v1/user/").status_code, 200)
+
+    def test_refresh_reloads_claims(self):
+        admin = User.objects.create_superuser(username="admin", password="pass")
+        refresh = self.client.post("/api/token/", {"username": "admin", "password": "pass"},
+                                   format="json").data["refresh"]
+        admin.is_staff = admin.is_superuser = False
+        admin.save()
+
+        response = self.client.post("/api/token/refresh/", {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, 200)
+        access = AccessToken(response.data["access"])
+        self.assertEqual((access["username"], access["is_staff"], access["is_superuser"]), ("admin", False, False))
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(self.client.get("/api/v1/user/").status_code, 403)
+
+        admin.is_active = False
+        admin.save()
+        response = self.client.post("/api/token/refresh/", {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_tokens_without_claims_use_cached_user(self):
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/v1/vessels/").status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/v1/vessels/").status_code, 200)
+
+    @override_settings(BATTLESHIP_AUTH_CACHE_TTL=0)
+    def test_cache_can_be_disabled(self):
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.client.get("/api/v1/vessels/")
+
+    def test_basic_only_on_token_endpoint(self):
+        self.client.credentials(HTTP_AUTHORIZATION=self.basic("pass"))
+        self.assertEqual(self.client.get("/api/v1/vessels/").status_code, 401)
+
+        response = self.client.post("/api/token/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data["access"])["username"], "alice")
+
+        self.client.credentials(HTTP_AUTHORIZATION=self.basic("wrong"))
+        self.assertEqual(self.client.post("/api/token/").status_code, 401)
+
+    def test_player_cache_is_invalidated(self):
+        player = authentication.get_player(self.user)
+        self.assertEqual(authentication.get_player(self.user), player)
+        player.nickname = "alicia"
+        player.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(authentication.get_player(self.user).nickname, "alicia")
+        Player.objects.filter(pk=player.pk).delete()
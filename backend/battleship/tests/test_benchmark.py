@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from battleship.api.management.commands.benchmark import percentile
+from battleship.api.models import Game, PlayerStats
+
+
+class BenchmarkTestCase(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_keep(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            call_command("benchmark", games=1, workers=1, size=5, keep=True,
+                         output=os.path.join(tmp, "benchmark.json"), stdout=StringIO())
+        self.assertEqual(Game.objects.filter(phase=Game.PHASE_GAMEOVER).count(), 1)
+
+    def test_plays_games_and_writes_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "benchmark.json")
+            call_command("benchmark", games=2, workers=1, size=5, output=output, stdout=StringIO())
+            with open(output) as f:
+                report = json.load(f)
+
+        self.assertEqual(report["games"], 2)
+        self.assertEqual(report["failed_games"], 0)
+        # La prova no deixa dades a la base de dades
+        self.assertFalse(Game.objects.exists())
+        self.assertFalse(User.objects.filter(username__startswith="bench-").exists())
+        self.assertFalse(PlayerStats.objects.filter(games_played__gt=0).exists())
+        shots = report["endpoints"]["POST /api/v1/games/{id}/players/{id}/shots/"]
+        self.assertGreaterEqual(shots["requests"], report["player_shots"])
+        self.assertEqual(shots["errors"], 0)
+        self.assertLessEqual(shots["p50_ms"], shots["p95_ms"])
+        self.assertLessEqual(shots["p95_ms"], shots["p99_ms"])
@@ -0,0 +1,130 @@
+import gzip
+import json
+import os
+import tempfile
+import zlib
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+
+from battleship.api import renderers
+from battleship.api.compression import negotiate
+from battleship.api.models import Game, Player
+
+from .base import APITestCase, client_for
+
+
+class FastJSONRendererTestCase(TestCase):
+    data = {
+        "error": [ErrorDetail("Format de tauler no vàlid.", code="invalid")],
+        "price": Decimal("1.50"),
+        "label": gettext_lazy("Game Over"),
+        "counts": {1: 2},
+        "separator": "a b",
+        "board": [[0, 11, -2], [3, 3, 0]],
+    }
+
+    def test_same_output_as_json_renderer(self):
+        expected = JSONRenderer().render(self.data)
+        self.assertEqual(renderers.FastJSONRenderer().render(self.data), expected)
+        with override_settings(BATTLESHIP_JSON_DUMPS="battleship.api.renderers.stdlib_dumps"):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.data), expected)
+
+    def test_indent_uses_json_renderer(self):
+        media_type = "application/json; indent=2"
+        self.assertEqual(renderers.FastJSONRenderer().render(self.data, media_type),
+                         JSONRenderer().render(self.data, media_type))
+
+    def test_none_renders_empty(self):
+        self.assertEqual(renderers.FastJSONRenderer().render(None), b"")
+
+
+class CompressionTestCase(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.game = self.create_game(30, 30)
+        self.url = f"/api/v1/games/{self.game.id}/"
+
+    def test_negotiate(self):
+        self.assertEqual(negotiate("gzip, deflate"), "gzip")
+        self.assertEqual(negotiate("deflate, *"), "gzip")
+        self.assertIsNone(negotiate("gzip;q=0, deflate"))
+        self.assertIsNone(negotiate(""))
+
+    def test_gzip_response(self):
+        plain = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate, br")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_compressed_etag_is_weak(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_without_accept_encoding(self):
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get("/api/v1/games/0/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @override_settings(BATTLESHIP_COMPRESSION_PATHS=r"^/api/v2/")
+    def test_only_configured_paths(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @override_settings(BATTLESHIP_COMPRESSION_MIN_SIZE=0)
+    def test_streaming_response(self):
+        url = f"/api/v1/games/{self.game.id}/history/"
+        plain = b"".join(self.client.get(url, HTTP_ACCEPT="application/x-ndjson").streaming_content)
+        response = self.client.get(url, HTTP_ACCEPT="application/x-ndjson", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        chunks = list(response.streaming_content)
+        # Cada bloc es pot descomprimir tan bon punt arriba
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        first = decompressor.decompress(chunks[0])
+        self.assertTrue(plain.startswith(first) and first)
+        self.assertEqual(gzip.decompress(b"".join(chunks)), plain)
+
+    def test_gzip_export_is_not_compressed_twice(self):
+        self.client = client_for(User.objects.create_superuser(username="admin", password="pass"))
+        response = self.client.get("/api/v1/export/games/?format=ndjson&compress=gzip",
+                                   HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        gzip.decompress(b"".join(response.streaming_content))
+
+
+class BenchmarkSerializationTestCase(TestCase):
+    def test_report(self):
+        players = Player.objects.count()
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "serialization.json")
+            call_command("benchmark_serialization", sizes=[10, 20], repeat=1, output=output, stdout=StringIO())
+            with open(output) as f:
+                report = json.load(f)
+
+        self.assertEqual({(r["size"], r["board_format"]) for r in report["results"]},
+                         {(size, fmt) for size in (10, 20) for fmt in ("matrix", "rle", "base64")})
+        for result in report["results"]:
+            sizes = {r["bytes"] for r in result["render"].values()}
+            self.assertEqual(len(sizes), 1)
+            self.assertLess(result["compression"]["gzip"]["bytes"], sizes.pop())
+        # La partida de prova es desfà
+        self.assertEqual(Game.objects.count(), 0)
+        self.assertEqual(Player.objects.count(), players)
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIClient
+
+from battleship.api import events
+from battleship.api.models import Game
+
+from .base import GameTestCase
+
+
+class RecordingBroker:
+    published = []
+
+    def publish(self, game_id, event):
+        self.published.append(event)
+
+
+class BrokerTestCase(SimpleTestCase):
+    def test_publish_from_other_thread(self):
+        async def scenario():
+            broker = events.InProcessBroker()
+            subscription = broker.subscribe(1)
+            other = broker.subscribe(2)
+            thread = threading.Thread(target=broker.publish, args=(1, {"type": "shot"}))
+            thread.start()
+            thread.join()
+            received = await subscription.get(timeout=1)
+            missing = await other.get(timeout=0.01)
+            broker.unsubscribe(subscription)
+            broker.unsubscribe(other)
+            return received, missing, dict(broker._subscribers)
+
+        self.assertEqual(asyncio.run(scenario()), ({"type": "shot"}, None, {}))
+
+    def test_stream_formats_events(self):
+        async def scenario():
+            stream = events.stream_events(7, keepalive=0.01)
+            chunks = [await anext(stream)]
+            events.get_broker().publish(7, {"type": "turn", "game": 7, "turn": 3})
+            chunks.append(await anext(stream))
+            chunks.append(await anext(stream))
+            await stream.aclose()
+            return chunks
+
+        self.assertEqual(asyncio.run(scenario()), [
+            ": connected\n\n",
+            'event: turn\ndata: {"type": "turn", "game": 7, "turn": 3}\n\n',
+            ": keepalive\n\n",
+        ])
+
+
+@override_settings(BATTLESHIP_EVENT_BROKER="battleship.tests.test_events.RecordingBroker")
+class GameEventsTestCase(GameTestCase):
+    def setUp(self):
+        events.get_broker.cache_clear()
+        RecordingBroker.published = []
+        super().setUp()
+
+    def tearDown(self):
+        events.get_broker.cache_clear()
+
+    def test_placement_and_shot_events(self):
+        # Sense el torn de la CPU dins la petició
+        Game.objects.filter(pk=self.game.pk).update(multiplayer=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.start_game(self.game)
+            self.shoot(self.game, self.player, 9, 9)
+
+        types = [e["type"] for e in RecordingBroker.published]
+        self.assertEqual(types, ["placement"] * 10 + ["phase", "shot", "turn"])
+        self.assertEqual(RecordingBroker.published[-2]["result"], 0)
+        self.assertEqual(RecordingBroker.published[-1]["turn"], self.cpu.id)
+
+    def test_events_endpoint_needs_asgi(self):
+        response = self.client.get(f"/api/v1/games/{self.game.id}/events/", HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, 501)
+
+    @override_settings(BATTLESHIP_EVENT_BROKER="battleship.api.events.InProcessBroker")
+    async def test_events_endpoint_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(f"/api/v1/games/{self.game.id}/events/",
+                                               headers={"Accept": "text/event-stream"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b": connected\n\n")
+        await stream.aclose()
+
+    def test_events_endpoint_requires_authentication(self):
+        response = APIClient().get(f"/api/v1/games/{self.game.id}/events/", HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, 401)
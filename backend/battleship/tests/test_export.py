@@ -0,0 +1,82 @@
+import csv
+import gzip
+import io
+import json
+import tempfile
+import warnings
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from battleship.api import export
+from battleship.api.models import Game
+
+from .base import APITestCase, client_for, fleet_cells
+
+
+class ExportTestCase(APITestCase):
+    def setUp(self):
+        super().setUp()
+        # Una partida acabada i una altra encara en col·locació
+        self.game = self.start_game(self.create_game())
+        self.sink_fleet(self.game, self.player)
+        self.assertEqual(self.game.phase, Game.PHASE_GAMEOVER)
+        self.create_game()
+
+    def test_csv_only_finished_games(self):
+        content = b"".join(export.export("games", "csv", chunk_size=1)).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([int(r["id"]) for r in rows], [self.game.id])
+        self.assertEqual(int(rows[0]["winner"]), self.player.id)
+
+    def test_ndjson_gzip(self):
+        content = gzip.decompress(b"".join(export.export("shots", "ndjson", compress=True, chunk_size=1)))
+        shots = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([(s["row"], s["col"], s["result"]) for s in shots],
+                         [(row, col, 1) for row, col in fleet_cells()])
+        self.assertEqual({s["game"] for s in shots}, {self.game.id})
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "placements.csv.gz"
+            call_command("export_games", "placements", "--gzip", "--output", str(path), stdout=io.StringIO())
+            rows = list(csv.DictReader(io.StringIO(gzip.decompress(path.read_bytes()).decode())))
+        # Les dues flotes de la partida acabada; només la de la CPU s'ha enfonsat
+        self.assertEqual(len(rows), 10)
+        alive = {(row["player"] == str(self.player.id), row["alive"]) for row in rows}
+        self.assertEqual(alive, {(True, "True"), (False, "False")})
+
+    def test_endpoint_requires_admin(self):
+        response = self.client.get("/api/v1/export/games/")
+        self.assertEqual(response.status_code, 403)
+
+    async def test_endpoint_streams_under_asgi(self):
+        admin = await User.objects.acreate_user(username="admin", password="pass", is_staff=True)
+        await self.async_client.aforce_login(admin)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            response = await self.async_client.get("/api/v1/export/shots/?format=ndjson",
+                                                   headers={"Accept-Encoding": "gzip"})
+            self.assertTrue(response.is_async)
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(gzip.decompress(content).splitlines()), 15)
+
+    def test_endpoint_streams_export(self):
+        admin = User.objects.create_superuser(username="admin", password="pass")
+        client = client_for(admin)
+
+        response = client.get("/api/v1/export/games/?format=ndjson&compress=gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn('filename="games.ndjson.gz"', response["Content-Disposition"])
+        games = [json.loads(line) for line in gzip.decompress(b"".join(response.streaming_content)).splitlines()]
+        self.assertEqual([g["id"] for g in games], [self.game.id])
+
+        response = client.get("/api/v1/export/shots/", HTTP_ACCEPT="text/csv")
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        self.assertEqual(b"".join(response.streaming_content).decode().splitlines()[0],
+                         "id,game,player,board,row,col,result,impact")
+
+        self.assertEqual(client.get("/api/v1/export/unknown/").status_code, 404)
@@ -0,0 +1,145 @@
+import base64
+
+from django.contrib.auth.models import User
+
+from battleship.api.models import Game, Player
+
+from .base import APITestCase, client_for
+
+# Consultes fixes del llistat de partides: partides, jugadors, taulers, vaixells i dispars
+# (el catàleg de vaixells es llegeix de la memòria)
+GAME_LIST_QUERIES = 5
+
+
+class GameAPITestCase(APITestCase):
+    def create_games(self, count):
+        # Partides en joc amb un impacte al destructor de la CPU (1, 1), que no passa el torn
+        for _ in range(count):
+            game = self.start_game(self.create_game())
+            self.shoot(game, self.player, 1, 1)
+
+
+class GameListTestCase(GameAPITestCase):
+    def test_list_query_count_is_constant(self):
+        self.create_games(2)
+        with self.assertNumQueries(GAME_LIST_QUERIES):
+            response = self.client.get("/api/v1/games/")
+        self.assertEqual(len(response.data["results"]), 2)
+
+        self.create_games(8)
+        with self.assertNumQueries(GAME_LIST_QUERIES):
+            response = self.client.get("/api/v1/games/")
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_list_extended_status(self):
+        self.create_games(1)
+        status = self.client.get("/api/v1/games/").data["results"][0]["extended_status"]
+        self.assertEqual(status["player"]["board"][1][:3], [2, 2, 0])
+        self.assertEqual(status["player"]["availableShips"], [])
+        self.assertEqual(status["opponent"]["username"], "cpu")
+        self.assertEqual(status["opponent"]["board"][1][:2], [2, -2])
+
+
+class GameSummaryTestCase(GameAPITestCase):
+    def test_cursor_pagination(self):
+        self.create_games(5)
+        response = self.client.get("/api/v1/games/?view=summary&page_size=2")
+        ids = [g["id"] for g in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            ids += [g["id"] for g in response.data["results"]]
+        self.assertEqual(ids, sorted(Game.objects.values_list("id", flat=True), reverse=True))
+
+    def test_summary_skips_boards(self):
+        self.create_games(3)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/games/?view=summary")
+        game = response.data["results"][0]
+        self.assertNotIn("extended_status", game)
+        self.assertEqual(game["owner"], "alice")
+
+    def test_filter_by_player_and_phase(self):
+        self.create_games(2)
+        other = User.objects.create_user(username="bob", password="pass")
+        self.create_game(client=client_for(other))
+
+        mine = self.client.get("/api/v1/games/?view=summary&player=me").data["results"]
+        self.assertEqual({g["owner"] for g in mine}, {"alice"})
+        self.assertEqual(len(mine), 2)
+        bob = Player.objects.get(user=other)
+        self.assertEqual(len(self.client.get(f"/api/v1/games/?view=summary&player={bob.id}").data["results"]), 1)
+        placement = self.client.get("/api/v1/games/?view=summary&phase=placement").data["results"]
+        self.assertEqual([g["owner"] for g in placement], ["bob"])
+
+
+class BoardFormatTestCase(GameAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_games(1)
+        self.game = Game.objects.get()
+        self.matrix = self.client.get(f"/api/v1/games/{self.game.id}/").data["extended_status"]["player"]["board"]
+
+    def test_rle_query_param(self):
+        status = self.client.get(f"/api/v1/games/{self.game.id}/?board_format=rle").data["extended_status"]
+        self.assertEqual(status["boardFormat"], "rle")
+        rows = status["player"]["board"]
+        self.assertEqual(rows[1], [2, 2, 0, 8])
+        self.assertEqual(rows[5], [0, 10])
+        for runs, row in zip(rows, self.matrix):
+            decoded = [value for value, count in zip(runs[::2], runs[1::2]) for _ in range(count)]
+            self.assertEqual(decoded, row)
+
+    def test_base64_accept_header(self):
+        response = self.client.get(
+            f"/api/v1/games/{self.game.id}/", HTTP_ACCEPT="application/json; board_format=base64")
+        data = base64.b64decode(response.data["extended_status"]["player"]["board"])
+        signed = [b - 256 if b > 127 else b for b in data]
+        self.assertEqual(signed, [value for row in self.matrix for value in row])
+
+    def test_unknown_format_rejected(self):
+        response = self.client.get(f"/api/v1/games/{self.game.id}/?board_format=png")
+        self.assertEqual(response.status_code, 400)
+
+
+class GameDeltaTestCase(GameAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.game = self.start_game(self.create_game())
+        self.cpu = self.game.players.exclude(pk=self.player.pk).get()
+
+    def fire(self, row, col):
+        return self.shoot(self.game, self.player, row, col)
+
+    def test_delta_since_cursor(self):
+        self.fire(1, 0)
+        cursor = self.client.get(f"/api/v1/games/{self.game.id}/").data["cursor"]
+        self.fire(1, 1)
+
+        with self.assertNumQueries(4):
+            delta = self.client.get(f"/api/v1/games/{self.game.id}/?since={cursor}").data
+        self.assertNotIn("extended_status", delta)
+        self.assertEqual([(s["row"], s["col"], s["result"]) for s in delta["shots"]], [(1, 1, 1)])
+        self.assertEqual([v["type"] for v in delta["sunk"]], [2])
+        self.assertEqual(delta["phase"], Game.PHASE_PLAYING)
+        self.assertIsNone(delta["winner"])
+        self.assertGreater(delta["cursor"], cursor)
+
+    def test_delta_game_over(self):
+        cursor = self.client.get(f"/api/v1/games/{self.game.id}/").data["cursor"]
+        self.sink_fleet(self.game, self.player)
+        delta = self.client.get(f"/api/v1/games/{self.game.id}/?since={cursor}").data
+        self.assertEqual(len(delta["shots"]), 15)
+        self.assertEqual(len(delta["sunk"]), 5)
+        self.assertEqual(delta["phase"], Game.PHASE_GAMEOVER)
+        self.assertEqual(delta["winner"], self.player.id)
+
+    def test_delta_without_changes(self):
+        cursor = self.client.get(f"/api/v1/games/{self.game.id}/").data["cursor"]
+        delta = self.client.get(f"/api/v1/games/{self.game.id}/?since={cursor}").data
+        self.assertEqual(delta["shots"], [])
+        self.assertEqual(delta["sunk"], [])
+        self.assertEqual(delta["cursor"], cursor)
+        self.assertEqual(delta["prepared"], {str(self.player.id): True, str(self.cpu.id): True})
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(f"/api/v1/games/{self.game.id}/?since=abc").status_code, 400)
@@ -0,0 +1,91 @@
+import json
+import warnings
+
+from rest_framework.test import APIClient
+
+from battleship.api.models import Game, GameEvent
+
+from .base import GameTestCase
+
+
+class GameHistoryTestCase(GameTestCase):
+    def history(self, client=None):
+        response = (client or self.client).get(
+            f"/api/v1/games/{self.game.id}/history/", HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_game_history_in_order(self):
+        # Sense el torn de la CPU dins la petició
+        Game.objects.filter(pk=self.game.pk).update(multiplayer=True)
+        self.start_game(self.game)
+        self.shoot(self.game, self.player, 1, 0)
+        self.shoot(self.game, self.player, 1, 1)
+        self.shoot(self.game, self.player, 5, 5)
+
+        events = self.history()
+        self.assertEqual([e["type"] for e in events], [
+            "created", "joined", "joined", *["placement"] * 10, "phase", "shot", "shot", "sunk", "shot", "turn"])
+        self.assertEqual([e["seq"] for e in events], sorted(e["seq"] for e in events))
+        self.assertEqual(events[0]["owner"], self.player.id)
+        self.assertEqual(events[2]["player"], self.cpu.id)
+        self.assertEqual(events[16]["target"], self.cpu.id)
+        self.assertEqual((events[16]["ri"], events[16]["cf"]), (1, 1))
+        self.assertEqual(events[18]["turn"], self.cpu.id)
+
+    def test_rival_placements_are_hidden_until_game_over(self):
+        self.place(self.game, self.cpu, 2, 0, 0, 0, 1)
+        self.place(self.game, self.player, 2, 3, 3, 3, 4)
+
+        placements = {e["player"]: e for e in self.history() if e["type"] == "placement"}
+        self.assertNotIn("ri", placements[self.cpu.id])
+        self.assertEqual(placements[self.player.id]["ri"], 3)
+
+        Game.objects.filter(pk=self.game.pk).update(phase=Game.PHASE_GAMEOVER)
+        placements = {e["player"]: e for e in self.history() if e["type"] == "placement"}
+        self.assertEqual(placements[self.cpu.id]["ri"], 0)
+
+    def test_bulk_placement_and_game_start(self):
+        response = self.client.post(
+            f"/api/v1/games/{self.game.id}/players/{self.cpu.id}/vessels/bulk/",
+            [{"vessel": 2, "ri": 0, "ci": 0, "rf": 0, "cf": 1}], format="json")
+        self.assertEqual(response.status_code, 201)
+        self.client.post(f"/api/v1/games/{self.game.id}/players/{self.cpu.id}/vessels/auto/")
+        self.client.post(f"/api/v1/games/{self.game.id}/players/{self.player.id}/vessels/auto/")
+
+        types = [e["type"] for e in self.history()]
+        self.assertEqual(types.count("placement"), 10)
+        self.assertEqual(types[-1], "phase")
+
+    def test_game_over(self):
+        self.start_game(self.game)
+        self.sink_fleet(self.game, self.player)
+
+        events = self.history()
+        self.assertEqual([e["type"] for e in events[-2:]], ["sunk", "gameOver"])
+        self.assertEqual(events[-1]["winner"], self.player.id)
+        # Amb la partida acabada, l'historial mostra totes les posicions
+        placements = [e for e in events if e["type"] == "placement" and e["player"] == self.cpu.id]
+        self.assertEqual([e["ri"] for e in placements], [0, 1, 2, 3, 4])
+
+    async def test_streamed_without_buffering_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        with warnings.catch_warnings():
+            # Django avisa quan ha de carregar un iterador síncron sencer per servir-lo en ASGI
+            warnings.simplefilter("error")
+            response = await self.async_client.get(
+                f"/api/v1/games/{self.game.id}/history/", headers={"Accept": "application/x-ndjson"})
+            self.assertTrue(response.is_async)
+            lines = [line async for line in response.streaming_content]
+        self.assertEqual([json.loads(line)["type"] for line in lines], ["created", "joined", "joined"])
+
+    def test_events_are_append_only(self):
+        event = GameEvent.objects.filter(game=self.game).first()
+        event.data = {}
+        with self.assertRaises(ValueError):
+            event.save()
+
+    def test_history_requires_authentication(self):
+        response = APIClient().get(f"/api/v1/games/{self.game.id}/history/")
+        self.assertEqual(response.status_code, 401)
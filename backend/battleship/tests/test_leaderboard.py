@@ -0,0 +1,60 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from battleship.api.models import Game, Player, PlayerStats
+
+from .base import APITestCase
+
+
+class LeaderboardTestCase(APITestCase):
+    def play_game(self):
+        # alice enfonsa tota la flota de la CPU sense fallar cap dispar
+        game = self.start_game(self.create_game())
+        cpu = game.players.exclude(pk=self.player.pk).get()
+        self.sink_fleet(game, self.player)
+        self.assertEqual(game.phase, Game.PHASE_GAMEOVER)
+        return game, cpu
+
+    def stats(self):
+        return {
+            s.player.nickname: (s.games_played, s.games_won, s.shots, s.hits, s.win_rate)
+            for s in PlayerStats.objects.select_related("player")
+        }
+
+    def test_stats_updated_on_game_over(self):
+        self.play_game()
+        self.play_game()
+        self.assertEqual(self.stats(), {"alice": (2, 2, 30, 30, 1.0)})
+
+    def test_rebuild_matches_incremental(self):
+        self.play_game()
+        self.create_game()  # Partida sense acabar
+        incremental = self.stats()
+        PlayerStats.objects.update(games_played=0, games_won=0)
+        call_command("rebuild_leaderboard", stdout=StringIO())
+        self.assertEqual(self.stats(), incremental)
+
+    def test_rebuild_skips_cpu(self):
+        self.play_game()
+        call_command("rebuild_leaderboard", stdout=StringIO())
+        self.assertEqual(set(self.stats()), {"alice"})
+
+    def test_leaderboard_endpoint(self):
+        self.play_game()
+        response = self.client.get("/api/v1/leaderboard/?page_size=1")
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["nickname"], "alice")
+        self.assertIsNone(response.data["next"])
+
+    def test_ties_ordered_by_player(self):
+        players = [Player.objects.get(user=User.objects.create_user(username=name))
+                   for name in ("carol", "bob", "dave")]
+        PlayerStats.objects.bulk_create([PlayerStats(player=p, games_played=2, games_won=1, win_rate=0.5)
+                                         for p in players])
+        expected = sorted(p.id for p in players)
+        for query in ("", "?ordering=-games_won"):
+            pages = [self.client.get(f"/api/v1/leaderboard/{query}", {"page_size": 1, "page": page})
+                     for page in (1, 2, 3)]
+            self.assertEqual([r.data["results"][0]["player"] for r in pages], expected)
@@ -0,0 +1,82 @@
+import tempfile
+
+from django.test import override_settings
+
+from battleship.api import live
+from battleship.api.models import Board, BoardVessel, Game, Shot
+
+from .base import GameTestCase
+
+
+class LiveGameTestCase(GameTestCase):
+    def setUp(self):
+        live.get_cache().clear()
+        super().setUp()
+        for player in (self.player, self.cpu):
+            self.client.post(f"/api/v1/games/{self.game.id}/players/{player.id}/vessels/auto/")
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.phase, Game.PHASE_PLAYING)
+        # Un vaixell que no s'enfonsa amb dos impactes
+        self.target = BoardVessel.objects.filter(
+            board__player=self.cpu, board__game=self.game, vessel__size__gte=3).first()
+
+    def tearDown(self):
+        live.get_cache().clear()
+
+    def fire(self, row, col):
+        # Executa els on_commit perquè la cache s'actualitzi com fora de les proves
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.shoot(self.game, self.player, row, col)
+
+    def test_shot_fills_cache(self):
+        self.assertEqual(self.fire(self.target.ri, self.target.ci).data["result"], 1)
+        state = live.get_cache().get(live.cache_key(self.game.id))
+        board = state.board_of(self.cpu.id)
+        self.assertTrue(board.is_shot(self.target.ri, self.target.ci))
+        self.assertEqual(board.remaining[self.target.id], self.target.vessel.size - 1)
+
+    def test_warm_cache_skips_board_queries(self):
+        self.fire(self.target.ri, self.target.ci)
+        # Partida, jugador, reclamar el torn, validar la cache, dispar, esdeveniment i el savepoint
+        # de la transacció (fora dels tests, BEGIN i COMMIT)
+        with self.assertNumQueries(8):
+            response = self.fire(self.target.rf, self.target.cf)
+        self.assertEqual(response.data["result"], 1)
+
+    def test_stale_cache_is_rebuilt(self):
+        self.fire(self.target.ri, self.target.ci)
+        # Un dispar fet per un altre procés que no ha actualitzat aquesta cache
+        board = Board.objects.get(game=self.game, player=self.cpu)
+        Shot.objects.create(game=self.game, player=self.player, board=board,
+                            row=self.target.rf, col=self.target.cf, result=1, impact=self.target)
+        state = live.get_live_game(self.game)
+        self.assertTrue(state.board_of(self.cpu.id).is_shot(self.target.rf, self.target.cf))
+        self.assertEqual(state.board_of(self.cpu.id).remaining[self.target.id], self.target.vessel.size - 2)
+
+    def test_repeated_shot_rejected_from_cache(self):
+        self.fire(self.target.ri, self.target.ci)
+        # Partida, jugador, reclamar el torn, validar la cache i savepoints: cap escriptura
+        with self.assertNumQueries(7):
+            response = self.fire(self.target.ri, self.target.ci)
+        self.assertEqual(response.status_code, 400)
+
+    def test_retrieve_matches_database_rendering(self):
+        self.fire(self.target.ri, self.target.ci)
+        with self.captureOnCommitCallbacks(execute=True):
+            from_live = self.client.get(f"/api/v1/games/{self.game.id}/").data
+        live.get_cache().clear()
+        from_db = self.client.get(f"/api/v1/games/?phase={Game.PHASE_PLAYING}").data["results"][0]
+        self.assertEqual(from_live["extended_status"], from_db["extended_status"])
+        self.assertEqual(from_live["cursor"], from_db["cursor"])
+
+    def test_file_based_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            caches = {
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+                "live-games": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                               "LOCATION": tmp},
+            }
+            with override_settings(CACHES=caches):
+                self.fire(self.target.ri, self.target.ci)
+                state = live.get_cache().get(live.cache_key(self.game.id))
+                self.assertTrue(state.board_of(self.cpu.id).is_shot(self.target.ri, self.target.ci))
@@ -0,0 +1,200 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from battleship.api import events, matchmaking
+from battleship.api.models import Board, Game, Player
+
+from .base import client_for
+
+
+class InProcessQueueTestCase(SimpleTestCase):
+    def test_pairs_first_waiting_player_of_the_same_size(self):
+        queue = matchmaking.InProcessQueue()
+        self.assertIsNone(queue.pair(1, (10, 10)))
+        self.assertIsNone(queue.pair(2, (12, 12)))
+        self.assertEqual(queue.pair(3, (10, 10)), 1)
+        self.assertIsNone(queue.pair(4, (10, 10)))
+        self.assertEqual(queue.pair(5, (10, 10)), 4)
+        self.assertTrue(queue.is_waiting(2))
+        self.assertFalse(queue.is_waiting(3))
+
+    def test_waiting_again_does_not_pair_with_itself(self):
+        queue = matchmaking.InProcessQueue()
+        queue.pair(1, (10, 10))
+        self.assertIsNone(queue.pair(1, (10, 10)))
+        # Canviar de mida el treu de la cua anterior
+        self.assertIsNone(queue.pair(1, (12, 12)))
+        self.assertIsNone(queue.pair(2, (10, 10)))
+
+    def test_requeue_and_cancel(self):
+        queue = matchmaking.InProcessQueue()
+        queue.pair(1, (10, 10))
+        queue.pair(2, (12, 12))
+        queue.requeue(3, (10, 10))
+        self.assertEqual(queue.pair(4, (10, 10)), 3)
+        self.assertTrue(queue.cancel(1))
+        self.assertFalse(queue.cancel(1))
+        self.assertIsNone(queue.pair(5, (10, 10)))
+
+    @override_settings(BATTLESHIP_MATCHMAKING_TTL=-1)
+    def test_inactive_players_expire(self):
+        queue = matchmaking.InProcessQueue()
+        queue.pair(1, (10, 10))
+        self.assertIsNone(queue.pair(2, (10, 10)))
+        self.assertFalse(queue.is_waiting(1))
+
+    def test_opponent_waits_while_the_game_is_created(self):
+        queue = matchmaking.InProcessQueue()
+        queue.pair(1, (10, 10))
+        self.assertEqual(queue.pair(2, (10, 10)), 1)
+        self.assertTrue(queue.is_waiting(1))
+        queue.set_match(1, 7)
+        self.assertFalse(queue.is_waiting(1))
+        self.assertEqual(queue.pop_match(1), 7)
+        self.assertIsNone(queue.pop_match(1))
+
+    def test_requeue_ends_matching(self):
+        queue = matchmaking.InProcessQueue()
+        queue.pair(1, (10, 10))
+        queue.pair(2, (10, 10))
+        queue.requeue(1, (10, 10))
+        self.assertEqual(queue.pair(3, (10, 10)), 1)
+
+    def test_uncollected_matches_expire(self):
+        queue = matchmaking.InProcessQueue()
+        queue.set_match(1, 7)
+        queue.set_match(2, 8)
+        with self.settings(BATTLESHIP_MATCHMAKING_TTL=-1):
+            self.assertIsNone(queue.pop_match(1))
+            queue.set_match(3, 9)
+        self.assertEqual(list(queue._matches), [])
+
+
+class QueueDeploymentTestCase(SimpleTestCase):
+    @override_settings(BATTLESHIP_WORKERS=2)
+    def test_in_process_queue_needs_single_worker(self):
+        with self.assertRaises(ImproperlyConfigured):
+            matchmaking.check_deployment()
+        with self.settings(BATTLESHIP_MATCHMAKING_QUEUE="battleship.tests.test_matchmaking.SharedQueue",
+                           BATTLESHIP_EVENT_BROKER="battleship.tests.test_matchmaking.SharedBroker"):
+            matchmaking.check_deployment()
+
+    @override_settings(BATTLESHIP_WORKERS=2,
+                       BATTLESHIP_MATCHMAKING_QUEUE="battleship.tests.test_matchmaking.SharedQueue")
+    def test_in_process_broker_needs_single_worker(self):
+        with self.assertRaises(ImproperlyConfigured):
+            matchmaking.check_deployment()
+
+    def test_single_worker(self):
+        matchmaking.check_deployment()
+
+
+class SharedQueue:
+    """Substitut d'una cua compartida: només importa que no sigui la del procés."""
+
+
+class SharedBroker:
+    """Substitut d'un broker compartit."""
+
+
+class MatchmakingTestCase(TestCase):
+    def setUp(self):
+        matchmaking.get_queue.cache_clear()
+        self.alice, self.bob = self.client_for("alice"), self.client_for("bob")
+        self.alice_player = Player.objects.get(user__username="alice")
+        self.bob_player = Player.objects.get(user__username="bob")
+
+    def tearDown(self):
+        matchmaking.get_queue.cache_clear()
+
+    def client_for(self, username):
+        return client_for(User.objects.create_user(username=username, password="pass"))
+
+    def test_pairs_players_in_one_game(self):
+        response = self.alice.post("/api/v1/matchmaking/", {"width": 10, "height": 10}, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "waiting")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.bob.post("/api/v1/matchmaking/", {"width": 10, "height": 10}, format="json")
+        self.assertEqual(response.status_code, 201)
+        game = Game.objects.get(pk=response.data["game"]["id"])
+        self.assertTrue(game.multiplayer)
+        self.assertEqual(game.phase, Game.PHASE_PLACEMENT)
+        self.assertEqual((game.owner, game.turn), (self.alice_player, self.alice_player))
+        self.assertEqual(set(game.players.all()), {self.alice_player, self.bob_player})
+        self.assertEqual(Board.objects.filter(game=game).count(), 2)
+
+        # El jugador que esperava rep la partida en consultar la cua
+        response = self.alice.get("/api/v1/matchmaking/", {"timeout": 0})
+        self.assertEqual(response.data, {"status": "matched", "game": response.data["game"]})
+        self.assertEqual(response.data["game"]["id"], game.id)
+        self.assertEqual(self.alice.get("/api/v1/matchmaking/").data["status"], "idle")
+
+    def test_different_sizes_are_not_paired(self):
+        self.alice.post("/api/v1/matchmaking/", {"width": 10, "height": 10}, format="json")
+        response = self.bob.post("/api/v1/matchmaking/", {"width": 12, "height": 12}, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(Game.objects.exists())
+
+    def test_invalid_size(self):
+        response = self.alice.post("/api/v1/matchmaking/", {"width": 500}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_cancel(self):
+        self.alice.post("/api/v1/matchmaking/", {}, format="json")
+        self.assertEqual(self.alice.post("/api/v1/matchmaking/cancel/").data["status"], "cancelled")
+        self.assertEqual(self.alice.get("/api/v1/matchmaking/", {"timeout": 0}).data["status"], "idle")
+        self.assertEqual(self.bob.post("/api/v1/matchmaking/", {}, format="json").status_code, 202)
+
+    def test_long_poll_wakes_up_when_matched(self):
+        self.alice.post("/api/v1/matchmaking/", {}, format="json")
+        game = Game.objects.create(owner=self.alice_player, multiplayer=True)
+        broker = events.get_broker()
+        channel = matchmaking.player_channel(self.alice_player.id)
+
+        def notify():
+            deadline = time.monotonic() + 5
+            while not broker._subscribers.get(channel) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            broker.publish(channel, {"type": "matched", "game": game.id})
+
+        thread = threading.Thread(target=notify)
+        thread.start()
+        response = self.alice.get("/api/v1/matchmaking/", {"timeout": 10})
+        thread.join()
+        self.assertEqual(response.data["status"], "matched")
+        self.assertEqual(response.data["game"]["id"], game.id)
+
+    def test_long_poll_during_game_creation(self):
+        # El rival ja ha tret alice de la cua però la partida encara no s'ha confirmat
+        self.alice.post("/api/v1/matchmaking/", {}, format="json")
+        queue = matchmaking.get_queue()
+        self.assertEqual(queue.pair(self.bob_player.id, (10, 10)), self.alice_player.id)
+        game = Game.objects.create(owner=self.alice_player, multiplayer=True)
+
+        def confirm():
+            time.sleep(0.2)
+            queue.set_match(self.alice_player.id, game.id)
+
+        thread = threading.Thread(target=confirm)
+        thread.start()
+        response = self.alice.get("/api/v1/matchmaking/", {"timeout": 0.5})
+        thread.join()
+        self.assertEqual(response.data["status"], "matched")
+        self.assertEqual(response.data["game"]["id"], game.id)
+
+    def test_nested_join_checks_capacity(self):
+        response = self.alice.post("/api/v1/games/", {"width": 10, "height": 10, "multiplayer": True}, format="json")
+        game_id = response.data["id"]
+        url = f"/api/v1/games/{game_id}/players/"
+        users = [User.objects.create_user(username=name, password="pass") for name in ("carol", "dave")]
+        Player.objects.filter(user__in=users).delete()
+        self.assertEqual(self.bob.post(url, {"nickname": "carol", "user": users[0].id}).status_code, 201)
+        response = self.bob.post(url, {"nickname": "dave", "user": users[1].id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Game.objects.get(pk=game_id).players.count(), 2)
@@ -0,0 +1,74 @@
+import json
+import os
+import re
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from battleship.api import metrics
+
+from .base import APITestCase
+
+
+def sample(text, name):
+    """Valor d'una mostra (nom amb etiquetes) del text de /metrics."""
+    match = re.search(rf"^{re.escape(name)} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+class MetricsTestCase(APITestCase):
+    def scrape(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return response.content.decode()
+
+    def test_game_counters(self):
+        before = self.scrape()
+        game = self.start_game(self.create_game())
+        self.sink_fleet(game, self.player)
+        after = self.scrape()
+
+        def delta(name):
+            return sample(after, name) - sample(before, name)
+
+        self.assertEqual(delta("battleship_games_created_total"), 1)
+        self.assertEqual(delta("battleship_shots_total"), 15)
+        self.assertEqual(delta("battleship_hits_total"), 15)
+        self.assertEqual(delta("battleship_games_finished_total"), 1)
+        self.assertEqual(delta('battleship_phase_transitions_total{phase="gameOver"}'), 1)
+        self.assertEqual(delta('battleship_request_duration_seconds_count'
+                               '{route="ShotViewSet.create",method="POST"}'), 15)
+        self.assertGreater(delta('battleship_db_queries_total{route="ShotViewSet.create"}'), 0)
+
+    def test_histogram_buckets_are_cumulative(self):
+        self.client.get("/api/v1/vessels/")
+        text = self.scrape()
+        labels = 'route="VesselViewSet.list",method="GET"'
+        buckets = [float(v) for v in re.findall(
+            rf'^battleship_request_duration_seconds_bucket{{{labels},le="[^"]+"}} (\S+)$', text, re.M)]
+        self.assertEqual(len(buckets), len(metrics.BUCKETS) + 1)
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertEqual(buckets[-1], sample(text, f"battleship_request_duration_seconds_count{{{labels}}}"))
+
+    @override_settings(BATTLESHIP_METRICS_ALLOWED_IPS=["10.0.0.5"])
+    def test_protected(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.0.0.5").status_code, 200)
+        self.client.force_login(User.objects.create_user(username="ops", password="pass", is_staff=True))
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def test_metric_types_implement_samples(self):
+        with self.assertRaises(TypeError):
+            metrics.Metric("battleship_test_total", "Prova.")
+
+    def test_multiprocess_aggregation(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(BATTLESHIP_METRICS_DIR=tmp):
+            # Valors desats per un altre worker
+            with open(os.path.join(tmp, "1.json"), "w") as f:
+                json.dump({"battleship_shots_total": {"[]": 1000}}, f)
+            own = metrics.snapshot()["battleship_shots_total"].get("[]", 0)
+            text = self.scrape()
+            self.assertTrue(os.path.exists(os.path.join(tmp, f"{os.getpid()}.json")))
+        self.assertEqual(sample(text, "battleship_shots_total"), own + 1000)
@@ -0,0 +1,137 @@
+import random
+
+from django.test import SimpleTestCase
+
+from battleship.api.models import Game, Board, BoardVessel
+from battleship.api.occupancy import OccupancyIndex, vessel_cells
+from battleship.api.placement import placement_error, random_fleet
+
+from .base import GameTestCase
+
+FLEET = [
+    {"vessel": 1, "ri": 0, "ci": 0, "rf": 0, "cf": 0},
+    {"vessel": 2, "ri": 2, "ci": 0, "rf": 2, "cf": 1},
+    {"vessel": 3, "ri": 4, "ci": 0, "rf": 4, "cf": 2},
+    {"vessel": 4, "ri": 6, "ci": 0, "rf": 9, "cf": 0},
+    {"vessel": 5, "ri": 5, "ci": 5, "rf": 9, "cf": 5},
+]
+
+
+class BulkPlacementTestCase(GameTestCase):
+    def place_bulk(self, player, fleet):
+        return self.client.post(
+            f"/api/v1/games/{self.game.id}/players/{player.id}/vessels/bulk/", fleet, format="json")
+
+    def test_bulk_places_fleet_and_starts_game(self):
+        response = self.place_bulk(self.player, FLEET)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 5)
+        board = Board.objects.get(game=self.game, player=self.player)
+        self.assertTrue(board.prepared)
+        self.assertEqual(len(OccupancyIndex.for_board(board).cells), 15)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.phase, Game.PHASE_PLACEMENT)
+
+        self.place_bulk(self.cpu, {"vessels": FLEET})
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.phase, Game.PHASE_PLAYING)
+
+    def test_bulk_rejects_whole_fleet_on_error(self):
+        fleet = FLEET[:4] + [{"vessel": 5, "ri": 6, "ci": 0, "rf": 6, "cf": 4}]  # Solapa amb el submarí
+        response = self.place_bulk(self.player, fleet)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[:4], [{}, {}, {}, {}])
+        self.assertFalse(BoardVessel.objects.exists())
+
+    def test_bulk_validates_bounds_size_and_duplicates(self):
+        fleet = [
+            {"vessel": 3, "ri": 0, "ci": 8, "rf": 0, "cf": 10},
+            {"vessel": 2, "ri": 0, "ci": 0, "rf": 0, "cf": 2},
+            {"vessel": 1, "ri": 5, "ci": 5, "rf": 5, "cf": 5},
+            {"vessel": 1, "ri": 7, "ci": 7, "rf": 7, "cf": 7},
+            {"vessel": 99, "ri": 9, "ci": 9, "rf": 9, "cf": 9},
+        ]
+        errors = self.place_bulk(self.player, fleet).data
+        self.assertTrue(errors[0] and errors[1] and errors[3] and errors[4])
+        self.assertEqual(errors[2], {})
+
+    def test_bulk_query_count(self):
+        with self.assertNumQueries(9):
+            self.place_bulk(self.player, FLEET)
+
+
+class RandomFleetTestCase(SimpleTestCase):
+    def assertValidFleet(self, width, height, sizes, fleet, occupied=()):
+        cells = set(occupied)
+        for size, (ri, ci, rf, cf) in zip(sizes, fleet):
+            index = OccupancyIndex(dict.fromkeys(cells, 0))
+            self.assertIsNone(placement_error(width, height, size, ri, ci, rf, cf, index))
+            cells.update(vessel_cells(ri, ci, rf, cf))
+
+    def test_fleet_is_valid(self):
+        rng = random.Random(3)
+        for width, height in ((5, 5), (10, 10), (7, 30), (200, 200)):
+            fleet = random_fleet(width, height, [1, 2, 3, 4, 5], rng=rng)
+            self.assertValidFleet(width, height, [1, 2, 3, 4, 5], fleet)
+
+    def test_dense_board(self):
+        # 5x5 amb 20 de 25 cel·les ocupades
+        sizes = [5, 5, 4, 3, 2, 1]
+        fleet = random_fleet(5, 5, sizes, rng=random.Random(0))
+        self.assertValidFleet(5, 5, sizes, fleet)
+
+    def test_respects_occupied_cells(self):
+        occupied = [(r, 0) for r in range(5)]
+        fleet = random_fleet(5, 5, [4, 4, 4, 4], occupied=occupied, rng=random.Random(0))
+        self.assertValidFleet(5, 5, [4, 4, 4, 4], fleet, occupied)
+
+    def test_impossible_fleet(self):
+        with self.assertRaises(ValueError):
+            random_fleet(5, 5, [6])
+        with self.assertRaises(ValueError):
+            random_fleet(5, 5, [5] * 6)
+
+
+class PlacementValidationTestCase(GameTestCase):
+    def test_single_placement_validated(self):
+        self.assertEqual(self.place(self.game, self.player, 3, 0, 8, 0, 10).status_code, 400)
+        self.assertEqual(self.place(self.game, self.player, 3, 0, 0, 0, 1).status_code, 400)
+        self.assertEqual(self.place(self.game, self.player, 3, 0, 0, 2, 2).status_code, 400)
+        self.assertEqual(self.place(self.game, self.player, 3, 0, 0, 0, 2).status_code, 201)
+
+    def test_reversed_coordinates_rejected(self):
+        self.assertEqual(self.place(self.game, self.player, 3, 0, 2, 0, 0).status_code, 400)
+        self.assertEqual(self.place(self.game, self.player, 3, 2, 0, 0, 0).status_code, 400)
+        response = self.client.post(f"/api/v1/games/{self.game.id}/players/{self.player.id}/vessels/bulk/",
+                                    [{"vessel": 3, "ri": 0, "ci": 2, "rf": 0, "cf": 0}], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(BoardVessel.objects.filter(board__game=self.game).exists())
+
+    def test_vessel_type_placed_once(self):
+        self.assertEqual(self.place(self.game, self.player, 3, 0, 0, 0, 2).status_code, 201)
+        self.assertEqual(self.place(self.game, self.player, 3, 5, 0, 5, 2).status_code, 400)
+        self.assertEqual(BoardVessel.objects.filter(board__game=self.game, vessel_id=3).count(), 1)
+
+    def test_update_ignores_own_cells(self):
+        vessel_id = self.place(self.game, self.player, 3, 0, 0, 0, 2).data["id"]
+        response = self.client.patch(
+            f"/api/v1/games/{self.game.id}/players/{self.player.id}/vessels/{vessel_id}/",
+            {"ci": 1, "cf": 3}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_vessels_saved_outside_the_api_are_validated(self):
+        # L'índex surt sempre de BoardVessel, també per als vaixells desats directament
+        board = Board.objects.get(game=self.game, player=self.player)
+        bv = BoardVessel.objects.create(board=board, vessel_id=3, ri=0, ci=0, rf=0, cf=2)
+        self.assertEqual(self.place(self.game, self.player, 2, 0, 1, 1, 1).status_code, 400)
+        bv.delete()
+        self.assertEqual(self.place(self.game, self.player, 2, 0, 1, 1, 1).status_code, 201)
+
+    def test_auto_places_remaining_fleet(self):
+        self.place(self.game, self.player, 5, 0, 0, 0, 4)
+        response = self.client.post(f"/api/v1/games/{self.game.id}/players/{self.player.id}/vessels/auto/")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sorted(v["vessel"] for v in response.data), [1, 2, 3, 4])
+        board = Board.objects.get(game=self.game, player=self.player)
+        self.assertTrue(board.prepared)
+        self.assertEqual(len(OccupancyIndex.for_board(board).cells), 15)
@@ -0,0 +1,39 @@
+import json
+import os
+import tempfile
+
+from django.test import override_settings
+
+from .base import APITestCase
+
+
+@override_settings(BATTLESHIP_SERVER_TIMING=True)
+class PerformanceMiddlewareTestCase(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.game = self.create_game()
+
+    def test_server_timing_header(self):
+        response = self.client.get(f"/api/v1/games/{self.game.id}/")
+        timings = dict(part.strip().split(";", 1) for part in response["Server-Timing"].split(","))
+        self.assertEqual(set(timings), {"app", "db", "serialize"})
+        self.assertIn('queries"', timings["db"])
+
+    def test_structured_log(self):
+        with self.assertLogs("battleship.performance", level="INFO") as logs:
+            self.client.get(f"/api/v1/games/{self.game.id}/")
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["view"], "GameViewSet.retrieve")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["db_queries"], 0)
+        self.assertGreater(record["serializer_ms"], 0)
+
+    def test_slow_requests_are_profiled(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.settings(BATTLESHIP_PROFILE_SAMPLE_RATE=1.0, BATTLESHIP_PROFILE_SLOW_MS=0,
+                               BATTLESHIP_PROFILE_DIR=tmp):
+                self.client.get(f"/api/v1/games/{self.game.id}/")
+            files = os.listdir(tmp)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].endswith(".prof"))
+        self.assertIn("GameViewSet.retrieve", files[0])
@@ -0,0 +1,121 @@
+"""
+Pressupost de consultes per endpoint.
+
+Cada endpoint té un nombre màxim de consultes i, a SQLite, es comprova el pla
+(``EXPLAIN QUERY PLAN``) de cada SELECT: falla si alguna taula es recorre sencera
+(``SCAN``) sense estar a la llista de recorreguts permesos de l'endpoint. Als altres
+motors només es comprova el nombre de consultes, perquè amb taules de prova tan petites
+el planificador pot triar un recorregut seqüencial encara que hi hagi índex.
+"""
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from battleship.api.models import Game
+
+from .base import GameTestCase
+
+
+def explain(sql):
+    """Retorna les línies del pla de consulta de SQLite per a ``sql``."""
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def scanned_tables(plan):
+    return {line.split()[1] for line in plan if line.startswith("SCAN ")}
+
+
+class QueryBudgetMixin:
+    @contextmanager
+    def assertQueryBudget(self, budget, allowed_scans=()):
+        """
+        Comprova que el bloc fa com a molt ``budget`` consultes i que cap SELECT recorre
+        sencera una taula fora d'``allowed_scans``.
+        """
+        with CaptureQueriesContext(connection) as context:
+            yield
+        queries = [query["sql"] for query in context.captured_queries]
+        report = "\n".join(queries)
+        self.assertLessEqual(len(queries), budget, f"{len(queries)} consultes (màxim {budget}):\n{report}")
+
+        if connection.vendor != "sqlite":
+            return
+        for sql in queries:
+            if not sql.startswith("SELECT"):
+                continue
+            plan = explain(sql)
+            scans = scanned_tables(plan) - set(allowed_scans)
+            self.assertFalse(scans, f"Recorregut complet de {', '.join(sorted(scans))}:\n{sql}\n{plan}")
+
+
+class EndpointQueryBudgetTestCase(QueryBudgetMixin, GameTestCase):
+    def setUp(self):
+        super().setUp()
+        self.start_game(self.game)
+        self.player_url = f"/api/v1/games/{self.game.id}/players/{self.player.id}"
+
+    def test_games_list(self):
+        # El llistat paginat recorre les partides per id amb LIMIT
+        with self.assertQueryBudget(5, allowed_scans={"api_game"}):
+            self.client.get("/api/v1/games/")
+
+    def test_games_summary(self):
+        with self.assertQueryBudget(1, allowed_scans={"api_game"}):
+            self.client.get("/api/v1/games/?view=summary")
+
+    def test_game_detail(self):
+        # Versió de la partida i, sense instantània a la cache, la partida sencera
+        with self.assertQueryBudget(6):
+            self.client.get(f"/api/v1/games/{self.game.id}/")
+
+    def test_game_not_modified(self):
+        etag = self.client.get(f"/api/v1/games/{self.game.id}/")["ETag"]
+        with self.assertQueryBudget(1):
+            response = self.client.get(f"/api/v1/games/{self.game.id}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_game_delta(self):
+        with self.assertQueryBudget(4):
+            self.client.get(f"/api/v1/games/{self.game.id}/?since=0")
+
+    def test_game_players(self):
+        with self.assertQueryBudget(1):
+            self.client.get(f"/api/v1/games/{self.game.id}/players/")
+
+    def test_vessels(self):
+        with self.assertQueryBudget(0):
+            self.client.get("/api/v1/vessels/")
+
+    def test_board_vessels(self):
+        with self.assertQueryBudget(1):
+            self.client.get(f"/api/v1/games/{self.game.id}/players/{self.cpu.id}/vessels/")
+
+    def test_boards(self):
+        with self.assertQueryBudget(1):
+            self.client.get(f"{self.player_url}/boards/")
+
+    def test_shots_list(self):
+        with self.assertQueryBudget(1):
+            self.client.get(f"{self.player_url}/shots/")
+
+    def test_shot_miss(self):
+        # Partida, jugador, reclamar el torn, estat de la partida (cache freda: taulers, vaixells
+        # i dispars), dispar, canvi de torn, esdeveniment i el savepoint de la transacció. Amb la
+        # cache calenta, veure test_live. En multijugador la CPU no juga dins la petició.
+        Game.objects.filter(pk=self.game.pk).update(multiplayer=True)
+        with self.assertQueryBudget(11):
+            response = self.client.post(f"{self.player_url}/shots/", {"row": 5, "col": 5}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_shot_hit(self):
+        with self.assertQueryBudget(10):
+            response = self.client.post(f"{self.player_url}/shots/", {"row": 1, "col": 0}, format="json")
+        self.assertEqual(response.data["result"], 1)
+
+    def test_leaderboard(self):
+        # El recompte de la paginació recorre l'índex de la classificació
+        with self.assertQueryBudget(2, allowed_scans={"api_playerstats"}):
+            self.client.get("/api/v1/leaderboard/")
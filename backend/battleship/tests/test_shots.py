@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from battleship.api import live, shots
+from battleship.api.models import Game, Board, BoardVessel, PlayerStats, Shot
+from battleship.api.rules import BoardState
+
+from .base import GameTestCase
+
+
+class ShotTestCase(GameTestCase):
+    def setUp(self):
+        super().setUp()
+        # Flota completa als dos taulers (veure base.fleet): el destructor de la CPU és a (1, 0)-(1, 1)
+        self.start_game(self.game)
+        self.assertEqual(self.game.phase, Game.PHASE_PLAYING)
+        self.board_vessel = BoardVessel.objects.get(board__game=self.game, board__player=self.cpu, vessel_id=2)
+
+    def fire(self, row, col, player=None):
+        return self.shoot(self.game, player or self.player, row, col)
+
+    def without_cpu_turn(self):
+        # En una partida multijugador la CPU no juga el seu torn dins la petició
+        Game.objects.filter(pk=self.game.pk).update(multiplayer=True)
+
+    def test_shots_use_placement_index(self):
+        board = live.get_live_game(self.game).board_of(self.cpu.id)
+        self.assertEqual(board.vessel_at(1, 0), self.board_vessel.id)
+        self.assertEqual(len(board.occupancy.cells), 15)
+
+    def test_overlapping_placement_rejected(self):
+        game = self.create_game()
+        cpu = game.players.exclude(pk=self.player.pk).get()
+        self.place(game, cpu, 2, 0, 0, 0, 1)
+        self.assertEqual(self.place(game, cpu, 3, 0, 1, 2, 1).status_code, 400)
+
+    def test_shot_before_game_starts_rejected(self):
+        # Sense la flota completa la partida no comença: cap dispar no la pot acabar
+        game = self.create_game()
+        cpu = game.players.exclude(pk=self.player.pk).get()
+        self.place(game, cpu, 2, 0, 0, 0, 1)
+        for col in (0, 1, 2):
+            self.assertEqual(self.shoot(game, self.player, 0, col).status_code, 400)
+        game.refresh_from_db()
+        self.assertEqual(game.phase, Game.PHASE_PLACEMENT)
+        self.assertIsNone(game.winner)
+        self.assertFalse(Shot.objects.filter(game=game).exists())
+        self.assertFalse(PlayerStats.objects.filter(games_won__gt=0).exists())
+
+    def test_empty_board_is_not_destroyed(self):
+        self.assertFalse(BoardState(1, 1, False, [], []).fleet_destroyed())
+
+    def test_miss_changes_turn(self):
+        self.without_cpu_turn()
+        response = self.fire(5, 5)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["result"], 0)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.turn, self.cpu)
+
+    def test_sinking_last_vessel_ends_game(self):
+        self.assertEqual(self.fire(1, 0).data["result"], 1)
+        self.assertEqual(self.sink_fleet(self.game, self.player).status_code, 201)
+        self.board_vessel.refresh_from_db()
+        self.assertFalse(self.board_vessel.alive)
+        self.assertEqual(self.game.phase, Game.PHASE_GAMEOVER)
+        self.assertEqual(self.game.winner, self.player)
+
+    def test_repeated_shot_rejected(self):
+        self.fire(1, 0)
+        self.assertEqual(self.fire(1, 0).status_code, 400)
+        self.assertEqual(Shot.objects.filter(player=self.player, row=1, col=0).count(), 1)
+
+    def test_index_rebuilt_after_vessel_moved(self):
+        self.without_cpu_turn()
+        self.board_vessel.ri, self.board_vessel.rf = 6, 6
+        self.board_vessel.save()
+        self.assertEqual(self.fire(1, 0).data["result"], 0)
+        self.game.turn = self.player
+        self.game.save()
+        self.assertEqual(self.fire(6, 0).data["result"], 1)
+
+    def test_shot_out_of_turn_rejected(self):
+        self.game.turn = self.cpu
+        self.game.save()
+        self.assertEqual(self.fire(5, 5).status_code, 400)
+        self.assertFalse(Shot.objects.filter(game=self.game).exists())
+
+    def test_shot_after_game_over_rejected(self):
+        self.sink_fleet(self.game, self.player)
+        self.assertEqual(self.fire(5, 5).status_code, 400)
+
+    def test_duplicate_shot_rejected_by_database(self):
+        self.fire(1, 0)
+        board = Board.objects.get(game=self.game, player=self.cpu)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Shot.objects.create(game=self.game, player=self.player, board=board, row=1, col=0, result=1)
+
+    def test_concurrent_shot_loses_turn_claim(self):
+        # Dos dispars alhora: tots dos han llegit la partida amb el torn del jugador, però el
+        # primer falla i passa el torn abans que el segon el reclami
+        self.without_cpu_turn()
+        stale_game = Game.objects.get(pk=self.game.pk)
+        self.assertEqual(self.fire(5, 5).data["result"], 0)
+        with self.assertRaisesMessage(ValidationError, "No és el teu torn."):
+            shots.fire(stale_game, self.player, 6, 6)
+        self.assertEqual(Shot.objects.filter(game=self.game).count(), 1)
+
+    def test_concurrent_duplicate_shot_hits_unique_constraint(self):
+        # Dos dispars alhora a la mateixa cel·la: el segon ha llegit l'estat abans que el
+        # primer es desés, i només l'atura la restricció única
+        stale_state = live.get_live_game(self.game)
+        self.assertEqual(self.fire(1, 0).data["result"], 1)
+        self.game.refresh_from_db()
+        with mock.patch.object(live, "get_live_game", return_value=stale_state), \
+                self.assertRaisesMessage(ValidationError, "Ja s'ha disparat a aquesta cel·la."):
+            shots.fire(self.game, self.player, 1, 0)
+        self.assertEqual(Shot.objects.filter(game=self.game).count(), 1)
+        # El dispar rebutjat s'ha desfet sencer i la partida continua
+        self.assertEqual(self.fire(1, 1).data["result"], 1)
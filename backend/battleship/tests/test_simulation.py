@@ -0,0 +1,60 @@
+import csv
+import os
+import random
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from battleship.api.simulation import play_game, random_board, simulate_chunk
+
+SIZES = [1, 2, 3, 4, 5]
+
+
+class SimulationTestCase(SimpleTestCase):
+    def test_random_board_places_whole_fleet(self):
+        board = random_board(10, 10, SIZES, random.Random(1))
+        self.assertEqual(len(board.occupancy.cells), sum(SIZES))
+        self.assertFalse(board.fleet_destroyed())
+
+    def test_game_ends_when_fleet_destroyed(self):
+        winner, shots = play_game(10, 10, SIZES, ("density", "random"), random.Random(1))
+        self.assertIn(winner, (0, 1))
+        self.assertGreaterEqual(shots, sum(SIZES))
+        self.assertLessEqual(shots, 100)
+
+    def test_chunk_is_reproducible(self):
+        task = (8, 8, SIZES, ("density", "random"), "seed", 0, 10)
+        stats = simulate_chunk(task)
+        self.assertEqual(stats, simulate_chunk(task))
+        self.assertEqual(stats["density"]["games"], 10)
+        self.assertEqual(stats["density"]["wins"] + stats["random"]["wins"], 10)
+
+    def test_same_strategy_counts_per_seat(self):
+        stats = simulate_chunk((8, 8, SIZES, ("density", "density"), "seed", 0, 10))
+        self.assertEqual(stats["density"]["games"], 20)
+        self.assertEqual(stats["density"]["wins"], 10)
+
+
+class SimulateCommandTestCase(TestCase):
+    def run_command(self, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "summary.csv")
+            distribution = os.path.join(tmp, "distribution.csv")
+            call_command("simulate", output=output, distribution=distribution, stdout=StringIO(), **options)
+            with open(output) as f:
+                summary = {row["strategy"]: row for row in csv.DictReader(f)}
+            with open(distribution) as f:
+                wins = sum(int(row["wins"]) for row in csv.DictReader(f))
+        return summary, wins
+
+    def test_summary_and_distribution(self):
+        summary, wins = self.run_command(games=20, processes=1, chunk_size=7, width=8, height=8)
+        self.assertEqual(set(summary), {"density", "random"})
+        self.assertEqual(int(summary["density"]["games"]), 20)
+        self.assertEqual(wins, 20)
+
+    def test_process_pool_matches_serial_run(self):
+        options = dict(games=12, chunk_size=4, width=8, height=8, sizes=[2, 3])
+        self.assertEqual(self.run_command(processes=2, **options), self.run_command(processes=1, **options))
@@ -0,0 +1,82 @@
+from django.contrib.auth.models import User
+
+from battleship.api import snapshots
+from battleship.api.models import Board, Game
+
+from .base import GameTestCase, client_for
+
+
+class GameSnapshotTestCase(GameTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f"/api/v1/games/{self.game.id}/"
+
+    def version(self):
+        return Game.objects.get(pk=self.game.pk).version
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('"') and not etag.startswith("W/"))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_changes_bump_version(self):
+        versions = [self.version()]
+        self.client.patch(self.url, {"width": 12}, format="json")
+        versions.append(self.version())
+        self.place_fleet(self.game, self.player)
+        versions.append(self.version())
+        self.place_fleet(self.game, self.cpu)  # Comença la partida
+        versions.append(self.version())
+        self.shoot(self.game, self.player, 5, 5)
+        versions.append(self.version())
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_board_update_bumps_version(self):
+        etag = self.client.get(self.url)["ETag"]
+        board = Board.objects.get(game=self.game, player=self.player)
+        response = self.client.patch(f"/api/v1/games/{self.game.id}/players/{self.player.id}/boards/{board.id}/",
+                                     {"prepared": True}, format="json")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_failed_shot_keeps_version(self):
+        version = self.version()
+        self.shoot(self.game, self.cpu, 5, 5)  # No és el torn de la CPU
+        self.assertEqual(self.version(), version)
+
+    def test_stale_etag_gets_new_state(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.place(self.game, self.player, 2, 3, 3, 3, 4)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["extended_status"]["player"]["placedShips"]), 1)
+
+    def test_snapshot_is_shared(self):
+        first = self.client.get(self.url).data
+        other = client_for(User.objects.create_user(username="bob", password="pass"))
+        # Partida i versió; la serialització surt de la cache
+        with self.assertNumQueries(1):
+            second = other.get(self.url).data
+        self.assertEqual(first, second)
+
+    def test_etag_depends_on_board_format(self):
+        matrix = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, {"board_format": "rle"}, HTTP_IF_NONE_MATCH=matrix)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["extended_status"]["boardFormat"], "rle")
+
+    def test_new_game_does_not_reuse_snapshot(self):
+        self.client.get(self.url)
+        Game.objects.create(owner=self.player)
+        self.assertIsNone(snapshots.get_cache().get(snapshots.cache_key(self.game.id + 1)))
+        self.game.delete()
+        self.assertIsNone(snapshots.get_cache().get(snapshots.cache_key(self.game.id)))
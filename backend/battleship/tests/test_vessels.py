@@ -0,0 +1,37 @@
+from django.test import override_settings
+from django.utils import timezone
+
+from battleship.api import catalog
+from battleship.api.models import Vessel
+
+from .base import APITestCase
+
+
+class VesselCatalogTestCase(APITestCase):
+    def tearDown(self):
+        # Els canvis al catàleg es desfan amb la transacció del test: cal descartar la còpia en memòria
+        catalog.invalidate()
+
+    def test_default_catalog_seeded(self):
+        response = self.client.get("/api/v1/vessels/")
+        self.assertEqual([(v["id"], v["size"]) for v in response.data], [(i, i) for i in range(1, 6)])
+
+    def test_list_served_from_memory(self):
+        self.client.get("/api/v1/vessels/")
+        with self.assertNumQueries(0):
+            self.client.get("/api/v1/vessels/")
+
+    def test_invalidated_on_save_and_delete(self):
+        self.client.get("/api/v1/vessels/")
+        Vessel.objects.create(id=6, size=3, name="Frigate")
+        self.assertEqual(catalog.get_vessel(6).size, 3)
+        Vessel.objects.filter(pk=6).get().delete()
+        self.assertIsNone(catalog.get_vessel(6))
+
+    def test_reloaded_when_changed_by_another_process(self):
+        catalog.get_vessels()
+        # Un altre procés no passa pels senyals d'aquest: només canvia la BD
+        Vessel.objects.filter(pk=1).update(size=9, updated_at=timezone.now())
+        self.assertEqual(catalog.get_vessel(1).size, 1)
+        with override_settings(BATTLESHIP_CATALOG_CHECK_INTERVAL=0):
+            self.assertEqual(catalog.get_vessel(1).size, 9)
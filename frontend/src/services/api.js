@@ -28,6 +28,15 @@ export default {
   return axiosInstance.get(`/api/v1/games/${gameId}/`);
   },
 
+  /**
+   * Recupera només els canvis d’una partida des d’un cursor (GET /api/v1/games/{gameId}/?since={cursor}).
+   * - 'cursor' és el camp `cursor` de l’última resposta (id de l’últim dispar vist).
+   * Retorna { phase, turn, winner, cursor, shots, sunk, prepared } sense els taulers complets.
+   */
+  getGameChanges(gameId, cursor) {
+    return axiosInstance.get(`/api/v1/games/${gameId}/`, { params: { since: cursor } });
+  },
+
   /**
    * Obté informació d’un usuari pel seu ID (GET /api/v1/user/{id}).
    * - Retorna camps de User (username, email, etc.).
@@ -55,6 +64,15 @@ export default {
     return axiosInstance.post(`/api/v1/games/${gameId}/players/${playerId}/vessels/`, vesselData);
   },
 
+  /**
+   * Col·loca aleatòriament al backend els vaixells que encara no té el jugador
+   * (POST /api/v1/games/{gameId}/players/{playerId}/vessels/auto/).
+   * Retorna la llista de vaixells col·locats amb { ri, ci, rf, cf, vessel }.
+   */
+  autoPlaceVessels(gameId, playerId) {
+    return axiosInstance.post(`/api/v1/games/${gameId}/players/${playerId}/vessels/auto/`);
+  },
+
   /**
    * Envia un dispar al backend (POST /api/v1/games/{gameId}/players/{playerId}/shots/).
    * - 'payload' conté { row, col }.
@@ -66,12 +84,30 @@ export default {
   },
 
   /**
-   * Recupera la llista de totes les partides (GET /api/v1/games/).
-   * - Retorna un array de Game amb informació bàsica (id, owner, phase, turn, winner).
-   * Útil per a “Reanudar Partida” i per al Leaderboard.
+   * Recupera una pàgina de la llista de partides (GET /api/v1/games/).
+   * - 'params' admet { view: "summary", player: "me" | id, phase, page_size, cursor }.
+   * - Amb view=summary retorna només informació bàsica (id, owner, phase, turn, winner).
+   * La resposta és { next, previous, results }; 'next' és la URL de la pàgina següent.
+   * Útil per a “Reanudar Partida”.
+   */
+  getAllGames(params = {}) {
+    return axiosInstance.get(`/api/v1/games/`, { params });
+  },
+
+  /**
+   * Recupera la pàgina següent d’una llista a partir de l’enllaç 'next' d’una resposta anterior.
+   */
+  getPage(url) {
+    return axiosInstance.get(url);
+  },
+
+  /**
+   * Recupera la classificació de jugadors (GET /api/v1/leaderboard/).
+   * - 'params' admet { ordering, page, page_size }; per defecte ordena per percentatge de victòries.
+   * Retorna { count, next, previous, results } amb { nickname, games_played, games_won, win_rate, ... }.
    */
-  getAllGames() {
-    return axiosInstance.get(`/api/v1/games/`);
+  getLeaderboard(params = {}) {
+    return axiosInstance.get(`/api/v1/leaderboard/`, { params });
   },
 
   /**
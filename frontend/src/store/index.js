@@ -61,7 +61,8 @@ export const useGameStore = defineStore("game", {
      * - Extrae 'extended_status' para jugador (player) y CPU (opponent).
      * - Actualiza state: playerBoard, opponentBoard, playerPlacedShips, opponentShips.
      * - Si fase = "gameOver", muestra el ganador.
-     * - Si fase != "playing" y el jugador actual ya está preparado, hace polling con setTimeout().
+     * - Si fase != "playing" y el jugador actual ya está preparado, hace polling de los cambios
+     *   con pollGameChanges().
      */
     async getGameState(gameId) {
       try {
@@ -102,7 +103,7 @@ export const useGameStore = defineStore("game", {
 
         if (this.gamePhase !== "playing" && isPrepared) {
           console.log("⏳ Esperando que el oponente esté listo...");
-          setTimeout(() => this.getGameState(this.currentGameId), 1000);
+          setTimeout(() => this.pollGameChanges(gameId, gameData.cursor), 1000);
         }
 
         console.log("📊 Estado actual del juego:");
@@ -129,6 +130,27 @@ export const useGameStore = defineStore("game", {
       }
     },
 
+    /**
+     * Mentre l'oponent col·loca els vaixells, consulta cada segon només els canvis de la partida
+     * des de 'cursor' (api.getGameChanges(), sense els taulers complets).
+     * - Quan la fase canvia, recarrega l'estat complet amb getGameState().
+     * - Si l'usuari ha canviat de partida, deixa de consultar.
+     */
+    async pollGameChanges(gameId, cursor) {
+      if (gameId !== this.currentGameId) return;
+      try {
+        const response = await api.getGameChanges(gameId, cursor);
+        if (response.data.phase !== this.gamePhase) {
+          await this.getGameState(gameId);
+          return;
+        }
+        setTimeout(() => this.pollGameChanges(gameId, response.data.cursor), 1000);
+      } catch (error) {
+        const message = error.response?.data?.detail || error.message;
+        console.error("Error al consultar los cambios de la partida:", message);
+      }
+    },
+
     /**
      * Crea un tablero vacío 10×10 inicializado a 0.
      * Se usa en startNewGame() para inicializar playerBoard y opponentBoard.
@@ -194,12 +216,12 @@ export const useGameStore = defineStore("game", {
     },
 
     /**
-     * Col·loca aleatòriament els vaixells del CPU i desa cada posició en el backend amb placeVessel().
+     * Col·loca els vaixells del CPU demanant al backend una flota aleatòria vàlida (autoPlaceVessels()).
      * - Recupera jugador CPU de playersInGame (nickname === "cpu").
-     * - Genera coordenades aleatòries fins a trobar una posició vàlida (usant isValidPlacement).
+     * - Dibuixa al tauler local els vaixells que retorna el backend.
      */
     async placeOpponentShips() {
-      console.log("⛴️ Colocando barcos del bot y guardando en el backend...");
+      console.log("⛴️ Colocando barcos del bot en el backend...");
       const cpuPlayer = this.playersInGame.find(p => p.nickname === "cpu");
       if (!cpuPlayer) {
         console.warn("No se encontró el jugador CPU.");
@@ -207,38 +229,15 @@ export const useGameStore = defineStore("game", {
       }
       console.log("Se encontró el jugador CPU:", cpuPlayer);
 
-      const shipList = [1, 2, 3, 4, 5];
-
-      for (let type of shipList) {
-        const ship = this.availableShips.find((s) => s.type === type);
-        if (!ship) continue;
-
-        let placed = false;
-        while (!placed) {
-          const row = Math.floor(Math.random() * 10);
-          const col = Math.floor(Math.random() * 10);
-          const isVertical = Math.random() > 0.5;
-
-          if (this.isValidPlacement(this.opponentBoard, row, col, ship.size, isVertical)) {
-            this.placeShip(this.opponentBoard, row, col, ship.size, isVertical, ship.type);
-
-            const { rf, cf } = this.getShipEndCoords(row, col, ship.size, isVertical);
-
-            try {
-              await api.placeVessel(this.currentGameId, cpuPlayer.id, {
-                ri: row,
-                ci: col,
-                rf: rf,
-                cf: cf,
-                vessel: ship.type,
-              });
-            } catch (e) {
-              console.error(`Error guardando barco ${type} del CPU`, e.message);
-            }
-
-            placed = true;
-          }
+      try {
+        const response = await api.autoPlaceVessels(this.currentGameId, cpuPlayer.id);
+        for (const vessel of response.data) {
+          const isVertical = vessel.ri !== vessel.rf;
+          const size = isVertical ? vessel.rf - vessel.ri + 1 : vessel.cf - vessel.ci + 1;
+          this.placeShip(this.opponentBoard, vessel.ri, vessel.ci, size, isVertical, vessel.vessel);
         }
+      } catch (e) {
+        console.error("Error guardando los barcos del CPU", e.message);
       }
     },
 
@@ -372,8 +371,8 @@ export const useGameStore = defineStore("game", {
      * - Valida que sigui fase “playing” i que no estigui processant un altre disparo.
      * - No accepta clics si ja hi ha un disparo a aquesta casella (hit o miss).
      * - Envia la petició fireShot() i actualitza localment tauler i gameStatus.
-     * - Després de disparar, fa getGameState() per refrescar. Si la partida no acaba,
-     *   invoca opponentTurn() perquè el CPU jugui.
+     * - Després de disparar, fa getGameState() per refrescar. El torn de la CPU el juga el
+     *   backend dins la mateixa petició quan el jugador falla.
      */
     async handleOpponentBoardClick(row, col) {
       //Debugging
@@ -417,14 +416,9 @@ export const useGameStore = defineStore("game", {
           this.gameStatus = "Miss!";
         }
         console.log(`🚹 Disparo del PLAYER en (${row}, ${col}) →`, result === 1 ? "Hit" : "Miss");
-        // 🔄 Actualizar estado tras disparar
+        // 🔄 Actualizar estado tras disparar (inclou els dispars de la CPU si n'hi ha hagut)
         await this.getGameState(this.currentGameId);
 
-        // ✅ Solo si el juego sigue, hacer turno del CPU
-        if (this.gamePhase !== "gameOver") {
-          await this.opponentTurn();
-        }
-
       } catch (error) {
         console.error("Error al disparar:", error.response?.data); // <-- Agrega esto
         const msg = error.response?.data?.detail || JSON.stringify(error.response?.data) || error.message;
@@ -436,75 +430,19 @@ export const useGameStore = defineStore("game", {
     },
 
     /**
-     * Lògica del torn del CPU:
-     * - Mentre el CPU encerti (‘result === 1’) i no sigui ‘gameOver’ i sigui el seu torn,
-     *   es generen coordenades aleatòries vàlides, es fa fireShot() i després getGameState().
-     * - Si hi ha impacte, el CPU continua jugant; si falla, passa el torn al jugador.
-     */
-    async opponentTurn() {
-      if (this.gamePhase === "gameOver") {
-        return
-      }
-
-      const cpuPlayer = this.playersInGame.find(p => p.nickname === "cpu");
-      if (!cpuPlayer) {
-        console.warn("No se encontró el jugador CPU.");
-        return;
-      }
-
-      console.log("🤖 TURNO DEL CPU");
-      console.log("Fase actual:", this.gamePhase);
-      console.log("Jugador CPU:", cpuPlayer);
-      console.log("Es el turno del CPU:", this.turnId === cpuPlayer.id);
-
-      let result = 1;
-
-      // El bucle se repite mientras el CPU acierte y no haya terminado el juego
-      while (result === 1 && this.gamePhase !== "gameOver" && this.turnId == cpuPlayer.id) {
-        let row, col, valid = false;
-
-        while (!valid) {
-          row = Math.floor(Math.random() * 10);
-          col = Math.floor(Math.random() * 10);
-          valid = this.playerBoard[row][col] >= 0 && this.playerBoard[row][col] < 10;
-        }
-
-        try {
-          const response = await api.fireShot(this.currentGameId, cpuPlayer.id, { row, col });
-          result = response.data.result;
-          //console.log(🤖 Disparo del CPU en (${row}, ${col}) →, result === 1 ? "Hit" : "Miss");
-
-          // 🔄 Actualizar estado tras disparo
-          await this.getGameState(this.currentGameId);
-
-          if (this.gamePhase === "gameOver") {
-            console.log("🏁 Partida finalizada tras disparo del CPU");
-            return;
-          }
-
-          if (result === 1) {
-            this.gameStatus = "CPU hit your ship! - Again!";
-          } else {
-            this.gameStatus = "Your turn";
-          }
-
-        } catch (error) {
-          const msg = error.response?.data?.detail || error.message;
-          console.error("Error en turno del CPU:", msg);
-          this.gameStatus = msg;
-          break;
-        }
-      }
-    },
-
-    /**
-     * Obtiene la llista de partides disponibles cridant a api.getAllGames().
+     * Obtiene totes les partides de l'usuari cridant a api.getAllGames() en mode resum i seguint
+     * els enllaços 'next' de la paginació per cursor.
      * Desa el resultat en availableGames per mostrar la vista “Reanudar partida”.
      */
     async fetchAvailableGames() {
       try {
-        const response = await api.getAllGames();
-        this.availableGames = response.data;
+        let response = await api.getAllGames({ view: "summary", player: "me", page_size: 100 });
+        const games = [...response.data.results];
+        while (response.data.next) {
+          response = await api.getPage(response.data.next);
+          games.push(...response.data.results);
+        }
+        this.availableGames = games;
 
         console.log("📦 Partidas disponibles:", this.availableGames);
       } catch (error) {
@@ -533,76 +471,21 @@ export const useGameStore = defineStore("game", {
 
     /**
      * Obté el “Leaderboard”:
-     * 1) Crida a api.getAllGames() per obtenir totes les partides.
-     * 2) Construeix un mapa d’ID de jugador -> nickname a partir de 'extended_status'.
-     * 3) Comptabilitza, per a cada nickname:
-     *    - 'totalGames': com a “owner” de la partida.
-     *    - 'wonGames': si apareix com a 'winner' en la resposta.
-     * 4) Converteix aquest mapa en un array d’objectes { nickname, totalGames, wonGames, score } on 'score = wonGames/totalGames'.
-     * 5) Ordena descendent per 'score' i desa els 5 primers a 'this.leaderboard'.
+     * 1) Crida a api.getLeaderboard() per obtenir els 5 primers jugadors per percentatge de victòries.
+     * 2) Desa a 'this.leaderboard' objectes { nickname, totalGames, wonGames, score } on 'score = wonGames/totalGames'.
      *
      * En cas d’error, es llancen perquè ho gestioni el component.
      */
     async getLeaderBoard() {
       try {
-        // 1) Obtener todas las partidas
-        const response = await api.getAllGames();
-        const games = response.data;
-
-        // 2) Construir mapa ID→nickname a partir de extended_status
-        const idToNickname = {};
-        for (const game of games) {
-          const ext = game.extended_status;
-          if (ext) {
-            if (ext.player && ext.player.id) {
-              idToNickname[ext.player.id] = ext.player.username;
-            }
-            if (ext.opponent && ext.opponent.id) {
-              idToNickname[ext.opponent.id] = ext.opponent.username;
-            }
-          }
-        }
-
-        // 3) Acumular stats por nickname
-        const statsMap = {};
-        // 3.1) totalGames como “owner”
-        for (const game of games) {
-          const ownerNickname = game.owner;
-          if (!statsMap[ownerNickname]) {
-            statsMap[ownerNickname] = { totalGames: 0, wonGames: 0 };
-          }
-          statsMap[ownerNickname].totalGames += 1;
-        }
-        // 3.2) wonGames según game.winner (ID→nickname)
-        for (const game of games) {
-          const winnerId = game.winner;
-          if (winnerId !== null) {
-            const winnerNickname = idToNickname[winnerId];
-            if (winnerNickname) {
-              if (!statsMap[winnerNickname]) {
-                statsMap[winnerNickname] = { totalGames: 0, wonGames: 0 };
-              }
-              statsMap[winnerNickname].wonGames += 1;
-            }
-          }
-        }
-
-        // 4) Convertir statsMap a array y calcular score
-        const tempArray = [];
-        for (const [nickname, { totalGames, wonGames }] of Object.entries(statsMap)) {
-          if (totalGames > 0) {
-            tempArray.push({
-              nickname,
-              totalGames,
-              wonGames,
-              score: wonGames / totalGames,
-            });
-          }
-        }
-
-        // 5) Ordenar descendente por score y quedarnos con los 5 primeros
-        tempArray.sort((a, b) => b.score - a.score);
-        this.leaderboard = tempArray.slice(0, 5);
+        // La classificació es calcula al backend; només cal demanar els 5 primers
+        const response = await api.getLeaderboard({ ordering: "-win_rate,-games_won", page_size: 5 });
+        this.leaderboard = response.data.results.map((stats) => ({
+          nickname: stats.nickname,
+          totalGames: stats.games_played,
+          wonGames: stats.games_won,
+          score: stats.win_rate,
+        }));
       } catch (err) {
         console.error("Error obteniendo leaderboard en el store:", err);
         throw err; // Lo lanzamos para que el componente lo gestione